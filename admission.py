@@ -0,0 +1,190 @@
+"""
+Admission control for upstream LLM calls.
+
+Every structuring call takes a slot from an AdmissionController first. A
+slot is free while fewer calls than the current limit are in flight
+overall, and fewer than key_limit for the caller's API key. Otherwise the
+caller waits in a bounded FIFO queue. A full queue, or a wait longer than
+queue_timeout, fails fast with AdmissionRejected (503 with Retry-After)
+instead of tying up a worker thread behind an upstream that is already
+saturated.
+
+The overall limit adapts to the upstream with AIMD. Each call that
+finishes in time raises it by 1/limit, so about one slot per limit calls.
+A rate-limit error, a timeout or a call slower than latency_target halves
+it, at most once per round of calls that started after the previous
+decrease. Callers retry outside the slot, so a backing-off call does not
+hold one, and raise UpstreamBusy (also a 503) once retries run out.
+
+Limits are per process: with several gunicorn workers the upstream sees up
+to workers x max_limit calls.
+"""
+import math
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from werkzeug.exceptions import ServiceUnavailable
+
+
+class AdmissionRejected(ServiceUnavailable):
+    """No LLM slot became free in time; retry after retry_after seconds"""
+
+
+class UpstreamBusy(ServiceUnavailable):
+    """The upstream kept rate limiting or timing out after every retry"""
+
+
+class _Waiter:
+    __slots__ = ('key', 'admitted')
+
+    def __init__(self, key):
+        self.key = key
+        self.admitted = False
+
+
+class _Ticket:
+    """One admitted call: when it started and which limit decrease it saw"""
+    __slots__ = ('key', 'started', 'epoch')
+
+    def __init__(self, key, started, epoch):
+        self.key = key
+        self.started = started
+        self.epoch = epoch
+
+
+class AdmissionController:
+    """Global and per-key concurrency caps with a bounded FIFO wait queue and an AIMD limit"""
+
+    def __init__(self, max_limit=16, min_limit=1, initial_limit=None, key_limit=4, max_queue=32,
+                 queue_timeout=30.0, latency_target=None, decrease_ratio=0.5, on_wait=None,
+                 clock=time.monotonic):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(min(max_limit, initial_limit or max_limit))
+        self.key_limit = key_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.decrease_ratio = decrease_ratio
+        self.on_wait = on_wait  # Called with each admitted call's queue wait in seconds
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._in_flight = 0
+        self._key_in_flight = Counter()
+        self._epoch = 0  # Bumped on every decrease
+        self._latency = None  # Moving average of call seconds, for Retry-After
+        self.counts = Counter()  # admitted, rejected_queue_full, rejected_timeout, overloads
+
+    # ---- Admission ----
+
+    def _has_room(self, key):
+        return self._in_flight < int(self.limit) and self._key_in_flight[key] < self.key_limit
+
+    def _dispatch(self):
+        """Admit queued waiters in order while there is room; caller holds the lock"""
+        admitted = False
+        for waiter in self._queue:
+            if self._in_flight >= int(self.limit):
+                break
+            if not waiter.admitted and self._key_in_flight[waiter.key] < self.key_limit:
+                waiter.admitted = True
+                self._in_flight += 1
+                self._key_in_flight[waiter.key] += 1
+                admitted = True
+        if admitted:
+            self._cond.notify_all()
+
+    def retry_after(self):
+        """Seconds a rejected caller should wait: the queue ahead of it drained at the current limit
+
+        Capped at queue_timeout, after which everyone queued now has been
+        admitted or turned away.
+        """
+        latency = self._latency or 5.0  # Until a call has finished
+        drain = latency * (len(self._queue) + 1) / max(1, int(self.limit))
+        return max(1, min(math.ceil(self.queue_timeout), math.ceil(drain)))
+
+    def acquire(self, key):
+        """Take a slot for key, waiting in the queue if needed; returns a ticket for release()"""
+        start = self.clock()
+        with self._cond:
+            if not self._queue and self._has_room(key):
+                self._in_flight += 1
+                self._key_in_flight[key] += 1
+            else:
+                if len(self._queue) >= self.max_queue:
+                    self.counts['rejected_queue_full'] += 1
+                    raise AdmissionRejected('Too many resumes are being processed. Please try again shortly.',
+                                            retry_after=self.retry_after())
+                waiter = _Waiter(key)
+                self._queue.append(waiter)
+                deadline = start + self.queue_timeout
+                try:
+                    while not waiter.admitted:
+                        remaining = deadline - self.clock()
+                        if remaining <= 0:
+                            self.counts['rejected_timeout'] += 1
+                            raise AdmissionRejected('Timed out waiting for a free slot. Please try again shortly.',
+                                                    retry_after=self.retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self._queue.remove(waiter)
+            self.counts['admitted'] += 1
+            ticket = _Ticket(key, self.clock(), self._epoch)
+        if self.on_wait:
+            self.on_wait(ticket.started - start)
+        return ticket
+
+    def release(self, ticket, overloaded=False):
+        """Return a slot; overloaded, or a call slower than latency_target, lowers the limit"""
+        elapsed = self.clock() - ticket.started
+        with self._cond:
+            self._in_flight -= 1
+            self._key_in_flight[ticket.key] -= 1
+            if not self._key_in_flight[ticket.key]:
+                del self._key_in_flight[ticket.key]
+            slow = self.latency_target is not None and elapsed > self.latency_target
+            if overloaded or slow:
+                self.counts['overloads'] += 1
+                # Calls started before the last decrease saw the old load; count one decrease per round
+                if ticket.epoch == self._epoch:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_ratio)
+                    self._epoch += 1
+            else:
+                self._latency = elapsed if self._latency is None else 0.8 * self._latency + 0.2 * elapsed
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, key):
+        """Hold a slot for the with block"""
+        ticket = self.acquire(key)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def call(self, key, fn, overload_on=()):
+        """fn() in a slot; overload_on errors (rate limits, timeouts) also lower the limit"""
+        ticket = self.acquire(key)
+        overloaded = False
+        try:
+            return fn()
+        except overload_on:
+            overloaded = True
+            raise
+        finally:
+            self.release(ticket, overloaded)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'in_flight': self._in_flight,
+                'queued': len(self._queue),
+                'keys_in_flight': len(self._key_in_flight),
+                **self.counts,
+            }
@@ -0,0 +1,120 @@
+"""
+Concurrent batch processing of many resumes.
+
+Text extraction is CPU-bound and fans out across a process pool; the LLM
+call and rendering are I/O-bound and run on a thread pool whose size is the
+upstream concurrency limit. Results are yielded as soon as each file is
+done, so callers can stream them back.
+"""
+import random
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def retry_with_backoff(fn, retry_on, max_retries=4, base_delay=1.0, max_delay=30.0):
+    """Call fn(), retrying exceptions in `retry_on` with jittered exponential backoff"""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt >= max_retries:
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            delay = random.uniform(delay / 2, delay)
+            attempt += 1
+            print(f"Retrying after {type(e).__name__} (attempt {attempt}/{max_retries}, sleeping {delay:.1f}s)")
+            time.sleep(delay)
+
+
+def run_batch(items, extract, finish, extract_pool, llm_concurrency):
+    """Process items concurrently and yield one result dict per item as it completes
+
+    items: dicts with 'name', 'pdf_bytes' and optionally a cached 'extracted'
+    extract: picklable fn(pdf_bytes) -> extracted text, run in extract_pool
+    finish: fn(item, extracted) -> result dict, run on the LLM thread pool
+    """
+    with ThreadPoolExecutor(max_workers=llm_concurrency, thread_name_prefix='batch-llm') as llm_pool:
+        owners = {}
+        pending = set()
+
+        for item in items:
+            item['started_at'] = time.time()
+            if item.get('extracted') is not None:
+                future = llm_pool.submit(finish, item, item['extracted'])
+                owners[future] = ('finish', item)
+            else:
+                future = extract_pool.submit(extract, item['pdf_bytes'])
+                owners[future] = ('extract', item)
+            pending.add(future)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, item = owners.pop(future)
+                if kind == 'extract':
+                    try:
+                        extracted = future.result()
+                    except Exception as e:
+                        yield failed_result(item, str(e))  # Extraction errors already say what was wrong
+                        continue
+                    next_future = llm_pool.submit(finish, item, extracted)
+                    owners[next_future] = ('finish', item)
+                    pending.add(next_future)
+                else:
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield failed_result(item, str(e))
+
+
+def failed_result(item, error):
+    """Result dict for an item that could not be processed"""
+    return {
+        'name': item['name'],
+        'ok': False,
+        'error': error,
+        'seconds': round(time.time() - item['started_at'], 3),
+    }
+
+
+def read_zip_upload(file_obj, max_files, max_file_size):
+    """Return [(name, pdf_bytes)] for the PDFs in a ZIP upload; raises ValueError"""
+    try:
+        archive = zipfile.ZipFile(file_obj)
+    except zipfile.BadZipFile:
+        raise ValueError('Uploaded archive is not a valid ZIP file')
+
+    files = []
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith('.pdf'):
+                continue
+            if len(files) >= max_files:
+                raise ValueError(f'Too many files. Maximum is {max_files} per batch')
+            # Check the declared size before inflating anything (zip bombs)
+            if info.file_size > max_file_size:
+                raise ValueError(f'{name} is too large. Maximum size is {max_file_size / 1024 / 1024}MB')
+            files.append((name.rsplit('/', 1)[-1], archive.read(info)))
+    return files
+
+
+class ZipStream:
+    """Write-only file object that hands zipfile output back in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
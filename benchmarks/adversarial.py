@@ -0,0 +1,162 @@
+"""
+Adversarial PDFs for exercising extraction limits.
+
+Each generator returns the bytes of a file that is expensive to extract.
+The cases are:
+- thousands of pages;
+- one page with hundreds of thousands of positioned words;
+- a compressed content stream that inflates to megabytes of text operators;
+- form XObjects that draw each other millions of times (a 4 KB file that
+  takes minutes and gigabytes);
+- an embedded font that is megabytes of noise;
+- truncated or non-PDF bytes.
+The files are written by hand rather than with PyMuPDF, so a generator
+never has to hold the inflated content itself.
+
+Usage: python benchmarks/adversarial.py OUTPUT_DIR
+"""
+import os
+import random
+import sys
+import zlib
+
+from synthetic import make_resume_fixture
+
+FONT = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+
+
+def _stream(data, compress=True, extra=b''):
+    """A stream object body, Flate-compressed unless compress is False"""
+    if compress:
+        data = zlib.compress(data, 9)
+        extra += b' /Filter /FlateDecode'
+    return b'<< /Length %d%s >>\nstream\n%s\nendstream' % (len(data), extra, data)
+
+
+def write_pdf(objects):
+    """Serialize numbered objects (object 1 must be the catalog) with an xref table"""
+    out = bytearray(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _document(page_contents, resources=b'<< /Font << /F1 3 0 R >> >>', extra_objects=()):
+    """Catalog, pages tree and font, then one page per content object number in page_contents
+
+    page_contents are object numbers counted from the first of extra_objects
+    (numbered from 4).
+    """
+    first_page = 4 + len(extra_objects)
+    kids = b' '.join(b'%d 0 R' % (first_page + i) for i in range(len(page_contents)))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_contents)),
+        FONT,
+        *extra_objects,
+    ]
+    for content in page_contents:
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources %s /Contents %d 0 R >>'
+                       % (resources, content))
+    return write_pdf(objects)
+
+
+def many_pages(pages=5000):
+    """Thousands of one-line pages sharing a single content stream"""
+    content = _stream(b'BT /F1 11 Tf 72 720 Td (Senior Associate, Blackstone, New York) Tj ET')
+    return _document([4] * pages, extra_objects=[content])
+
+
+def dense_page(words=300000):
+    """One page of individually positioned words, the worst case for layout sorting"""
+    rng = random.Random(0)
+    ops = [b'BT /F1 2 Tf']
+    for _ in range(words):
+        ops.append(b'1 0 0 1 %d %d Tm (w%d) Tj' % (rng.randint(0, 600), rng.randint(0, 780), rng.randint(0, 99)))
+    ops.append(b'ET')
+    return _document([4], extra_objects=[_stream(b'\n'.join(ops))])
+
+
+def inflation_bomb(megabytes=8):
+    """A content stream of repeated text operators that inflates several hundredfold"""
+    line = b'BT /F1 1 Tf 10 10 Td (bomb) Tj ET\n'
+    data = line * (megabytes * 1024 * 1024 // len(line))
+    return _document([4], extra_objects=[_stream(data)])
+
+
+def nested_xobjects(depth=22):
+    """A chain of form XObjects, each drawing the next twice: 2**depth copies of the text"""
+    objects = []
+    first = 4
+    for level in range(depth):
+        number = first + level
+        if level == depth - 1:
+            content = b'BT /F1 8 Tf 10 10 Td (deep) Tj ET'
+            resources = b'<< /Font << /F1 3 0 R >> >>'
+        else:
+            content = b'/X Do /X Do'
+            resources = b'<< /XObject << /X %d 0 R >> >>' % (number + 1)
+        objects.append(_stream(content, compress=False,
+                               extra=b' /Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources ' + resources))
+    objects.append(_stream(b'/X Do', compress=False))
+    return _document([first + depth], resources=b'<< /XObject << /X %d 0 R >> >>' % first,
+                     extra_objects=objects)
+
+
+def huge_font(megabytes=8):
+    """Text in an embedded TrueType font whose program is megabytes of noise"""
+    rng = random.Random(0)
+    font_program = _stream(rng.randbytes(megabytes * 1024 * 1024), compress=False,
+                           extra=b' /Length1 %d' % (megabytes * 1024 * 1024))
+    descriptor = (b'<< /Type /FontDescriptor /FontName /Noise /Flags 32 /FontBBox [0 0 1000 1000] '
+                  b'/ItalicAngle 0 /Ascent 800 /Descent -200 /CapHeight 700 /StemV 80 /FontFile2 5 0 R >>')
+    font = b'<< /Type /Font /Subtype /TrueType /BaseFont /Noise /FontDescriptor 6 0 R >>'
+    content = _stream(b'BT /F2 11 Tf 72 720 Td (Noise font) Tj ET')
+    return _document([8], resources=b'<< /Font << /F1 3 0 R /F2 7 0 R >> >>',
+                     extra_objects=[content, font_program, descriptor, font])
+
+
+def truncated():
+    """The first half of a normal resume"""
+    pdf_bytes = make_resume_fixture(seed=0)[0]
+    return pdf_bytes[:len(pdf_bytes) // 2]
+
+
+def not_a_pdf():
+    return random.Random(0).randbytes(64 * 1024)
+
+
+CORPUS = {
+    'many_pages': many_pages,
+    'dense_page': dense_page,
+    'inflation_bomb': inflation_bomb,
+    'nested_xobjects': nested_xobjects,
+    'huge_font': huge_font,
+    'truncated': truncated,
+    'not_a_pdf': not_a_pdf,
+}
+
+
+def make_corpus():
+    """{name: pdf_bytes} for every adversarial case"""
+    return {name: make() for name, make in CORPUS.items()}
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit(__doc__.strip().splitlines()[-1])
+    os.makedirs(sys.argv[1], exist_ok=True)
+    for name, pdf_bytes in make_corpus().items():
+        with open(os.path.join(sys.argv[1], f'{name}.pdf'), 'wb') as f:
+            f.write(pdf_bytes)
+        print(f"{name}.pdf: {len(pdf_bytes) / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
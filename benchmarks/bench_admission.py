@@ -0,0 +1,124 @@
+"""
+Benchmark: a burst of /api/process uploads against an upstream with limited
+capacity, with and without LLM admission control.
+
+The stub answers at most --capacity completions at once and returns 429 for
+the rest, the way a provider's rate limit behaves. --burst uploads of
+distinct resumes (so the result cache never answers) are sent at once with
+the local parser off. "unbounded" is the previous behaviour: every request
+goes straight to OpenAI, and the client retries 429s itself
+(OPENAI_MAX_RETRIES=2) before the error comes back as a 500. "admission" uses
+the defaults from server.py. Reports status codes, latency, 503 Retry-After
+values, 429s seen upstream, the adapted concurrency limit and queue waits.
+
+Usage: python benchmarks/bench_admission.py [--burst 60] [--capacity 6] [--latency 1.0]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_fixture  # noqa: E402
+from llm_client import ClientPool  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def upload(server, pdf_bytes, start_gate):
+    client = server.app.test_client()
+    with client.session_transaction() as session:
+        session['authenticated'] = True
+    start_gate.wait()
+    start = time.perf_counter()
+    response = client.post('/api/process?format=json', data={
+        'api_key': 'sk-bench',
+        'pdf_file': (io.BytesIO(pdf_bytes), 'resume.pdf'),
+    })
+    return response.status_code, time.perf_counter() - start, response.headers.get('Retry-After')
+
+
+def run(name, server, stub, pdfs, controller, client_retries):
+    """Send pdfs at once; controller None bypasses admission control entirely"""
+    server.openai_clients = ClientPool(max_retries=client_retries, base_url=stub.base_url)
+    rejected_before = stub.httpd.rejected
+    waits, limits = [], []
+    done = threading.Event()
+
+    def sample_limit():
+        while not done.wait(0.1):
+            limits.append(controller.limit)
+
+    if controller is not None:
+        server.llm_admission = controller
+        controller.on_wait = waits.append
+        threading.Thread(target=sample_limit, daemon=True).start()
+
+    gate = threading.Barrier(len(pdfs))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(pdfs)) as pool:
+        results = list(pool.map(lambda pdf: upload(server, pdf, gate), pdfs))
+    elapsed = time.perf_counter() - start
+    done.set()
+
+    statuses = Counter(status for status, _, _ in results)
+    ok = [seconds for status, seconds, _ in results if status == 200]
+    failed = [seconds for status, seconds, _ in results if status != 200]
+    retry_after = sorted(int(value) for status, _, value in results if status == 503 and value)
+    print(f"\n{name}")
+    print(f"  statuses: {dict(sorted(statuses.items()))} in {elapsed:.1f}s")
+    print(f"  200 latency: p50 {percentile(ok, 0.5):.2f}s  p95 {percentile(ok, 0.95):.2f}s  max {max(ok, default=0):.2f}s")
+    if failed:
+        print(f"  non-200 latency: p50 {percentile(failed, 0.5):.2f}s  max {max(failed):.2f}s")
+    if retry_after:
+        print(f"  503 Retry-After: min {retry_after[0]}s  median {statistics.median(retry_after):.0f}s  max {retry_after[-1]}s")
+    print(f"  upstream 429s for exceeding capacity: {stub.httpd.rejected - rejected_before}")
+    if limits:
+        print(f"  concurrency limit: min {min(limits):.1f}  max {max(limits):.1f}  final {controller.limit:.1f}")
+    if waits:
+        print(f"  queue wait: p50 {percentile(waits, 0.5):.2f}s  p95 {percentile(waits, 0.95):.2f}s  (n={len(waits)})")
+    if controller is not None:
+        print(f"  admission: {dict(controller.counts)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LLM admission control under a burst')
+    parser.add_argument('--burst', type=int, default=60, help='Concurrent uploads')
+    parser.add_argument('--capacity', type=int, default=6, help='Concurrent completions the stub accepts')
+    parser.add_argument('--latency', type=float, default=1.0, help='Seconds per completion')
+    args = parser.parse_args()
+
+    pdfs = [make_resume_fixture(seed=seed)[0] for seed in range(2 * args.burst)]
+    with StubServer(latency=args.latency, max_in_flight=args.capacity) as stub:
+        os.environ.update(OPENAI_BASE_URL=stub.base_url, LOCAL_PARSER='0', APP_PASSWORD_HASH='unused',
+                          SERVER_TIMING='0')
+        import server
+        from admission import AdmissionController
+
+        call_llm = server.call_llm
+        server.call_llm = lambda api_key, fn: fn()
+        run('unbounded (previous): no admission, client retries 429s twice', server, stub,
+            pdfs[:args.burst], None, client_retries=2)
+        server.call_llm = call_llm
+
+        admission = AdmissionController(
+            max_limit=server.LLM_MAX_CONCURRENCY, min_limit=server.LLM_MIN_CONCURRENCY,
+            initial_limit=server.LLM_INITIAL_CONCURRENCY, key_limit=server.LLM_KEY_CONCURRENCY,
+            max_queue=server.LLM_QUEUE_MAX, queue_timeout=server.LLM_QUEUE_TIMEOUT,
+            latency_target=server.LLM_LATENCY_TARGET)
+        run('admission control (defaults)', server, stub, pdfs[args.burst:], admission, client_retries=0)
+
+
+if __name__ == '__main__':
+    main()
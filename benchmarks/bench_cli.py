@@ -0,0 +1,116 @@
+"""
+Benchmark: formatting a directory of resumes with cli.py versus scripting
+uploads to /api/process, the way backfills were done before.
+
+--files distinct synthetic resumes are written to a temporary directory.
+The local parser is off, so every file makes one completion call to a stub
+answering in --latency seconds. "scripted uploads" runs in a fresh process
+and posts each file to /api/process (DOCX response) from --clients threads
+through Flask's test client, so no network or login round trips are
+counted; their cost on a real server comes on top. "cli.py" runs the CLI
+against the same directory, then again to show a resumed run skipping
+everything. Reports wall time, files per minute and the CLI's per-stage
+timings from summary.json.
+
+Usage: python benchmarks/bench_cli.py [--files 200] [--clients 4] [--latency 0.5] [--workers 2]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_fixture  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def scripted_uploads(input_dir, clients):
+    """Runs in a child process; posts every PDF to /api/process and returns the wall time"""
+    sys.stdout = open(os.devnull, 'w')  # App logs
+    import server
+    paths = sorted(os.path.join(input_dir, name) for name in os.listdir(input_dir))
+
+    def upload(path):
+        client = server.app.test_client()
+        with client.session_transaction() as session:
+            session['authenticated'] = True
+        with open(path, 'rb') as f:
+            response = client.post('/api/process', data={
+                'api_key': 'sk-bench',
+                'pdf_file': (io.BytesIO(f.read()), os.path.basename(path)),
+            })
+        assert response.status_code == 200, response.get_json()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(upload, paths))
+    return time.perf_counter() - start
+
+
+def run_cli(input_dir, output_dir, workers, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(ROOT, 'cli.py'), input_dir, '-o', output_dir,
+                    '--api-key', 'sk-bench', '--workers', str(workers)],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    with open(os.path.join(output_dir, 'summary.json'), encoding='utf-8') as f:
+        return elapsed, json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cli.py against scripted /api/process uploads')
+    parser.add_argument('--files', type=int, default=200, help='Distinct resumes to format')
+    parser.add_argument('--clients', type=int, default=4, help='Upload threads for the scripted run')
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds per completion')
+    parser.add_argument('--workers', type=int, default=2, help='cli.py --workers')
+    parser.add_argument('--scripted', metavar='DIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scripted:
+        sys.__stdout__.write(json.dumps(scripted_uploads(args.scripted, args.clients)) + '\n')
+        return
+
+    with tempfile.TemporaryDirectory() as tmp, StubServer(latency=args.latency) as stub:
+        input_dir = os.path.join(tmp, 'resumes')
+        os.makedirs(input_dir)
+        for seed in range(args.files):
+            with open(os.path.join(input_dir, f'resume_{seed:05d}.pdf'), 'wb') as f:
+                f.write(make_resume_fixture(seed=seed)[0])
+        env = dict(os.environ, OPENAI_BASE_URL=stub.base_url, LOCAL_PARSER='0', APP_PASSWORD_HASH='unused',
+                   SERVER_TIMING='0')
+
+        print(f"{args.files} resumes, {args.latency:g}s per completion")
+        print(f"  {'mode':34} {'seconds':>8} {'files/min':>10}")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--scripted', input_dir, '--clients', str(args.clients)],
+            env=env, capture_output=True, text=True, check=True).stdout
+        elapsed = json.loads(output.strip().splitlines()[-1])
+        print(f"  {f'scripted uploads ({args.clients} threads)':34} {elapsed:8.1f} {args.files / elapsed * 60:10.0f}")
+
+        output_dir = os.path.join(tmp, 'formatted')
+        elapsed, summary = run_cli(input_dir, output_dir, args.workers, env)
+        print(f"  {f'cli.py (--workers {args.workers})':34} {elapsed:8.1f} {args.files / elapsed * 60:10.0f}")
+        elapsed, resumed = run_cli(input_dir, output_dir, args.workers, env)
+        print(f"  {'cli.py again (resumed)':34} {elapsed:8.1f}   {resumed['counts']}")
+
+        print(f"\n  cli.py stage       {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for stage in ('extract', 'structure', 'render'):
+            values = [r[f'{stage}_seconds'] for r in summary['results'] if r[f'{stage}_seconds'] is not None]
+            print(f"  {stage:18} {percentile(values, 0.5) * 1e3:8.0f} {percentile(values, 0.95) * 1e3:8.0f} "
+                  f"{max(values, default=0) * 1e3:8.0f}")
+
+
+if __name__ == '__main__':
+    main()
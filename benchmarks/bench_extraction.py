@@ -0,0 +1,184 @@
+"""
+Extraction benchmark and golden check.
+
+The original per-line implementation of extract_text_from_pdf_bytes is kept
+here verbatim as the reference. Every synthetic document and hand-written
+edge case must produce exactly the same text with the current extractor
+before any timing is reported. extractor.sorted_text copies PyMuPDF
+internals, so PyMuPDF is pinned in requirements.txt: run this before
+moving the pin, since extracted text feeds the cache keys and the LLM
+input.
+
+Usage: python benchmarks/bench_extraction.py [--pages 10] [--iterations 20] [--workers 4]
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pymupdf as fitz  # noqa: E402
+from extractor import extract_text, extract_text_from_pdf_bytes, iter_page_lines, sorted_text  # noqa: E402
+from synthetic import make_resume_pdf  # noqa: E402
+
+
+def legacy_process_page(text):
+    """Line post-processing exactly as the original implementation did it"""
+    bullet_markers = ['•', '▪', '▫', '◦', '‣', '-', '*', '·', '●']
+
+    lines = text.split('\n')
+    processed_lines = []
+
+    for i, line in enumerate(lines):
+        original_line = line
+        line_cleaned = line.replace('\u200b', '').replace('\u200c', '').replace('\u200d', '')
+        line_stripped = line_cleaned.strip()
+
+        if not line_stripped:
+            processed_lines.append('')
+            continue
+
+        is_bullet = any(line_stripped.startswith(marker) for marker in bullet_markers)
+
+        is_continuation = False
+        if i > 0 and processed_lines:
+            prev_line_stripped = processed_lines[-1].strip()
+            if any(prev_line_stripped.startswith(marker) for marker in bullet_markers):
+                is_indented = original_line.startswith('  ') or original_line.startswith('\t')
+                if line_stripped and (line_stripped[0].islower() or is_indented):
+                    is_continuation = True
+
+        if is_bullet:
+            processed_lines.append(line_stripped)
+        elif is_continuation:
+            if processed_lines:
+                processed_lines[-1] += " " + line_stripped
+            else:
+                processed_lines.append(line_stripped)
+        else:
+            processed_lines.append(line_stripped)
+
+    return '\n'.join(processed_lines)
+
+
+def legacy_extract_text_from_pdf_bytes(pdf_bytes):
+    pdf_stream = io.BytesIO(pdf_bytes)
+    with fitz.open(stream=pdf_stream, filetype="pdf") as doc:
+        return '\n\n'.join(legacy_process_page(page.get_text("text", sort=True)) for page in doc)
+
+
+# Raw page text edge cases for the line post-processor
+GOLDEN_PAGES = [
+    "",
+    "\n\n\n",
+    "Jane Doe\n• Bullet one\ncontinued lowercase\n  Indented continuation\nNot a continuation",
+    "\u200b• zero width bullet\n\u200c\u200dcontinued\n\u200b",
+    "- dash\n\tTabbed continuation\n* star\n\nlowercase after blank",
+    "lowercase first line\n• bullet\n\n  indented after blank",
+    "●\n●\nx\n  \u200b  \n▪ a\n▫ b\n◦ c\n‣ d\n· e\nÉcole continuation?",
+    "• trailing bullet",
+]
+
+DOCUMENTS = [
+    {'pages': 1, 'jobs_per_page': 3, 'seed': 1},
+    {'pages': 1, 'jobs_per_page': 1, 'bullets_per_job': 1, 'columns': 3, 'seed': 5},
+    {'pages': 2, 'jobs_per_page': 4, 'seed': 2},
+    {'pages': 3, 'columns': 2, 'seed': 3},
+    {'pages': 10, 'jobs_per_page': 5, 'bullets_per_job': 8, 'seed': 4},
+]
+
+
+def check_golden():
+    for raw in GOLDEN_PAGES:
+        expected = legacy_process_page(raw)
+        actual = '\n'.join(iter_page_lines(raw))
+        assert actual == expected, f"Mismatch for {raw!r}:\n{expected!r}\n{actual!r}"
+    for spec in DOCUMENTS:
+        pdf_bytes = make_resume_pdf(**spec)
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            for page in doc:
+                assert sorted_text(page) == page.get_text("text", sort=True), f"Layout mismatch for {spec}"
+        expected = legacy_extract_text_from_pdf_bytes(pdf_bytes)
+        assert extract_text_from_pdf_bytes(pdf_bytes) == expected, f"Mismatch for {spec}"
+
+    blank = fitz.open()
+    blank.new_page()
+    assert extract_text_from_pdf_bytes(blank.tobytes()) == legacy_extract_text_from_pdf_bytes(blank.tobytes())
+    print(f"Golden check passed ({len(GOLDEN_PAGES)} page texts, {len(DOCUMENTS) + 1} documents)")
+
+
+def time_ms(fn, iterations):
+    fn()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PDF text extraction')
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    check_golden()
+
+    pdf_bytes = make_resume_pdf(pages=args.pages, jobs_per_page=5, bullets_per_job=8, seed=42)
+
+    def legacy_with_validation():
+        # The old request path opened the document once to validate and again to extract
+        fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf").close()
+        legacy_extract_text_from_pdf_bytes(pdf_bytes)
+
+    def single_open():
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            extract_text(doc)
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        raw_pages = [page.get_text("text", sort=True) for page in doc]
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pages = list(doc)
+        layout_rows = [
+            ('sorted layout only, PyMuPDF', lambda: [page.get_text("text", sort=True) for page in pages]),
+            ('sorted layout only, current', lambda: [sorted_text(page) for page in pages]),
+        ]
+        print(f"\n{args.pages}-page resume, {args.iterations} iterations")
+        print(f"{'':34} {'mean ms':>9} {'p95 ms':>9}")
+        for name, fn in layout_rows:
+            mean, p95 = time_ms(fn, args.iterations)
+            print(f"{name:34} {mean:9.2f} {p95:9.2f}")
+
+    rows = [
+        ('post-processing only, legacy', lambda: [legacy_process_page(t) for t in raw_pages]),
+        ('post-processing only, current', lambda: ['\n'.join(iter_page_lines(t)) for t in raw_pages]),
+        ('validate + extract, legacy', legacy_with_validation),
+        ('single open, current', single_open),
+    ]
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('forkserver')) as pool:
+        def parallel():
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                return extract_text(doc, pdf_bytes, executor=pool, parallel_min_pages=2,
+                                    chunk_pages=max(1, args.pages // args.workers))
+
+        assert parallel() == legacy_extract_text_from_pdf_bytes(pdf_bytes)
+        rows.append((f'page-parallel, {args.workers} workers', parallel))
+
+        for name, fn in rows:
+            mean, p95 = time_ms(fn, args.iterations)
+            print(f"{name:34} {mean:9.2f} {p95:9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: a new OpenAI client per call (the old path) versus the shared
+ClientPool, over many sequential requests to the local stub.
+
+The stub speaks plain HTTP, so the savings shown here are client
+construction and TCP setup only; against api.openai.com each avoided
+connection also skips a TLS handshake.
+
+Usage: python benchmarks/bench_llm_client.py [--requests 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai import OpenAI  # noqa: E402
+from llm_client import ClientPool  # noqa: E402
+from openai_stub import StubServer  # noqa: E402
+
+MESSAGES = [{"role": "system", "content": "stub"}, {"role": "user", "content": "resume text"}]
+
+
+def run(call, requests):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OpenAI client reuse')
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with StubServer() as stub:
+        def fresh_client():
+            client = OpenAI(api_key='sk-bench', base_url=stub.base_url)
+            client.chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+
+        pool = ClientPool(base_url=stub.base_url)
+
+        def pooled_client():
+            with pool.client('sk-bench') as client:
+                client.chat.completions.create(model='gpt-4o-mini', messages=MESSAGES)
+
+        print(f"{args.requests} sequential requests")
+        print(f"{'':22} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'connections':>12}")
+        for name, call in (('new client per call', fresh_client), ('ClientPool', pooled_client)):
+            call()  # Warm up imports and the stub
+            connections_before = stub.connections
+            mean, p50, p95 = run(call, args.requests)
+            print(f"{name:22} {mean:9.2f} {p50:9.2f} {p95:9.2f} {stub.connections - connections_before:12}")
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+Rule-based parser versus the LLM: accuracy, acceptance rate, latency and cost
+over a fixture corpus.
+
+The corpus is synthetic one-page resumes (plain and styled, with the JSON a
+correct parse should produce) plus layouts the parser should hand to the LLM
+(two columns, several resumes merged into one PDF). By default the parser is
+scored against the fixtures' expected JSON, which comes from the same
+generator that wrote the PDFs. That checks the parser against itself, not
+against the LLM, and is why LOCAL_PARSER is off by default. To score it
+against real LLM output, record references once with an API key:
+
+    OPENAI_API_KEY=sk-... python benchmarks/bench_local_parser.py --references refs/ --record
+
+and later runs with --references refs/ compare against those files. Without
+recorded references, LLM latency comes from the local stub with the given
+per-token latency.
+
+Scope: no recorded references are committed, so this is not yet the
+accuracy report against LLM outputs that the local parser was meant to
+come with. Every row and the report say what they were scored against
+('llm' or 'synthetic'); only 'llm' figures can justify turning
+LOCAL_PARSER on.
+
+Usage: python benchmarks/bench_local_parser.py [--fixtures 40] [--json report.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compaction import count_tokens  # noqa: E402
+from extractor import extract_pages_from_pdf_bytes  # noqa: E402
+from local_parser import parse_pdf_bytes  # noqa: E402
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_fixture, make_resume_pdf  # noqa: E402
+
+# gpt-4o-mini list prices, USD per million tokens
+INPUT_PRICE = 0.15
+OUTPUT_PRICE = 0.60
+
+FALLBACK_CASES = [
+    ('two-column', {'columns': 2, 'jobs_per_page': 2, 'seed': 21}),
+    ('merged-3-pages', {'pages': 3, 'jobs_per_page': 3, 'seed': 22}),
+    ('running-header', {'pages': 2, 'jobs_per_page': 3, 'seed': 23, 'running_header': True}),
+]
+
+
+def build_corpus(count):
+    """[(name, pdf_bytes, expected JSON or None)]"""
+    corpus = []
+    for seed in range(count):
+        pdf_bytes, expected = make_resume_fixture(seed=seed, jobs=2 + seed % 2, bullets_per_job=3 + seed % 3,
+                                                  styled=seed % 2 == 1)
+        corpus.append((f'fixture-{seed:03d}', pdf_bytes, expected))
+    for name, spec in FALLBACK_CASES:
+        corpus.append((name, make_resume_pdf(**spec), None))
+    return corpus
+
+
+def leaves(value, path=''):
+    """Flatten JSON into {path: normalized string}; empty values are dropped"""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = ((str(i), item) for i, item in enumerate(value))
+    else:
+        text = ' '.join(str(value).split()) if value is not None else ''
+        return {path: text} if text else {}
+    flat = {}
+    for key, item in items:
+        flat.update(leaves(item, f'{path}.{key}' if path else key))
+    return flat
+
+
+def field_group(path):
+    head = path.split('.')[0]
+    if head != 'jobs':
+        return head
+    field = path.split('.')[2]
+    return field if field in ('job_description', 'transactions') else 'jobs'
+
+
+def compare(parsed, reference):
+    """Per-group (matching leaves, leaves in either) counts"""
+    parsed, reference = leaves(parsed), leaves(reference)
+    groups = {}
+    for path in set(parsed) | set(reference):
+        matched, total = groups.get(field_group(path), (0, 0))
+        groups[field_group(path)] = (matched + (parsed.get(path) == reference.get(path)), total + 1)
+    return groups
+
+
+def record_references(server, corpus, directory, api_key):
+    os.makedirs(directory, exist_ok=True)
+    for name, pdf_bytes, _ in corpus:
+        text = server.prepare_llm_input(extract_pages_from_pdf_bytes(pdf_bytes))
+        start = time.perf_counter()
+        data = server.get_structured_data(api_key, text)
+        seconds = time.perf_counter() - start
+        with open(os.path.join(directory, f'{name}.json'), 'w') as f:
+            json.dump({'data': data, 'seconds': seconds}, f, indent=2)
+        print(f"Recorded {name} ({seconds:.1f}s)")
+
+
+def load_reference(directory, name):
+    path = os.path.join(directory, f'{name}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rule-based parser against the LLM')
+    parser.add_argument('--fixtures', type=int, default=40)
+    parser.add_argument('--references', help='Directory of recorded LLM outputs to score against')
+    parser.add_argument('--record', action='store_true', help='Record LLM outputs into --references first')
+    parser.add_argument('--token-latency', type=float, default=0.01, help='Stub seconds per output token')
+    parser.add_argument('--json', help='Write the full report to this file')
+    args = parser.parse_args()
+
+    stub = StubServer(latency=0.3, token_latency=args.token_latency).start()
+    if not args.record:
+        os.environ['OPENAI_BASE_URL'] = stub.base_url
+    import server
+
+    corpus = build_corpus(args.fixtures)
+    if args.record:
+        if not args.references or not os.getenv('OPENAI_API_KEY'):
+            parser.error('--record needs --references and OPENAI_API_KEY')
+        record_references(server, corpus, args.references, os.environ['OPENAI_API_KEY'])
+
+    threshold = server.LOCAL_PARSER_MIN_CONFIDENCE
+    system_tokens = count_tokens(server.SYSTEM_PROMPT)
+    rows = []
+    totals = {}
+    for name, pdf_bytes, expected in corpus:
+        start = time.perf_counter()
+        parse = parse_pdf_bytes(pdf_bytes)
+        local_ms = (time.perf_counter() - start) * 1000
+
+        recorded = load_reference(args.references, name) if args.references else None
+        reference = recorded['data'] if recorded else expected
+        if args.references and not recorded:
+            print(f"No recorded reference for {name}; scoring against the fixture JSON")
+        text = server.prepare_llm_input(extract_pages_from_pdf_bytes(pdf_bytes))
+        if recorded:
+            llm_ms = recorded['seconds'] * 1000
+        else:
+            stub.httpd.respond = lambda request, data=expected or parse['data']: data
+            start = time.perf_counter()
+            server.get_structured_data('sk-bench', text)
+            llm_ms = (time.perf_counter() - start) * 1000
+
+        input_tokens = system_tokens + count_tokens(text)
+        output_tokens = count_tokens(json.dumps(reference or parse['data']))
+        row = {
+            'name': name,
+            'confidence': parse['confidence'],
+            'accepted': parse['confidence'] >= threshold,
+            'issues': parse['issues'],
+            'local_ms': round(local_ms, 2),
+            'llm_ms': round(llm_ms, 1),
+            'llm_cost_usd': (input_tokens * INPUT_PRICE + output_tokens * OUTPUT_PRICE) / 1e6,
+        }
+        if reference is not None:
+            row['scored_against'] = 'llm' if recorded else 'synthetic'
+            groups = compare(parse['data'], reference)
+            matched = sum(m for m, _ in groups.values())
+            total = sum(t for _, t in groups.values())
+            row['accuracy'] = round(matched / total, 4) if total else 1.0
+            if row['accepted']:
+                for group, (m, t) in groups.items():
+                    tm, tt = totals.get(group, (0, 0))
+                    totals[group] = (tm + m, tt + t)
+        rows.append(row)
+    stub.stop()
+
+    scored = {row['scored_against'] for row in rows if 'scored_against' in row}
+    print(f"{len(rows)} documents, acceptance threshold {threshold}, scored against "
+          + (' and '.join(sorted(scored)) or 'nothing')
+          + ('' if scored == {'llm'} else "\n'synthetic' scores compare the parser with the generator's own JSON, "
+                                          "not with LLM output"))
+    print(f"{'document':18} {'confidence':>10} {'used':>6} {'accuracy':>9} {'local ms':>9} {'LLM ms':>8}")
+    for row in rows:
+        accuracy = f"{row['accuracy']:.1%}" if 'accuracy' in row else '-'
+        used = 'local' if row['accepted'] else 'LLM'
+        print(f"{row['name']:18} {row['confidence']:10.3f} {used:>6} {accuracy:>9} "
+              f"{row['local_ms']:9.1f} {row['llm_ms']:8.0f}")
+
+    accepted = [row for row in rows if row['accepted']]
+    print()
+    print("Field accuracy of accepted parses:")
+    for group, (matched, total) in sorted(totals.items()):
+        print(f"  {group:20} {matched / total:7.1%}  ({matched}/{total} fields)")
+    local_total = sum(row['local_ms'] for row in rows)
+    llm_saved = sum(row['llm_ms'] for row in accepted)
+    cost_saved = sum(row['llm_cost_usd'] for row in accepted)
+    cost_all = sum(row['llm_cost_usd'] for row in rows)
+    print()
+    print(f"Accepted locally: {len(accepted)}/{len(rows)}")
+    print(f"Median latency: local {statistics.median(r['local_ms'] for r in rows):.1f} ms, "
+          f"LLM {statistics.median(r['llm_ms'] for r in rows):.0f} ms")
+    print(f"LLM time avoided: {llm_saved / 1000:.1f}s (local parsing cost {local_total / 1000:.2f}s)")
+    print(f"LLM cost avoided: ${cost_saved:.4f} of ${cost_all:.4f} "
+          f"(${cost_saved / len(rows) * 1000:.2f} per 1000 resumes)")
+
+    if args.json:
+        report = {
+            'threshold': threshold,
+            'scored_against': sorted(scored),
+            'documents': rows,
+            'field_accuracy': {group: matched / total for group, (matched, total) in totals.items()},
+            'accepted': len(accepted),
+            'llm_seconds_avoided': llm_saved / 1000,
+            'llm_cost_avoided_usd': cost_saved,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Load test for the login rate limiter: flood it with failures from many
+distinct IPs and watch memory.
+
+Compares the previous per-IP defaultdict approach (reproduced here) with
+the bounded in-memory store, once capped by LOGIN_LIMITER_MAX_KEYS and once
+kept small by the TTL sweep, then checks the SQLite store shared by several
+processes (combined limit and row count) and the latency of a failed login
+through the app, which no longer sleeps.
+
+A simulated clock advances --rate failures per second, so the run is not
+limited by wall time.
+
+Usage: python benchmarks/bench_login_limiter.py [--ips 300000] [--rate 1000] [--processes 4]
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from threading import Lock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ratelimit import LOCKED, LoginRateLimiter, MemoryAttemptStore, SQLiteAttemptStore  # noqa: E402
+
+MAX_ATTEMPTS = 5
+WINDOW = 900
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LegacyLimiter:
+    """The per-IP defaultdict(list) and defaultdict(Lock) the server used before"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.attempts = defaultdict(list)
+        self.locks = defaultdict(Lock)
+
+    def check(self, ip):
+        with self.locks[ip]:
+            now = self.clock()
+            self.attempts[ip] = [t for t in self.attempts[ip] if now - t < WINDOW]
+            return len(self.attempts[ip]) >= MAX_ATTEMPTS
+
+    def record_failure(self, ip):
+        with self.locks[ip]:
+            self.attempts[ip].append(self.clock())
+
+    @property
+    def store(self):
+        return self.attempts
+
+
+def ip_for(i):
+    return f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}' if i < 1 << 24 else f'ip-{i}'
+
+
+def flood(name, limiter, clock, ips, rate, checkpoints=10):
+    """One failed login from each of ips addresses; prints memory at checkpoints"""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    step = max(1, ips // checkpoints)
+    rows = []
+    start = time.perf_counter()
+    for i in range(ips):
+        ip = ip_for(i)
+        limiter.check(ip)
+        limiter.record_failure(ip)
+        clock.now += 1 / rate
+        if (i + 1) % step == 0:
+            rows.append((i + 1, len(limiter.store), (tracemalloc.get_traced_memory()[0] - base) / 2**20))
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    print(f"\n{name}")
+    print(f"  {'IPs seen':>10} {'keys held':>10} {'memory MiB':>11}")
+    for seen, held, mib in rows:
+        print(f"  {seen:10d} {held:10d} {mib:11.1f}")
+    print(f"  {ips * 2 / elapsed:,.0f} operations/s (check + record)")
+    return rows
+
+
+def sqlite_worker(path, index, ips, max_keys, shared_ip, results):
+    store = SQLiteAttemptStore(path, MAX_ATTEMPTS, WINDOW, max_keys=max_keys)
+    limiter = LoginRateLimiter(store, MAX_ATTEMPTS, WINDOW, failure_delay=0)
+    accepted = 0
+    start = time.perf_counter()
+    for i in range(ips):
+        ip = ip_for(index * ips + i)
+        limiter.check(ip)
+        limiter.record_failure(ip)
+        # Every worker also attacks one address; only MAX_ATTEMPTS tries in total may get through
+        if i % 50 == 0 and limiter.check(shared_ip)[0] != LOCKED:
+            limiter.record_failure(shared_ip)
+            accepted += 1
+    results.put((accepted, time.perf_counter() - start))
+
+
+def run_sqlite(processes, ips, max_keys):
+    """(rows left, attempts let through for the shared IP, operations/s)"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'login.db')
+        SQLiteAttemptStore(path, MAX_ATTEMPTS, WINDOW)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=sqlite_worker,
+                                           args=(path, i, ips, max_keys, '203.0.113.7', results))
+                   for i in range(processes)]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        rows = len(SQLiteAttemptStore(path, MAX_ATTEMPTS, WINDOW))
+    slowest = max(s for _, s in outcomes)
+    return rows, sum(a for a, _ in outcomes), processes * ips * 2 / slowest
+
+
+def bench_sqlite(processes, ips, max_keys):
+    total = processes * ips
+    print(f"\nSQLite store shared by {processes} processes ({total} IPs)")
+    _, accepted, rate = run_sqlite(processes, ips, max_keys=total + 1)
+    print(f"  attempts let through for one IP attacked from every process: {accepted} (limit {MAX_ATTEMPTS})")
+    print(f"  {rate:,.0f} operations/s combined")
+    # A key evicted by the cap loses its lockout, so the cap should exceed the IPs seen per window
+    rows, _, rate = run_sqlite(processes, ips, max_keys=max_keys)
+    print(f"  rows held with the cap at {max_keys} keys: {rows} ({rate:,.0f} operations/s)")
+
+
+def bench_app(requests):
+    os.environ.setdefault('APP_PASSWORD_HASH', hashlib.sha256(os.urandom(16)).hexdigest())
+    os.environ.pop('LOGIN_LIMITER_DB_PATH', None)
+    import server
+    client = server.app.test_client()
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        response = client.post('/api/auth/login', json={'password': 'wrong'},
+                               headers={'X-Forwarded-For': ip_for(i)})
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 401, response.status_code
+    print(f"\nFailed login through the app ({requests} requests)")
+    print(f"  median {statistics.median(latencies):.1f} ms, max {max(latencies):.1f} ms "
+          f"(previously {server.FAILED_LOGIN_DELAY * 1000:.0f} ms of sleep each)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flood the login limiter from many distinct IPs')
+    parser.add_argument('--ips', type=int, default=300000)
+    parser.add_argument('--rate', type=float, default=1000, help='Simulated failures per second')
+    parser.add_argument('--max-keys', type=int, default=50000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--sqlite-ips', type=int, default=5000, help='IPs per process for the SQLite run')
+    args = parser.parse_args()
+
+    clock = FakeClock()
+    flood('Previous defaultdict limiter', LegacyLimiter(clock), clock, args.ips, args.rate)
+
+    clock = FakeClock()
+    store = MemoryAttemptStore(MAX_ATTEMPTS, WINDOW, max_keys=args.max_keys)
+    flood(f'Bounded store, {WINDOW}s window, capped at {args.max_keys} keys',
+          LoginRateLimiter(store, MAX_ATTEMPTS, WINDOW, failure_delay=0, clock=clock), clock, args.ips, args.rate)
+
+    clock = FakeClock()
+    window = 20
+    store = MemoryAttemptStore(MAX_ATTEMPTS, window, max_keys=args.max_keys)
+    flood(f'Bounded store, {window}s window (TTL sweep keeps ~{int(window * args.rate)} keys)',
+          LoginRateLimiter(store, MAX_ATTEMPTS, window, failure_delay=0, clock=clock), clock, args.ips, args.rate)
+
+    bench_sqlite(args.processes, args.sqlite_ips, max_keys=10000)
+    bench_app(200)
+
+
+if __name__ == '__main__':
+    main()
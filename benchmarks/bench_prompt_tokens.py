@@ -0,0 +1,66 @@
+"""
+Token reduction from prompt compaction over a synthetic resume corpus.
+
+Reports tokens of the resume text before and after compaction, and of the
+whole request including the system prompt. Counts are exact when tiktoken
+and its encoding are available and estimated (compaction.CHARS_PER_TOKEN
+characters per token, an overcount) otherwise.
+
+Usage: python benchmarks/bench_prompt_tokens.py [--budget 12000]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compaction import compact_pages, count_tokens  # noqa: E402
+from extractor import extract_pages_from_pdf_bytes  # noqa: E402
+from server import SYSTEM_PROMPT  # noqa: E402
+from synthetic import make_resume_pdf  # noqa: E402
+
+CORPUS = [
+    {'pages': 1, 'jobs_per_page': 3, 'seed': 11},
+    {'pages': 2, 'jobs_per_page': 4, 'seed': 12, 'running_header': True},
+    {'pages': 3, 'jobs_per_page': 4, 'bullets_per_job': 6, 'seed': 13, 'running_header': True},
+    {'pages': 2, 'columns': 2, 'jobs_per_page': 2, 'seed': 14},
+    {'pages': 6, 'jobs_per_page': 5, 'bullets_per_job': 8, 'seed': 15, 'running_header': True},
+    {'pages': 10, 'jobs_per_page': 5, 'bullets_per_job': 8, 'seed': 16, 'running_header': True},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure prompt compaction token savings')
+    parser.add_argument('--budget', type=int, default=0, help='Token budget (0 = none)')
+    args = parser.parse_args()
+
+    system_tokens = count_tokens(SYSTEM_PROMPT)
+    print(f"System prompt: {system_tokens} tokens")
+    print(f"{'document':24} {'before':>8} {'after':>8} {'saved':>7} {'request saved':>14} {'ms':>6}")
+
+    total_before = total_after = 0
+    exact = True
+    for spec in CORPUS:
+        pages = extract_pages_from_pdf_bytes(make_resume_pdf(**spec))
+        start = time.perf_counter()
+        _, stats = compact_pages(pages, args.budget)
+        elapsed = (time.perf_counter() - start) * 1000
+        exact = stats['exact']
+
+        before, after = stats['tokens_before'], stats['tokens_after']
+        total_before += before
+        total_after += after
+        request_saved = (before - after) / (before + system_tokens)
+        label = f"{spec['pages']} pages, {spec.get('columns', 1)} col" + (', header' if spec.get('running_header') else '')
+        print(f"{label:24} {before:8} {after:8} {(before - after) / before:7.1%} {request_saved:14.1%} {elapsed:6.1f}"
+              + (' truncated' if stats['truncated'] else ''))
+
+    print(f"\nResume text: {total_before} -> {total_after} tokens "
+          f"({(total_before - total_after) / total_before:.1%} fewer)"
+          + ('' if exact else ' [estimated; run scripts/fetch_tiktoken_encoding.py for exact counts]'))
+
+
+if __name__ == '__main__':
+    main()
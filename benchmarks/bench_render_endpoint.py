@@ -0,0 +1,64 @@
+"""
+Benchmark: correcting one field by re-uploading the PDF versus sending the
+edited JSON to /api/render.
+
+Re-uploading runs validation, extraction and the LLM call again, against
+the local stub with per-token latency. The local parser is off and every
+PDF is different, so every upload takes the LLM path. /api/render only
+validates the JSON and renders the template.
+
+Usage: python benchmarks/bench_render_endpoint.py [--runs 10] [--token-latency 0.01]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_pdf  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the render-only edit loop')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.3, help='Stub seconds before the first token')
+    parser.add_argument('--token-latency', type=float, default=0.01, help='Stub seconds per output token')
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency, token_latency=args.token_latency) as stub:
+        os.environ.update(OPENAI_BASE_URL=stub.base_url, LOCAL_PARSER='0', APP_PASSWORD_HASH='unused')
+        import server
+
+        client = server.app.test_client()
+        with client.session_transaction() as session:
+            session['authenticated'] = True
+
+        upload_ms, render_ms = [], []
+        for run in range(args.runs):
+            pdf_bytes = make_resume_pdf(seed=run)
+            start = time.perf_counter()
+            response = client.post('/api/process?format=json', data={
+                'api_key': 'sk-bench', 'pdf_file': (io.BytesIO(pdf_bytes), 'resume.pdf')})
+            upload_ms.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.json
+
+            data = response.json['data']
+            data['jobs'][0]['job_title'] = 'Managing Director'
+            start = time.perf_counter()
+            response = client.post('/api/render', json=data)
+            render_ms.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.json
+
+    print(f"{args.runs} edits, stub latency {args.latency}s + {args.token_latency}s per token")
+    print(f"{'':22} {'median ms':>10} {'max ms':>8}")
+    print(f"{'re-upload the PDF':22} {statistics.median(upload_ms):10.0f} {max(upload_ms):8.0f}")
+    print(f"{'POST /api/render':22} {statistics.median(render_ms):10.1f} {max(render_ms):8.1f}")
+
+
+if __name__ == '__main__':
+    main()
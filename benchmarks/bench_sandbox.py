@@ -0,0 +1,160 @@
+"""
+Benchmark: latency of normal uploads while adversarial PDFs are processed
+alongside them, with extraction in the web worker versus in the sandbox.
+
+Each mode runs in a fresh process. --clients threads upload normal
+one-page resumes in a loop (local parser on, JSON results, so no OpenAI
+call is involved), while one more thread uploads every file from
+adversarial.py in turn, twice. The report covers:
+- latency percentiles of the normal uploads, before and during the attack;
+- what each adversarial upload returned and how long it took;
+- the web process's peak RSS (sandbox children are not included; they are
+  capped by their own RLIMIT_AS).
+
+In-process extraction holds the GIL for as long as PyMuPDF runs, so normal
+uploads stall behind a bad file. The web process is capped at
+--inprocess-memory-mb so the worst files fail instead of exhausting the box.
+
+Usage: python benchmarks/bench_sandbox.py [--clients 2] [--baseline-seconds 3]
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_fixture  # noqa: E402
+import adversarial  # noqa: E402
+
+# Scaled so extraction in the web worker finishes in seconds rather than minutes
+ATTACKS = [
+    ('many_pages', adversarial.many_pages),
+    ('dense_page', lambda: adversarial.dense_page(100000)),
+    ('inflation_bomb', lambda: adversarial.inflation_bomb(8)),
+    ('nested_xobjects', lambda: adversarial.nested_xobjects(18)),
+    ('huge_font', adversarial.huge_font),
+    ('truncated', adversarial.truncated),
+    ('not_a_pdf', adversarial.not_a_pdf),
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def make_client(server):
+    client = server.app.test_client()
+    with client.session_transaction() as session:
+        session['authenticated'] = True
+    return client
+
+
+def post(client, pdf_bytes):
+    start = time.perf_counter()
+    response = client.post('/api/process?format=json', data={
+        'api_key': 'sk-bench',
+        'pdf_file': (io.BytesIO(pdf_bytes), 'resume.pdf'),
+    })
+    return response.status_code, time.perf_counter() - start, (response.get_json() or {}).get('error')
+
+
+def run_mode(sandbox, clients, baseline_seconds):
+    """Runs in a child process; returns the results as a dict"""
+    with StubServer() as stub:
+        os.environ.update(OPENAI_BASE_URL=stub.base_url, APP_PASSWORD_HASH='unused', SERVER_TIMING='0',
+                          LOCAL_PARSER='1', EXTRACT_SANDBOX='1' if sandbox else '0')
+        import server
+        server.result_cache.get = lambda namespace, key: None  # Every upload is extracted again
+        if server.extract_sandbox is not None:
+            server.extract_sandbox.start(clients + 1)
+        normal_pdfs = [make_resume_fixture(seed=seed)[0] for seed in range(20)]
+        attacks = [(name, make()) for name, make in ATTACKS]
+
+        latencies = {'before': [], 'during': []}
+        phase = ['before']
+        stop = threading.Event()
+
+        def normal_client(offset):
+            client = make_client(server)
+            count = offset
+            while not stop.is_set():
+                status, seconds, error = post(client, normal_pdfs[count % len(normal_pdfs)])
+                assert status == 200, (status, error)
+                latencies[phase[0]].append(seconds)
+                count += 1
+
+        threads = [threading.Thread(target=normal_client, args=(i,)) for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        time.sleep(baseline_seconds)
+        phase[0] = 'during'
+        attack_results = []
+        attack_start = time.perf_counter()
+        client = make_client(server)
+        for _ in range(2):
+            for name, pdf_bytes in attacks:
+                status, seconds, error = post(client, pdf_bytes)
+                attack_results.append({'name': name, 'status': status, 'seconds': seconds, 'error': error})
+        attack_seconds = time.perf_counter() - attack_start
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return {
+        'latencies': latencies,
+        'attacks': attack_results,
+        'attack_seconds': attack_seconds,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def report(label, results):
+    print(f"\n{label}: adversarial files took {results['attack_seconds']:.1f}s, "
+          f"web process peak RSS {results['max_rss_mb']:.0f} MB")
+    print(f"  {'normal uploads':16} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for phase, values in results['latencies'].items():
+        print(f"  {phase + ' attack':16} {len(values):6d} {percentile(values, 0.5) * 1e3:8.0f} "
+              f"{percentile(values, 0.95) * 1e3:8.0f} {percentile(values, 0.99) * 1e3:8.0f} "
+              f"{max(values, default=0) * 1e3:8.0f}")
+    print(f"  {'adversarial file':16} {'status':>6} {'seconds':>8}  error")
+    for attack in results['attacks'][:len(ATTACKS)]:
+        print(f"  {attack['name']:16} {attack['status']:6d} {attack['seconds']:8.2f}  {(attack['error'] or '')[:70]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark normal upload latency next to adversarial PDFs')
+    parser.add_argument('--clients', type=int, default=2, help='Threads uploading normal resumes')
+    parser.add_argument('--baseline-seconds', type=float, default=3.0, help='Normal-only traffic before the attack')
+    parser.add_argument('--inprocess-memory-mb', type=int, default=3072, help='Address space cap without the sandbox')
+    parser.add_argument('--mode', choices=('inprocess', 'sandbox'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        if args.mode == 'inprocess':
+            limit = args.inprocess_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        sys.stdout = open(os.devnull, 'w')  # App logs
+        results = run_mode(args.mode == 'sandbox', args.clients, args.baseline_seconds)
+        sys.__stdout__.write(json.dumps(results) + '\n')
+        return
+
+    for label, mode in (('in the web worker (previous)', 'inprocess'), ('sandboxed', 'sandbox')):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--mode', mode, '--clients', str(args.clients),
+             '--baseline-seconds', str(args.baseline_seconds),
+             '--inprocess-memory-mb', str(args.inprocess_memory_mb)],
+            capture_output=True, text=True, check=True).stdout
+        report(label, json.loads(output.strip().splitlines()[-1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: structuring a resume with one completion versus one completion
+per section (LLM_SECTION_SPLIT).
+
+Resumes with a growing number of jobs are structured both ways against the
+local stub with per-token latency. In split mode the stub answers each
+section request with the matching part of the resume's expected JSON, so
+the merged result is checked against the single-call result. Reports
+p50/p95 latency and the input characters sent (the system prompt is
+repeated for every section).
+
+Usage: python benchmarks/bench_section_split.py [--jobs 2 4 8 12] [--runs 10] [--token-latency 0.005]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import StubServer  # noqa: E402
+from synthetic import resume_lines  # noqa: E402
+
+
+def resume_text(seed, jobs, bullets_per_job):
+    """(LLM input text, expected JSON) laid out as compact_pages produces it"""
+    data = {}
+    lines = resume_lines(random.Random(seed), jobs, bullets_per_job, data)
+    text = '\n'.join((' ' * bool(indent)) + '  '.join((line, *right)) for line, indent, *right in lines)
+    return text, data
+
+
+class SectionResponder:
+    """Stub respond() that answers whole-resume and per-section requests"""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.input_chars = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        messages = request['messages']
+        with self._lock:
+            self.input_chars += sum(len(message['content']) for message in messages)
+        prompt = messages[-1]['content']
+        if not prompt.startswith('The text below is only'):
+            return self.expected
+        description = prompt.split('.', 1)[0]
+        if 'name and contact' in description:
+            return {key: self.expected[key] for key in ('first_name', 'last_name')}
+        if 'education' in description:
+            return {'education': self.expected['education']}
+        if 'one job' in description:
+            heading = prompt.split('\n\n', 1)[1].split('\n', 2)[:2]
+            return {'jobs': [job for job in self.expected['jobs']
+                             if heading == [f"{job['company_name']}  {job['job_location']}",
+                                            f"{job['job_title']}  {job['job_start']} – {job['job_end']}"]][:1]}
+        return {'additional_bullets': self.expected['additional_bullets']}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark section-split structuring')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[2, 4, 8, 12])
+    parser.add_argument('--bullets', type=int, default=5, help='Bullets per job')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.3, help='Stub seconds before the first token')
+    parser.add_argument('--token-latency', type=float, default=0.005, help='Stub seconds per output token')
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency, token_latency=args.token_latency) as stub:
+        os.environ.update(OPENAI_BASE_URL=stub.base_url, APP_PASSWORD_HASH='unused')
+        import server
+
+        print(f"Stub latency {args.latency}s + {args.token_latency}s per output token, {args.runs} runs each, "
+              f"split from {server.LLM_SECTION_MIN_JOBS} jobs")
+        print(f"{'jobs':>5} {'mode':>7} {'p50 ms':>8} {'p95 ms':>8} {'input chars':>12}")
+        for jobs in args.jobs:
+            for split in (False, True):
+                server.LLM_SECTION_SPLIT = split
+                latencies, input_chars = [], []
+                for run in range(args.runs):
+                    text, expected = resume_text(run, jobs, args.bullets)
+                    responder = SectionResponder(expected)
+                    stub.httpd.respond = responder
+                    start = time.perf_counter()
+                    data = server.get_structured_data('sk-bench', text)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    assert json.dumps(data, sort_keys=True) == json.dumps(expected, sort_keys=True), jobs
+                    input_chars.append(responder.input_chars)
+                print(f"{jobs:5d} {'split' if split else 'single':>7} {percentile(latencies, 0.5):8.0f} "
+                      f"{percentile(latencies, 0.95):8.0f} {statistics.mean(input_chars):12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Start-up cost: how long importing server.py takes, and how long a cold
+gunicorn takes to answer /health and its first successful /api/process.
+
+Import time is measured in fresh interpreters (median of --imports runs),
+along with which heavy modules the import pulled in. Gunicorn is then
+started with the app preloaded and warmed in the master (gunicorn.conf.py)
+and with GUNICORN_PRELOAD=0. For each mode the script times, from launch,
+the first /health answer and the first successful /api/process. It also
+times the first /api/process of a replacement worker after the first
+worker is killed, which is what a worker recycle costs.
+
+The local parser is off, so the first upload also needs openai. Point
+--app-dir at another checkout to measure an older version the same way.
+
+Usage: python benchmarks/bench_startup.py [--imports 5] [--app-dir .]
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import secrets
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_fixture  # noqa: E402
+
+PASSWORD = 'bench-password'
+HEAVY_MODULES = ('pymupdf', 'openai', 'docxtpl', 'docx', 'lxml')
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import server
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                   'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def http_request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.getheaders(), response.read()
+    finally:
+        conn.close()
+
+
+def multipart(fields, filename, content):
+    boundary = secrets.token_hex(16)
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="pdf_file"; filename="{filename}"\r\n'
+                 f'Content-Type: application/pdf\r\n\r\n'.encode())
+    parts.append(content)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def measure_imports(app_dir, env, runs):
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], cwd=app_dir, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return statistics.median(r['seconds'] for r in results), results[-1]['heavy']
+
+
+def wait_for(check, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if check():
+                return
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError('Timed out waiting for gunicorn')
+
+
+def worker_pids(master):
+    with open(f'/proc/{master}/task/{master}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def process_resume(port, seed):
+    """Log in and upload one resume; returns the /api/process status"""
+    status, headers, _ = http_request(port, 'POST', '/api/auth/login', json.dumps({'password': PASSWORD}),
+                                      {'Content-Type': 'application/json'})
+    assert status == 200, status
+    cookie = dict(headers)['Set-Cookie'].split(';')[0]
+    body, content_type = multipart({'api_key': 'sk-bench'}, 'resume.pdf', make_resume_fixture(seed=seed)[0])
+    return http_request(port, 'POST', '/api/process', body, {'Content-Type': content_type, 'Cookie': cookie})[0]
+
+
+def cold_start(app_dir, env):
+    """Seconds from launch to the first /health and first /api/process, and for a replacement worker"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'server:app', '--worker-class', 'gthread', '--workers', '1',
+         '--threads', '8', '--bind', f'127.0.0.1:{port}'],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(lambda: http_request(port, 'GET', '/health')[0] == 200)
+        health = time.perf_counter() - start
+        status = process_resume(port, seed=1)
+        assert status == 200, status
+        first_process = time.perf_counter() - start
+
+        # Recycle the worker; the master forks a new one
+        old_worker = worker_pids(process.pid)[0]
+        os.kill(old_worker, signal.SIGKILL)
+        wait_for(lambda: worker_pids(process.pid) and worker_pids(process.pid)[0] != old_worker)
+        recycle_start = time.perf_counter()
+        wait_for(lambda: http_request(port, 'GET', '/health')[0] == 200)
+        status = process_resume(port, seed=2)
+        assert status == 200, status
+        recycled = time.perf_counter() - recycle_start
+        return health, first_process, recycled
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time and cold-start latency')
+    parser.add_argument('--imports', type=int, default=5, help='Fresh interpreters to time the import in')
+    parser.add_argument('--app-dir', default=ROOT, help='Checkout whose server.py to run')
+    args = parser.parse_args()
+
+    with StubServer() as stub:
+        env = dict(os.environ, APP_PASSWORD_HASH=hashlib.sha256(PASSWORD.encode()).hexdigest(),
+                   OPENAI_BASE_URL=stub.base_url, LOCAL_PARSER='0')
+        env.pop('FLASK_ENV', None)  # Session cookie must work over plain HTTP
+
+        seconds, heavy = measure_imports(args.app_dir, env, args.imports)
+        print(f"import server: {seconds * 1000:.0f} ms (median of {args.imports}), "
+              f"heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+        print(f"\n{'gunicorn':24} {'/health s':>10} {'first process s':>16} {'after recycle s':>16}")
+        for label, preload in (('preloaded and warmed', '1'), ('GUNICORN_PRELOAD=0', '0')):
+            health, first_process, recycled = cold_start(args.app_dir, dict(env, GUNICORN_PRELOAD=preload))
+            print(f"{label:24} {health:10.2f} {first_process:16.2f} {recycled:16.2f}")
+
+
+if __name__ == '__main__':
+    main()
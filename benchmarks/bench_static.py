@@ -0,0 +1,109 @@
+"""
+Benchmark: frontend page loads served from disk versus from the in-memory,
+fingerprinted and precompressed assets.
+
+The previous setup is reproduced with Flask's own static route over the
+frontend directory (what actually answered /style.css and /app.js): files
+are read from disk per request, uncompressed, and revalidated with a
+weak mtime-based ETag. A browser is simulated for a first visit (empty
+cache) and for repeat visits. Previously every repeat visit revalidated the
+page and both assets. Now only the page is revalidated, because the
+fingerprinted assets are immutable. Reports requests reaching Python,
+bytes sent and worker time per visit.
+
+Usage: python benchmarks/bench_static.py [--visits 2000]
+"""
+import argparse
+import gzip
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPT = {'Accept-Encoding': 'gzip, deflate, br' if brotli else 'gzip, deflate'}
+DECODERS = {'gzip': gzip.decompress, 'br': brotli and brotli.decompress}
+
+
+class Browser:
+    """Minimal HTTP cache: fresh immutable entries are reused, others revalidated by ETag"""
+
+    def __init__(self, client):
+        self.client = client
+        self.cache = {}  # url -> (etag, immutable)
+        self.requests = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def get(self, url):
+        etag, immutable = self.cache.get(url, (None, False))
+        if immutable:
+            return None
+        headers = dict(ACCEPT, **({'If-None-Match': etag} if etag else {}))
+        start = time.perf_counter()
+        response = self.client.get(url, headers=headers)
+        body = response.get_data()
+        self.seconds += time.perf_counter() - start
+        self.requests += 1
+        self.bytes += len(body)
+        assert response.status_code in (200, 304), (url, response.status_code)
+        if response.status_code == 304:
+            return None
+        cache_control = response.headers.get('Cache-Control', '')
+        self.cache[url] = (response.headers.get('ETag'), 'immutable' in cache_control)
+        encoding = response.headers.get('Content-Encoding')
+        return DECODERS[encoding](body) if encoding else body
+
+    def visit(self, page):
+        """Load page and the stylesheet and script it references"""
+        html = self.get(page)
+        if html is not None:
+            self.assets = re.findall(r'(?:href|src)="([^"]+\.(?:css|js))"', html.decode())
+        for url in self.assets:
+            self.get(url if url.startswith('/') else f'/{url}')
+
+
+def run(name, client, page, visits):
+    first = Browser(client)
+    first.visit(page)
+    repeat = Browser(client)
+    repeat.cache, repeat.assets = dict(first.cache), first.assets
+    for _ in range(visits):
+        repeat.visit(page)
+    print(f"{name:22} {first.requests:7d} {first.bytes:9d} {first.seconds * 1e3:8.2f}"
+          f" {repeat.requests / visits:9.1f} {repeat.bytes / visits:9.0f} {repeat.seconds / visits * 1e6:10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark frontend asset serving')
+    parser.add_argument('--visits', type=int, default=2000, help='Repeat visits to simulate')
+    args = parser.parse_args()
+
+    os.environ.setdefault('APP_PASSWORD_HASH', 'unused')
+    os.environ['FLASK_ENV'] = 'production'  # No change detection on every lookup
+    import server
+
+    legacy = Flask('legacy', static_folder=server.FRONTEND_DIR, static_url_path='')
+    print(f"{'':22} {'---------- first visit ----------':>26} {'--------- per repeat visit --------':>31}")
+    print(f"{'':22} {'requests':>7} {'bytes':>9} {'ms':>8} {'requests':>9} {'bytes':>9} {'worker us':>10}")
+    run('disk (previous)', legacy.test_client(), '/login.html', args.visits)
+    run('in-memory assets', server.app.test_client(), '/login', args.visits)
+
+    client = server.app.test_client()
+    with client.session_transaction() as session:
+        session['authenticated'] = True
+    run('disk, app page', legacy.test_client(), '/index.html', args.visits)
+    run('in-memory, app page', client, '/', args.visits)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: buffered versus streamed LLM responses against the local stub
+with per-token latency.
+
+Reports, per mode, when the first section became available, when the
+response was complete and validated, and how quickly a malformed response
+was rejected (streaming stops at the first bad section instead of waiting
+for the last token).
+
+Usage: python benchmarks/bench_streaming.py [--runs 5] [--token-latency 0.01]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import SAMPLE_RESUME, StubServer  # noqa: E402
+
+MALFORMED_RESUME = dict(SAMPLE_RESUME, first_name=["not", "a", "string"])
+
+
+def run(server, stream, runs):
+    """Return (first section ms, complete ms) medians for one mode"""
+    server.OPENAI_STREAM = stream
+    first, total = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        seen = []
+
+        def on_section(event):
+            if not seen:
+                seen.append(time.perf_counter())
+
+        server.get_structured_data('sk-bench', 'resume text', on_section)
+        end = time.perf_counter()
+        first.append(((seen[0] if seen else end) - start) * 1000)
+        total.append((end - start) * 1000)
+    return statistics.median(first), statistics.median(total)
+
+
+def time_to_reject(server, stream, runs):
+    server.OPENAI_STREAM = stream
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            server.get_structured_data('sk-bench', 'resume text')
+        except ValueError:
+            pass
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streamed LLM responses')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.2, help='Stub seconds before the first token')
+    parser.add_argument('--token-latency', type=float, default=0.01, help='Stub seconds per output token')
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency, token_latency=args.token_latency) as stub:
+        os.environ['OPENAI_BASE_URL'] = stub.base_url
+        import server
+
+        print(f"{args.runs} runs, {args.latency}s first-token latency, {args.token_latency}s per token")
+        print(f"{'':10} {'first section ms':>17} {'complete ms':>12} {'reject bad ms':>14}")
+        for name, stream in (('buffered', False), ('streamed', True)):
+            stub.httpd.respond = lambda request: SAMPLE_RESUME
+            first, total = run(server, stream, args.runs)
+            stub.httpd.respond = lambda request: MALFORMED_RESUME
+            reject = time_to_reject(server, stream, args.runs)
+            print(f"{name:10} {first:17.0f} {total:12.0f} {reject:14.0f}")
+
+
+if __name__ == '__main__':
+    main()
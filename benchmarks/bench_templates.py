@@ -0,0 +1,109 @@
+"""
+Benchmark: one resume in several house styles.
+
+--templates copies of the bundled template are put in a temporary
+TEMPLATE_DIR. The local parser and result cache are off, so every pipeline
+run makes one completion call to a stub answering in --latency seconds.
+Compared:
+- "one request per style": a separate /api/process call for each template,
+  as when each style had its own deployment, so one LLM call per style;
+- "one request, all styles": a single /api/process call with every
+  template, returned as a ZIP, rendered in the request thread
+  (RENDER_WORKERS=1) and in the render pool;
+- /api/render of the structured JSON into 1 and into all templates, which
+  shows what each extra style costs.
+Times are medians over --iterations runs, after one warm-up run that
+compiles the templates and starts the pool.
+
+Usage: python benchmarks/bench_templates.py [--templates 4] [--latency 1.0] [--iterations 5]
+"""
+import argparse
+import io
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_fixture  # noqa: E402
+
+
+def timed(fn, iterations):
+    fn()  # Warm-up
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rendering one resume into several templates')
+    parser.add_argument('--templates', type=int, default=4, help='Templates to render into')
+    parser.add_argument('--latency', type=float, default=1.0, help='Seconds per completion')
+    parser.add_argument('--iterations', type=int, default=5, help='Timed runs per mode')
+    parser.add_argument('--render-workers', type=int, default=max(2, os.cpu_count() or 1),
+                        help='Render pool processes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as template_dir, StubServer(latency=args.latency) as stub:
+        template_ids = [f'style_{i}' for i in range(args.templates)]
+        for template_id in template_ids:
+            shutil.copy(os.path.join(ROOT, 'template', 'template.docx'),
+                        os.path.join(template_dir, f'{template_id}.docx'))
+        os.environ.update(OPENAI_BASE_URL=stub.base_url, LOCAL_PARSER='0', APP_PASSWORD_HASH='unused',
+                          SERVER_TIMING='0', TEMPLATE_DIR=template_dir, DEFAULT_TEMPLATE=template_ids[0],
+                          RENDER_WORKERS=str(args.render_workers))
+        sys.stdout = open(os.devnull, 'w')  # App logs
+        import server
+        server.result_cache.get = lambda namespace, key: None  # Every request calls the LLM
+
+        client = server.app.test_client()
+        with client.session_transaction() as session:
+            session['authenticated'] = True
+        pdf_bytes = make_resume_fixture(seed=0)[0]
+
+        def process(templates, result_format='docx'):
+            response = client.post(f'/api/process?format={result_format}&template={",".join(templates)}', data={
+                'api_key': 'sk-bench',
+                'pdf_file': (io.BytesIO(pdf_bytes), 'resume.pdf'),
+            })
+            assert response.status_code == 200, response.get_json()
+            return response
+
+        def render(templates):
+            response = client.post(f'/api/render?template={",".join(templates)}', json=json_data)
+            assert response.status_code == 200, response.get_json()
+
+        json_data = process(template_ids[:1], 'json').get_json()['data']
+        results = [
+            ('one request per style', timed(lambda: [process([t]) for t in template_ids], args.iterations)),
+        ]
+        server.RENDER_WORKERS = 1
+        results.append(('one request, all styles (in thread)', timed(lambda: process(template_ids), args.iterations)))
+        render_thread = timed(lambda: render(template_ids), args.iterations)
+        server.RENDER_WORKERS = args.render_workers
+        results.append((f'one request, all styles ({args.render_workers} processes)',
+                        timed(lambda: process(template_ids), args.iterations)))
+        render_one = timed(lambda: render(template_ids[:1]), args.iterations)
+        render_pool = timed(lambda: render(template_ids), args.iterations)
+
+    sys.stdout = sys.__stdout__
+    print(f"{args.templates} templates, {args.latency:g}s per completion, {os.cpu_count()} CPUs")
+    print(f"  {'/api/process':44} {'seconds':>8}")
+    for label, seconds in results:
+        print(f"  {label:44} {seconds:8.2f}")
+    print(f"  {'/api/render':44} {'ms':>8}")
+    print(f"  {'1 template':44} {render_one * 1e3:8.0f}")
+    print(f"  {f'{args.templates} templates (in thread)':44} {render_thread * 1e3:8.0f}")
+    print(f"  {f'{args.templates} templates ({args.render_workers} processes)':44} {render_pool * 1e3:8.0f}")
+
+
+if __name__ == '__main__':
+    main()
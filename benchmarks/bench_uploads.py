@@ -0,0 +1,243 @@
+"""
+Peak RSS of the gunicorn worker per concurrent upload, and how quickly an
+oversized upload is turned away.
+
+Starts gunicorn as in render.yaml (one gthread worker, 8 threads) with the
+OpenAI stub behind it, logs in, then sends bursts of concurrent
+/api/process uploads. Each upload is a synthetic resume the local parser
+accepts, padded with random bytes in an embedded file to --size MiB, and
+different every time, so extraction always runs. The worker's peak RSS
+(VmHWM, reset between bursts) over its idle RSS, divided by the number of
+concurrent uploads, is the memory cost of one upload. Peak anonymous RSS is
+reported too: it leaves out file-backed pages, such as a spooled upload
+that is memory-mapped, which the kernel can reclaim.
+
+Runs once with uploads kept in memory and once spooled to temp files
+(UPLOAD_SPOOL_THRESHOLD). Point --app-dir at another checkout, e.g. a git
+worktree of an older commit, to measure that version the same way.
+
+Usage: python benchmarks/bench_uploads.py [--size 8] [--concurrency 1 4 8] [--app-dir .]
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pymupdf as fitz  # noqa: E402
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_fixture  # noqa: E402
+
+PORT = 8097
+PASSWORD = 'bench-password'
+
+
+def padded_pdf(size):
+    """A locally parseable resume padded to about size bytes"""
+    pdf_bytes, _ = make_resume_fixture(seed=1)
+    with fitz.open(stream=pdf_bytes, filetype='pdf') as doc:
+        doc.embfile_add('padding.bin', os.urandom(max(0, size - len(pdf_bytes))))
+        return doc.tobytes()
+
+
+def multipart(fields, filename, content):
+    boundary = secrets.token_hex(16)
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="pdf_file"; filename="{filename}"\r\n'
+                 f'Content-Type: application/pdf\r\n\r\n'.encode())
+    parts.append(content)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def request(method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=300)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.getheaders(), response.read()
+    finally:
+        conn.close()
+
+
+def login():
+    status, headers, _ = request('POST', '/api/auth/login', json.dumps({'password': PASSWORD}),
+                                 {'Content-Type': 'application/json'})
+    assert status == 200, status
+    cookie = dict(headers)['Set-Cookie'].split(';')[0]
+    return cookie
+
+
+def upload(cookie, pdf_bytes):
+    body, content_type = multipart({'api_key': 'sk-bench'}, 'resume.pdf', pdf_bytes)
+    status, _, data = request('POST', '/api/process', body, {'Content-Type': content_type, 'Cookie': cookie})
+    return status, data
+
+
+def upload_oversized(cookie, size):
+    """Send a size-byte upload in chunks; returns (status or None, bytes sent before the server answered)"""
+    body, content_type = multipart({'api_key': 'sk-bench'}, 'resume.pdf', os.urandom(size))
+    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=300)
+    sent = 0
+    try:
+        conn.putrequest('POST', '/api/process')
+        for name, value in (('Content-Type', content_type), ('Content-Length', str(len(body))), ('Cookie', cookie)):
+            conn.putheader(name, value)
+        conn.endheaders()
+        try:
+            for start in range(0, len(body), 256 * 1024):
+                conn.send(body[start:start + 256 * 1024])
+                sent = start + 256 * 1024
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Server answered and closed without reading the rest
+        try:
+            return conn.getresponse().status, min(sent, len(body))
+        except (http.client.HTTPException, OSError):
+            return None, min(sent, len(body))
+    finally:
+        conn.close()
+
+
+def worker_pid(master):
+    with open(f'/proc/{master}/task/{master}/children') as f:
+        children = f.read().split()
+    return int(children[0]) if children else None
+
+
+def memory_kib(pid):
+    values = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('VmRSS', 'VmHWM', 'RssAnon'):
+                values[key] = int(rest.split()[0])
+    return values
+
+
+class AnonSampler(threading.Thread):
+    """Polls a process's anonymous (heap) RSS and keeps the maximum
+
+    VmHWM also counts file-backed pages, such as a memory-mapped spool file
+    that has been read, which the kernel can drop at any time.
+    """
+
+    def __init__(self, pid, interval=0.002):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, memory_kib(self.pid)['RssAnon'])
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+def reset_peak(pid):
+    with open(f'/proc/{pid}/clear_refs', 'w') as f:
+        f.write('5')  # Resets VmHWM to the current RSS
+
+
+def start_gunicorn(app_dir, env):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'server:app', '--worker-class', 'gthread', '--workers', '1',
+         '--threads', '8', '--timeout', '300', '--bind', f'127.0.0.1:{PORT}'],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if request('GET', '/health')[0] == 200 and worker_pid(process.pid):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def run_mode(name, app_dir, env, size, levels):
+    process = start_gunicorn(app_dir, env)
+    try:
+        pid = worker_pid(process.pid)
+        cookie = login()
+        status, _ = upload(cookie, padded_pdf(size))  # Warm up templates, parser and pools
+        assert status == 200, status
+        idle = memory_kib(pid)
+        print(f"\n{name}: idle worker RSS {idle['VmRSS'] / 1024:.0f} MiB, anonymous {idle['RssAnon'] / 1024:.0f} MiB")
+        print(f"  {'':10} {'---- RSS (VmHWM) MiB ----':>25} {'-- anonymous RSS MiB --':>25}")
+        print(f"  {'concurrent':>10} {'peak':>8} {'per upload':>16} {'peak':>8} {'per upload':>16} {'seconds':>8}")
+        rows = []
+        for level in levels:
+            pdfs = [padded_pdf(size) for _ in range(level)]
+            reset_peak(pid)
+            sampler = AnonSampler(pid)
+            sampler.start()
+            results = []
+            threads = [threading.Thread(target=lambda pdf=pdf: results.append(upload(cookie, pdf)[0]))
+                       for pdf in pdfs]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            peak_anon = sampler.stop()
+            assert results == [200] * level, results
+            peak = memory_kib(pid)['VmHWM']
+            per_upload = (peak - idle['VmRSS']) / 1024 / level
+            anon_per_upload = (peak_anon - idle['RssAnon']) / 1024 / level
+            rows.append({'concurrent': level, 'peak_mib': peak / 1024, 'per_upload_mib': per_upload,
+                         'peak_anon_mib': peak_anon / 1024, 'anon_per_upload_mib': anon_per_upload})
+            print(f"  {level:10d} {peak / 1024:8.0f} {per_upload:16.1f} {peak_anon / 1024:8.0f} "
+                  f"{anon_per_upload:16.1f} {elapsed:8.2f}")
+
+        start = time.perf_counter()
+        status, sent = upload_oversized(cookie, 50 * 1024 * 1024)
+        print(f"  50 MiB upload: HTTP {status or 'connection closed'} after "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms, {sent / 2**20:.1f} MiB sent")
+        return rows
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak worker RSS per concurrent upload')
+    parser.add_argument('--size', type=float, default=8, help='Upload size in MiB')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--app-dir', default=ROOT, help='Checkout whose server.py to run')
+    parser.add_argument('--spool-threshold', type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    stub = StubServer(latency=0.05).start()
+    env = dict(os.environ,
+               APP_PASSWORD_HASH=hashlib.sha256(PASSWORD.encode()).hexdigest(),
+               OPENAI_BASE_URL=stub.base_url,
+               LOCAL_PARSER='1')
+    env.pop('FLASK_ENV', None)  # Session cookie must work over plain HTTP
+    size = int(args.size * 1024 * 1024)
+    try:
+        run_mode('In memory', args.app_dir, dict(env, UPLOAD_SPOOL_THRESHOLD='0'), size, args.concurrency)
+        run_mode(f'Spooled past {args.spool_threshold} bytes', args.app_dir,
+                 dict(env, UPLOAD_SPOOL_THRESHOLD=str(args.spool_threshold)), size, args.concurrency)
+    finally:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    main()
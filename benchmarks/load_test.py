@@ -0,0 +1,429 @@
+"""
+End-to-end load test of /api/process, with results saved as JSON so runs
+on different commits can be compared.
+
+Every request uploads a different synthetic resume (a mix of --pages page
+counts and --columns layouts, so caches never hit) through the app, which
+calls the local OpenAI stub with the given latency and error rate. The app
+runs either in this process, behind Werkzeug's threaded server, or under
+gunicorn with gunicorn.conf.py; both are driven over HTTP at each --concurrency
+level.
+
+Reported per run: throughput, status counts, end-to-end latency
+percentiles (overall and by page count), per-stage latency percentiles from
+the Server-Timing header, and peak RSS of the serving process(es). A
+separate pass measures the peak memory each stage adds (extraction, LLM
+call, rendering) for single documents in freshly started processes.
+
+The local parser is off unless --local-parser is given, so every request
+exercises the LLM stage.
+
+Usage:
+    python benchmarks/load_test.py [--mode inprocess gunicorn] [--concurrency 1 4 8] [--requests 40]
+        [--pages 1 3 10] [--columns 1 2] [--latency 0.5] [--error-rate 0.0]
+        [--output results.json] [--compare baseline.json] [--app-log app.log]
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai_stub import StubServer  # noqa: E402
+from synthetic import make_resume_pdf  # noqa: E402
+
+PASSWORD = 'bench-password'
+STAGES = ('validate', 'extract', 'compact', 'local_parse', 'llm', 'render')
+
+
+def report(*args):
+    """Print to the terminal even while the in-process app's output is redirected"""
+    print(*args, file=sys.__stdout__, flush=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 1)
+    return {'p50': rank(0.5), 'p95': rank(0.95), 'p99': rank(0.99), 'max': round(ordered[-1], 1)}
+
+
+def make_corpus(count, pages, columns, bullets, seed):
+    """count (pages, PDF bytes) pairs, each a different resume"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        page_count, column_count = rng.choice(pages), rng.choice(columns)
+        pdf_bytes = make_resume_pdf(pages=page_count, columns=column_count, bullets_per_job=bullets,
+                                    seed=seed * 100003 + i)
+        corpus.append((page_count, pdf_bytes))
+    return corpus
+
+
+def multipart(fields, filename, content):
+    boundary = secrets.token_hex(16)
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="pdf_file"; filename="{filename}"\r\n'
+                 f'Content-Type: application/pdf\r\n\r\n'.encode())
+    parts.append(content)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def http_request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, response.getheaders(), response.read()
+    finally:
+        conn.close()
+
+
+def parse_server_timing(value):
+    """{stage: ms} from a Server-Timing header"""
+    timings = {}
+    for metric in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, _, params = metric.partition(';')
+        for param in params.split(';'):
+            key, _, number = param.strip().partition('=')
+            if key == 'dur':
+                timings[name] = float(number)
+    return timings
+
+
+def rss_kib(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+class RSSSampler(threading.Thread):
+    """Polls the summed RSS of some processes and keeps the maximum"""
+
+    def __init__(self, pids, interval=0.01):
+        super().__init__(daemon=True)
+        self.pids = pids
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, sum(rss_kib(pid) for pid in self.pids))
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+class InProcessTarget:
+    """The Flask app imported here and served by Werkzeug's threaded server"""
+
+    name = 'inprocess'
+
+    def __init__(self, env, log_path):
+        from werkzeug.serving import make_server
+        os.environ.update(env)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.log = open(log_path, 'a')
+        sys.stdout = self.log  # The app prints progress for every request
+        import server
+        self.httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+        self.port = self.httpd.server_port
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        self.pids = [os.getpid()]
+
+    def stop(self):
+        self.httpd.shutdown()
+        sys.stdout = sys.__stdout__
+        self.log.close()
+
+
+class GunicornTarget:
+    """server:app under gunicorn, configured by gunicorn.conf.py plus --workers and --threads"""
+
+    name = 'gunicorn'
+
+    def __init__(self, env, workers, threads, log_path):
+        self.port = free_port()
+        log = open(log_path, 'a')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'server:app', '--worker-class', 'gthread',
+             '--workers', str(workers), '--threads', str(threads), '--timeout', '600',
+             '--bind', f'127.0.0.1:{self.port}'],
+            cwd=ROOT, env=dict(os.environ, **env), stdout=log, stderr=subprocess.STDOUT)
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                if http_request(self.port, 'GET', '/health')[0] == 200 and len(self.worker_pids()) == workers:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.2)
+        else:
+            self.stop()
+            raise RuntimeError('gunicorn did not start')
+        self.pids = self.worker_pids()
+        log.close()  # The child has its own copy
+
+    def worker_pids(self):
+        with open(f'/proc/{self.process.pid}/task/{self.process.pid}/children') as f:
+            return [int(pid) for pid in f.read().split()]
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def login(port):
+    status, headers, _ = http_request(port, 'POST', '/api/auth/login', json.dumps({'password': PASSWORD}),
+                                      {'Content-Type': 'application/json'})
+    assert status == 200, status
+    return dict(headers)['Set-Cookie'].split(';')[0]
+
+
+def process(port, cookie, pdf_bytes):
+    """(status, latency ms, {stage: ms}) of one /api/process upload"""
+    body, content_type = multipart({'api_key': 'sk-bench'}, 'resume.pdf', pdf_bytes)
+    start = time.perf_counter()
+    status, headers, _ = http_request(port, 'POST', '/api/process', body,
+                                      {'Content-Type': content_type, 'Cookie': cookie})
+    elapsed = (time.perf_counter() - start) * 1000
+    return status, elapsed, parse_server_timing(dict(headers).get('Server-Timing'))
+
+
+def run_level(target, cookie, corpus, concurrency):
+    idle = sum(rss_kib(pid) for pid in target.pids)
+    sampler = RSSSampler(target.pids)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda item: (item[0], *process(target.port, cookie, item[1])), corpus))
+    seconds = time.perf_counter() - start
+    peak = sampler.stop()
+
+    ok = [r for r in results if r[1] == 200]
+    statuses = {}
+    for _, status, _, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    stages = {stage: percentiles([r[3][stage] for r in ok if stage in r[3]]) for stage in STAGES}
+    by_pages = {str(pages): percentiles([r[2] for r in ok if r[0] == pages])
+                for pages in sorted({r[0] for r in results})}
+    return {
+        'mode': target.name,
+        'concurrency': concurrency,
+        'requests': len(results),
+        'ok': len(ok),
+        'statuses': statuses,
+        'seconds': round(seconds, 2),
+        'throughput_rps': round(len(ok) / seconds, 3),
+        'latency_ms': percentiles([r[2] for r in ok]),
+        'latency_by_pages_ms': by_pages,
+        'stages_ms': {stage: values for stage, values in stages.items() if values},
+        'idle_rss_mib': round(idle / 1024, 1),
+        'peak_rss_mib': round(peak / 1024, 1),
+    }
+
+
+def print_run(run):
+    latency = run['latency_ms'] or {}
+    report(f"\n{run['mode']}, concurrency {run['concurrency']}: {run['ok']}/{run['requests']} ok "
+          f"{run['statuses']}, {run['throughput_rps']:.2f} req/s, "
+          f"RSS {run['idle_rss_mib']:.0f} -> {run['peak_rss_mib']:.0f} MiB")
+    report(f"  {'':14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = [('end to end', latency)] + [(f'{pages} page(s)', values) for pages, values
+                                        in run['latency_by_pages_ms'].items() if values]
+    rows += [(f'  {stage}', values) for stage, values in run['stages_ms'].items()]
+    for label, values in rows:
+        report(f"  {label:14} {values.get('p50', 0):9.1f} {values.get('p95', 0):9.1f} {values.get('p99', 0):9.1f}")
+
+
+def peak_kib():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    return 0
+
+
+def measure_stages(pdf_bytes, env, results):
+    """Child process: peak RSS each stage adds for one document in a fresh worker"""
+    os.environ.update(env)
+    sys.stdout = open(os.devnull, 'w')
+    import server
+
+    added = {}
+    before = rss_kib(os.getpid())
+    with server.open_pdf(pdf_bytes) as doc:
+        pages = server.extract_pages(doc, pdf_bytes)
+    text = server.prepare_llm_input(pages)
+    added['extract'] = peak_kib() - before
+
+    before = max(peak_kib(), rss_kib(os.getpid()))
+    data = server.get_structured_data('sk-bench', text)
+    added['llm'] = max(0, peak_kib() - before)
+
+    before = max(peak_kib(), rss_kib(os.getpid()))
+    server.create_word_doc_bytes(data, server.TEMPLATE_PATH)
+    added['render'] = max(0, peak_kib() - before)
+    results.put(added)
+
+
+def stage_memory(corpus, env):
+    """Peak RSS (MiB) each stage adds, per document, each in a freshly started process
+
+    A stage is charged only for growth past the peak of the stages before
+    it, so these are the first-request costs of a new worker.
+    """
+    context = multiprocessing.get_context('spawn')
+    added = {'extract': [], 'llm': [], 'render': []}
+    for _, pdf_bytes in corpus:
+        results = context.Queue()
+        child = context.Process(target=measure_stages, args=(pdf_bytes, env, results))
+        child.start()
+        for stage, kib in results.get(timeout=300).items():
+            added[stage].append(kib / 1024)
+        child.join()
+    return {stage: {'median': round(statistics.median(values), 2), 'max': round(max(values), 2)}
+            for stage, values in added.items()}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(run['mode'], run['concurrency']): run for run in baseline['runs']}
+    report(f"\nCompared with {baseline_path} ({baseline['commit']})")
+    report(f"  {'run':16} {'p50':>16} {'p95':>16} {'req/s':>14}")
+
+    def change(old, new, digits=0):
+        return f"{old:.{digits}f}->{new:.{digits}f} {(new - old) / old * 100 if old else 0:+.0f}%"
+    for run in results['runs']:
+        old = previous.get((run['mode'], run['concurrency']))
+        if not old or not old['latency_ms'] or not run['latency_ms']:
+            continue
+        report(f"  {run['mode'] + ' x' + str(run['concurrency']):16} "
+              f"{change(old['latency_ms']['p50'], run['latency_ms']['p50']):>16} "
+              f"{change(old['latency_ms']['p95'], run['latency_ms']['p95']):>16} "
+              f"{change(old['throughput_rps'], run['throughput_rps'], 2):>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end load test of /api/process')
+    parser.add_argument('--mode', nargs='+', choices=('inprocess', 'gunicorn'), default=['inprocess', 'gunicorn'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--requests', type=int, default=40, help='Uploads per concurrency level')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 3, 10], help='Page counts to mix')
+    parser.add_argument('--columns', type=int, nargs='+', default=[1, 2], help='Column layouts to mix')
+    parser.add_argument('--bullets', type=int, default=5, help='Bullets per job')
+    parser.add_argument('--latency', type=float, default=0.5, help='Stub seconds per completion')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='Stub seconds per output token')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of completions answered with 429')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--local-parser', action='store_true', help='Let the local parser skip the LLM')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--app-log', default=os.devnull, help='File for the app\'s own output')
+    parser.add_argument('--output', help='Results file (default benchmarks/results/load-<commit>-<time>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare with')
+    args = parser.parse_args()
+
+    stub = StubServer(latency=args.latency, token_latency=args.token_latency, error_rate=args.error_rate).start()
+    env = {
+        'APP_PASSWORD_HASH': hashlib.sha256(PASSWORD.encode()).hexdigest(),
+        'OPENAI_BASE_URL': stub.base_url,
+        'LOCAL_PARSER': '1' if args.local_parser else '0',
+        'FLASK_ENV': 'development',  # Session cookie must work over plain HTTP
+        'CACHE_DB_PATH': '',  # Memory cache only, so earlier runs cannot answer
+    }
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'config': vars(args),
+        'runs': [],
+    }
+
+    try:
+        seed = args.seed
+        for mode in args.mode:
+            if mode == 'inprocess':
+                target = InProcessTarget(env, args.app_log)
+            else:
+                target = GunicornTarget(env, args.workers, args.threads, args.app_log)
+            try:
+                cookie = login(target.port)
+                process(target.port, cookie, make_resume_pdf(seed=0))  # Warm up templates and pools
+                for concurrency in args.concurrency:
+                    seed += 1
+                    corpus = make_corpus(args.requests, args.pages, args.columns, args.bullets, seed)
+                    run = run_level(target, cookie, corpus, concurrency)
+                    results['runs'].append(run)
+                    print_run(run)
+            finally:
+                target.stop()
+
+        seed += 1
+        sample = make_corpus(2 * len(args.pages), args.pages, args.columns, args.bullets, seed)
+        results['stage_memory_mib'] = stage_memory(sample, env)
+        report("\nPeak RSS added per stage in a fresh process (median / max MiB): " + ', '.join(
+            f"{stage} {values['median']:.1f} / {values['max']:.1f}"
+            for stage, values in results['stage_memory_mib'].items()))
+    finally:
+        stub.stop()
+
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f"load-{results['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    report(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Returns a fixed, schema-valid resume JSON with configurable latency, error
+rate and concurrency (requests beyond max_in_flight get 429, like a
+provider's rate limit), over HTTP/1.1 keep-alive, either whole or streamed as
+chat.completion.chunk events ("stream": true). It counts TCP connections,
+so benchmarks can show connection reuse.
+
+Usage:
+    python benchmarks/openai_stub.py --port 8089 --latency 0.5 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 gunicorn server:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_RESUME = {
+    "first_name": "Adam",
+    "last_name": "Weiss",
+    "education": [
+        {
+            "university_name": "University of California, Berkeley",
+            "university_location": "Berkeley, CA",
+            "degree_name": "Bachelor of Science in Business Administration",
+            "graduation_year": "2017",
+            "extra_bullets": ["Magna Cum Laude", "Dean's List"],
+            "relevant_courses": None
+        }
+    ],
+    "jobs": [
+        {
+            "company_name": "Ladder Capital",
+            "job_location": "New York, NY",
+            "job_start": "Jul 2021",
+            "job_end": "Present",
+            "job_title": "Director",
+            "job_description": [
+                "Sourced $500mm in debt investments",
+                "Managed team of 5 junior associates, including hiring and performance reviews"
+            ],
+            "transactions": [{"deal_description": "NYC Office Workout: $50mm senior loan."}]
+        }
+    ],
+    "additional_bullets": ["Proficient in Python & SQL", "Interests: Real Estate Tech"]
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        with self.server.stats_lock:
+            self.server.requests += 1
+
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+
+        with self.server.stats_lock:
+            over_capacity = self.server.max_in_flight and self.server.in_flight >= self.server.max_in_flight
+            if over_capacity:
+                self.server.rejected += 1
+            else:
+                self.server.in_flight += 1
+        if over_capacity or random.random() < self.server.error_rate:
+            if not over_capacity:
+                with self.server.stats_lock:
+                    self.server.in_flight -= 1
+            self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}},
+                            headers={'Retry-After': '0'})
+            return
+        try:
+            self._complete(request)
+        finally:
+            with self.server.stats_lock:
+                self.server.in_flight -= 1
+
+    def _complete(self, request):
+        content = json.dumps(self.server.respond(request))
+        if request.get('stream'):
+            try:
+                self._stream(request, content)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # Client aborted the stream early
+            return
+
+        time.sleep(self.server.latency + self.server.token_latency * (len(content) / 4))
+        self._send_json(200, {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        })
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+
+    def _stream(self, request, content):
+        """Send content as SSE chunks of ~4 characters (one "token") each"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        time.sleep(self.server.latency)
+        base = {'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                'model': request.get('model', 'stub')}
+        for start in range(0, len(content), 4):
+            if self.server.token_latency:
+                time.sleep(self.server.token_latency)
+            chunk = dict(base, choices=[{'index': 0, 'delta': {'content': content[start:start + 4]},
+                                         'finish_reason': None}])
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+        final = dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        self._write_chunk(f"data: {json.dumps(final)}\n\n".encode('utf-8'))
+        if (request.get('stream_options') or {}).get('include_usage'):
+            usage = dict(base, choices=[], usage={'prompt_tokens': 0, 'completion_tokens': len(content) // 4,
+                                                  'total_tokens': len(content) // 4})
+            self._write_chunk(f"data: {json.dumps(usage)}\n\n".encode('utf-8'))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+class StubServer:
+    """Run the stub on a background thread; use as a context manager"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, token_latency=0.0, error_rate=0.0,
+                 respond=None, max_in_flight=0):
+        self.httpd = ThreadingHTTPServer((host, port), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.token_latency = token_latency
+        self.httpd.error_rate = error_rate
+        self.httpd.respond = respond or (lambda request: SAMPLE_RESUME)
+        self.httpd.max_in_flight = max_in_flight  # 0 = unlimited
+        self.httpd.in_flight = 0
+        self.httpd.rejected = 0  # 429s for exceeding max_in_flight
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def connections(self):
+        return self.httpd.connections
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OpenAI chat completions stub')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='Fixed seconds per response')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='Extra seconds per output token')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--max-in-flight', type=int, default=0, help='Concurrent requests before 429 (0 = unlimited)')
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, args.latency, args.token_latency, args.error_rate,
+                        max_in_flight=args.max_in_flight)
+    print(f"OpenAI stub listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Synthetic resume PDFs for benchmarks.
+
+Resumes are generated with PyMuPDF from a seeded RNG, so the same arguments
+always produce the same document. make_resume_fixture also returns the JSON
+a correct parse should produce, for accuracy checks.
+"""
+import random
+
+import pymupdf as fitz  # PyMuPDF
+
+FIRST_NAMES = ['Adam', 'Maria', 'Wei', 'Priya', 'Jonas', 'Chloe', 'Omar', 'Elena']
+LAST_NAMES = ['Weiss', 'Garcia', 'Chen', 'Patel', 'Berg', 'Martin', 'Haddad', 'Rossi']
+COMPANIES = ['Ladder Capital', 'Blackstone', 'Goldman Sachs', 'Brookfield', 'Starwood', 'KKR', 'Apollo']
+TITLES = ['Analyst', 'Associate', 'Vice President', 'Director', 'Managing Director']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+VERBS = ['Sourced', 'Underwrote', 'Managed', 'Structured', 'Led', 'Closed', 'Negotiated', 'Analyzed']
+OBJECTS = ['senior loans', 'mezzanine investments', 'a team of 5 analysts', 'portfolio reviews',
+           'refinancing of office assets', 'hotel acquisitions', 'cross-functional initiatives']
+BULLETS = ['•', '-', '*', '·']
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 54
+LINE_HEIGHT = 13
+
+
+def _bullet_text(rng):
+    text = f"{rng.choice(VERBS)} ${rng.randint(10, 900)}mm in {rng.choice(OBJECTS)}"
+    if rng.random() < 0.5:
+        text += f", including {rng.choice(OBJECTS)} and {rng.choice(OBJECTS)}"
+    return text
+
+
+def resume_lines(rng, jobs, bullets_per_job, data=None):
+    """Lines of a resume as (text, indent, right_text) tuples; wrapped bullets become two lines
+
+    If data is a dict it is filled with the structured JSON for the lines.
+    """
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    graduation_year = str(rng.randint(2005, 2020))
+    lines = [
+        (f"{first_name} {last_name}", 0),
+        ("New York, NY | candidate@example.com | (212) 555-0100", 0),
+        ("", 0),
+        ("EDUCATION", 0),
+        ("University of California, Berkeley", 0, "Berkeley, CA"),
+        ("Bachelor of Science in Business Administration", 0, graduation_year),
+        (f"{rng.choice(BULLETS)} Magna Cum Laude, Dean's List", 0),
+        ("", 0),
+        ("EXPERIENCE", 0),
+    ]
+    job_data = []
+    for _ in range(jobs):
+        start_year = rng.randint(2008, 2022)
+        company = rng.choice(COMPANIES)
+        title, month = rng.choice(TITLES), rng.choice(MONTHS)
+        lines += [
+            (company, 0, "New York, NY"),
+            (title, 0, f"{month} {start_year} – Present"),
+        ]
+        job = {'company_name': company, 'job_location': 'New York, NY', 'job_start': f"{month} {start_year}",
+               'job_end': 'Present', 'job_title': title, 'job_description': [], 'transactions': []}
+        for _ in range(bullets_per_job):
+            marker = rng.choice(BULLETS)
+            bullet = _bullet_text(rng)
+            lines.append((f"{marker} {bullet}", 0))
+            if rng.random() < 0.3:
+                # Wrapped continuation line, lowercase and indented
+                continuation = f"and {rng.choice(OBJECTS)} across {rng.randint(2, 9)} markets"
+                lines.append((continuation, 12))
+                bullet += ' ' + continuation
+            job['job_description'].append(bullet)
+        if rng.random() < 0.5:
+            lines.append(("Select Transaction Experience:", 0))
+            for _ in range(rng.randint(1, 3)):
+                marker = rng.choice(BULLETS)
+                deal = f"NYC Office Workout: ${rng.randint(20, 400)}mm senior loan."
+                lines.append((f"{marker} {deal}", 0))
+                job['transactions'].append({'deal_description': deal})
+        lines.append(("", 0))
+        job_data.append(job)
+    lines += [
+        ("ADDITIONAL", 0),
+        (f"{rng.choice(BULLETS)} Skills: Python, SQL, Argus, Excel", 0),
+        (f"{rng.choice(BULLETS)} Interests: Real Estate Tech, marathon running", 0),
+    ]
+
+    if data is not None:
+        data.update({
+            'first_name': first_name,
+            'last_name': last_name,
+            'education': [{
+                'university_name': 'University of California, Berkeley',
+                'university_location': 'Berkeley, CA',
+                'degree_name': 'Bachelor of Science in Business Administration',
+                'graduation_year': graduation_year,
+                'extra_bullets': ["Magna Cum Laude, Dean's List"],
+                'relevant_courses': None,
+            }],
+            'jobs': job_data,
+            'additional_bullets': ['Skills: Python, SQL, Argus, Excel',
+                                   'Interests: Real Estate Tech, marathon running'],
+        })
+    return lines
+
+
+def _draw_lines(page, lines, x, right, y, styled=False):
+    """Draw resume lines from y downwards; returns how many fit on the page"""
+    drawn = 0
+    for number, (text, indent, *right_text) in enumerate(lines):
+        if y > PAGE_HEIGHT - MARGIN - LINE_HEIGHT:
+            break
+        if text:
+            # Styled resumes use a large bold name and bold section headings
+            heading = styled and (number == 0 or (text.isupper() and not right_text))
+            fontname = 'hebo' if heading else 'helv'
+            fontsize = 16 if styled and number == 0 else 9
+            page.insert_text((x + indent, y), text, fontsize=fontsize, fontname=fontname)
+        for part in right_text:
+            page.insert_text((right - fitz.get_text_length(part, fontsize=9), y), part, fontsize=9)
+        y += LINE_HEIGHT * (2 if styled and number == 0 else 1)
+        drawn += 1
+    return drawn
+
+
+def make_resume_pdf(pages=1, jobs_per_page=4, bullets_per_job=5, columns=1, seed=0, running_header=False):
+    """Return the bytes of a synthetic resume PDF
+
+    Dates and locations are right-aligned within each column, as in most
+    real resumes; running_header adds the same header line to every page.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    column_width = (PAGE_WIDTH - 2 * MARGIN) / columns
+    header = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} - Resume - Confidential"
+
+    for page_number in range(pages):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        if running_header:
+            page.insert_text((MARGIN, 30), header, fontsize=8)
+        for column in range(columns):
+            x = MARGIN + column * column_width
+            right = x + column_width - 12
+            _draw_lines(page, resume_lines(rng, jobs_per_page, bullets_per_job), x, right, MARGIN)
+        page.insert_text((PAGE_WIDTH / 2, PAGE_HEIGHT - 30), f"Page {page_number + 1} of {pages}", fontsize=8)
+
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def make_resume_fixture(seed=0, jobs=3, bullets_per_job=4, styled=False):
+    """Return (pdf_bytes, expected JSON) for a one-page, one-column resume
+
+    Raises ValueError if the content does not fit on the page, so the
+    expected JSON always matches what was drawn.
+    """
+    rng = random.Random(seed)
+    data = {}
+    lines = resume_lines(rng, jobs, bullets_per_job, data)
+    doc = fitz.open()
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    drawn = _draw_lines(page, lines, MARGIN, PAGE_WIDTH - MARGIN - 12, MARGIN, styled)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    if drawn < len(lines):
+        raise ValueError(f'Resume has {len(lines)} lines but only {drawn} fit on one page')
+    return pdf_bytes, data
@@ -0,0 +1,246 @@
+"""
+Content-addressed result cache for the resume pipeline.
+
+Two layers sit behind one interface:
+- an in-process LRU bounded by entry count and total bytes
+- an optional SQLite store that every gunicorn worker on the box can share
+
+Values are stored as JSON strings so cached objects can never be mutated by
+callers, and the memory layer counts their UTF-8 size in bytes. Disk hits
+record their access time in batches, so reads do not take SQLite's write
+lock each time.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def sha256_hex(data):
+    """Return the hex SHA-256 of bytes or str"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(*parts):
+    """Build a cache key from several parts (order matters)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+class MemoryLRU:
+    """Thread-safe LRU bounded by entry count and total value size in UTF-8 bytes"""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()  # Key -> (value, size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value):
+        # len() of a str counts characters; a non-ASCII CV takes more bytes than that
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, size)
+            self._bytes += size
+            while self._items and (len(self._items) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+
+class SQLiteStore:
+    """Shared on-disk store; one connection per thread, WAL for concurrent workers"""
+
+    PRUNE_EVERY = 64  # Puts between pruning passes
+    TOUCH_EVERY = 30  # Seconds between batched writes of hits' access times
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+        self._touched = {}  # (namespace, key) -> last hit not yet written
+        self._touched_lock = threading.Lock()
+        self._last_touch_write = time.time()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with self._touched_lock:
+            self._touched[(namespace, key)] = now
+            due = now - self._last_touch_write >= self.TOUCH_EVERY
+        if due:
+            self._write_touches(conn)
+            conn.commit()
+        return row[0]
+
+    def _write_touches(self, conn):
+        """Write pending hit times in one statement batch; the caller commits"""
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+            self._last_touch_write = time.time()
+        if touched:
+            conn.executemany(
+                "UPDATE cache SET accessed_at = MAX(accessed_at, ?) WHERE namespace = ? AND key = ?",
+                [(accessed_at, namespace, key) for (namespace, key), accessed_at in touched.items()]
+            )
+
+    def put(self, namespace, key, value):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, accessed_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, value, time.time())
+        )
+        self._puts += 1
+        if self._puts % self.PRUNE_EVERY == 0:
+            # Pending hits first, so recently read rows are not pruned as stale
+            self._write_touches(conn)
+            # Least recently accessed rows go first
+            conn.execute(
+                "DELETE FROM cache WHERE rowid IN ("
+                " SELECT rowid FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        conn.commit()
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM cache")
+        conn.commit()
+
+
+class ResultCache:
+    """Layered (memory -> disk) cache with per-namespace hit/miss counters"""
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else MemoryLRU()
+        self.disk = disk
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, namespace, field):
+        with self._stats_lock:
+            stats = self._stats.setdefault(namespace, {'memory_hits': 0, 'disk_hits': 0, 'misses': 0})
+            stats[field] += 1
+
+    def get(self, namespace, key):
+        """Return the cached JSON-decoded value, or None on miss"""
+        full_key = f"{namespace}:{key}"
+        value = self.memory.get(full_key)
+        if value is not None:
+            self._count(namespace, 'memory_hits')
+            return json.loads(value)
+
+        if self.disk is not None:
+            try:
+                value = self.disk.get(namespace, key)
+            except sqlite3.Error as e:
+                print(f"CACHE: disk read failed: {str(e)}")
+                value = None
+            if value is not None:
+                self.memory.put(full_key, value)
+                self._count(namespace, 'disk_hits')
+                return json.loads(value)
+
+        self._count(namespace, 'misses')
+        return None
+
+    def put(self, namespace, key, obj):
+        """Store a JSON-serializable value in every layer"""
+        value = json.dumps(obj, ensure_ascii=False)
+        self.memory.put(f"{namespace}:{key}", value)
+        if self.disk is not None:
+            try:
+                self.disk.put(namespace, key, value)
+            except sqlite3.Error as e:
+                print(f"CACHE: disk write failed: {str(e)}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        """Snapshot of hit/miss counters and memory usage"""
+        with self._stats_lock:
+            namespaces = {name: dict(counts) for name, counts in self._stats.items()}
+        return {
+            'namespaces': namespaces,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory.size_bytes,
+            'disk_enabled': self.disk is not None,
+        }
+
+
+def create_cache_from_env():
+    """Build the process-wide cache from CACHE_* environment variables"""
+    memory = MemoryLRU(
+        max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '256')),
+        max_bytes=int(os.getenv('CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+    )
+    disk = None
+    db_path = os.getenv('CACHE_DB_PATH')
+    if db_path:
+        disk = SQLiteStore(db_path, max_entries=int(os.getenv('CACHE_DB_MAX_ENTRIES', '10000')))
+    return ResultCache(memory=memory, disk=disk)
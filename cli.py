@@ -0,0 +1,319 @@
+"""
+Offline batch formatter: PDFs in, Word documents out, no web server.
+
+Formats a directory, glob or list of PDFs with the same pipeline as
+/api/process, with no HTTP, login, multipart encoding or worker limits in
+between. Each file moves through three stages, and no more than a bounded
+window of files is in flight at once, however many there are:
+- Extraction runs in the PDF sandbox, a process pool with per-document
+  limits.
+- Structuring uses OpenAI, or the local parser when it is enabled
+  (LOCAL_PARSER=1) and confident. At most --llm-concurrency OpenAI calls
+  run at once, under the server's admission control and retries.
+- Rendering runs in a separate process pool, into the default template
+  or the one chosen with --template (an id from the server's catalog).
+
+Progress is appended to OUTPUT/manifest.jsonl as each file finishes, keyed
+by the SHA-256 of its content. An interrupted or partly failed run can be
+started again with the same arguments: files already formatted (same
+content and template, output still on disk) are skipped; failed ones, and
+partial ones (made from the pages read before the sandbox's time or memory
+limit), are retried. When it finishes, OUTPUT/summary.json and OUTPUT/summary.csv list every input
+with its status, output and per-stage timings. Pipeline logs go to
+OUTPUT/formatter.log.
+
+Usage:
+    python cli.py resumes/ -o formatted/ [--api-key sk-...] [--workers 4] [--llm-concurrency 8] [--template ID]
+    python cli.py 'inbox/**/*.pdf' more.pdf -o formatted/
+"""
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from admission import AdmissionRejected
+from batch import retry_with_backoff
+from cache import sha256_hex
+from local_parser import extract_and_parse
+
+MANIFEST_NAME = 'manifest.jsonl'
+SUMMARY_NAME = 'summary'
+LOG_NAME = 'formatter.log'
+SUMMARY_FIELDS = ('source', 'hash', 'status', 'output', 'template', 'structured_by', 'extract_seconds',
+                  'structure_seconds', 'render_seconds', 'seconds', 'error')
+
+# The app is imported by main(), after arguments are parsed and logs redirected
+server = None
+
+
+def find_pdfs(inputs):
+    """Sorted, de-duplicated PDF paths from files, directories (searched recursively) and globs"""
+    paths = set()
+    for spec in inputs:
+        if os.path.isdir(spec):
+            matches = glob.glob(os.path.join(glob.escape(spec), '**', '*'), recursive=True)
+        elif os.path.exists(spec):
+            matches = [spec]
+        else:
+            matches = glob.glob(spec, recursive=True)
+        paths.update(os.path.abspath(path) for path in matches
+                     if path.lower().endswith('.pdf') and os.path.isfile(path))
+    return sorted(paths)
+
+
+def read_manifest(path):
+    """Last manifest entry per content hash; a truncated final line is ignored"""
+    entries = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[entry['hash']] = entry
+    return entries
+
+
+# ---- Pipeline stages ----
+
+def extract_file(path):
+    """Stage 1 (thread, work in the sandbox): (pages, local parse or None, limit or None)"""
+    with open(path, 'rb') as f:
+        pdf_bytes = f.read()
+    if server.extract_sandbox is not None:
+        return server.sandbox_extract_and_parse(pdf_bytes)
+    return extract_and_parse(pdf_bytes, parse=server.LOCAL_PARSER)
+
+
+def structure(api_key, extracted):
+    """Stage 2 (thread): (JSON data, 'local' or 'llm')"""
+    pages, local_parse, _ = extracted
+    text = server.prepare_llm_input(pages)
+    json_data = server.accept_local_parse(local_parse)
+    if json_data is not None:
+        return json_data, 'local'
+    # Admission control bounds the calls; a full queue only means waiting longer.
+    # UpstreamBusy is not retried: call_llm has already retried the upstream
+    return retry_with_backoff(
+        lambda: server.get_structured_data_cached(api_key, text),
+        retry_on=(AdmissionRejected,)
+    ), 'llm'
+
+
+def _init_render_worker(template_path):
+    global server
+    sys.stdout = open(os.devnull, 'w')
+    import server as app_module
+    server = app_module
+    server.template_registry.get(template_path)  # Compile once per process
+
+
+def render_document(json_data, output_path, template_path):
+    """Stage 3 (render process): write the document; returns seconds spent"""
+    start = time.perf_counter()
+    doc_buffer = server.create_word_doc_bytes(json_data, template_path)
+    partial = output_path + '.part'
+    with open(partial, 'wb') as f:
+        f.write(doc_buffer.getvalue())
+    os.replace(partial, output_path)  # A crash never leaves a half-written document behind
+    return time.perf_counter() - start
+
+
+class BatchFormatter:
+    """Runs every pending file through extract -> structure -> render with bounded concurrency"""
+
+    def __init__(self, api_key, output_dir, template_path, workers, llm_concurrency, report):
+        self.api_key = api_key
+        self.output_dir = output_dir
+        self.template_path = template_path
+        self.report = report  # fn(result) called as each file finishes
+        # Enough files in flight to keep every stage busy, without holding thousands in memory
+        self.window = 2 * workers + llm_concurrency
+        self.extract_threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cli-extract')
+        self.llm_threads = ThreadPoolExecutor(max_workers=llm_concurrency, thread_name_prefix='cli-llm')
+        self.render_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('forkserver'),
+            initializer=_init_render_worker,
+            initargs=(template_path,)
+        )
+
+    def close(self):
+        self.extract_threads.shutdown(cancel_futures=True)
+        self.llm_threads.shutdown(cancel_futures=True)
+        self.render_pool.shutdown(cancel_futures=True)
+
+    def run(self, items):
+        """Process item dicts ('source', 'hash', 'output'); yields a result per item as it finishes"""
+        items = iter(items)
+        pending = {}
+
+        def submit_next():
+            item = next(items, None)
+            if item is not None:
+                item['started'] = time.perf_counter()
+                pending[self.extract_threads.submit(self._timed, item, 'extract', extract_file, item['source'])] = \
+                    ('extract', item)
+
+        for _ in range(self.window):
+            submit_next()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, item = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    yield self._finish(item, 'error', f'{stage}: {e}')
+                    submit_next()
+                    continue
+                if stage == 'extract':
+                    item['partial'] = server.partial_extraction_error(value[2])
+                    pending[self.llm_threads.submit(self._timed, item, 'structure', structure, self.api_key, value)] = \
+                        ('structure', item)
+                elif stage == 'structure':
+                    json_data, item['structured_by'] = value
+                    pending[self.render_pool.submit(render_document, json_data,
+                                                    os.path.join(self.output_dir, item['output']),
+                                                    self.template_path)] = ('render', item)
+                else:
+                    item['render_seconds'] = round(value, 3)
+                    yield self._finish(item, 'partial' if item['partial'] else 'ok', item['partial'])
+                    submit_next()
+
+    @staticmethod
+    def _timed(item, stage, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            item[f'{stage}_seconds'] = round(time.perf_counter() - start, 3)
+
+    def _finish(self, item, status, error=None):
+        result = {field: item.get(field) for field in SUMMARY_FIELDS}
+        result.update(status=status, error=error, seconds=round(time.perf_counter() - item['started'], 3))
+        if status == 'error':
+            result['output'] = None
+        self.report(result)
+        return result
+
+
+def write_summary(output_dir, results, started, seconds):
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    processed = sum(count for status, count in counts.items() if status != 'skipped')
+    summary = {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'seconds': round(seconds, 3),
+        'files': len(results),
+        'counts': counts,
+        'files_per_minute': round(processed / seconds * 60, 1) if seconds else None,
+        'results': results,
+    }
+    base = os.path.join(output_dir, SUMMARY_NAME)
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    with open(base + '.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    return summary
+
+
+def main(argv=None):
+    global server
+    parser = argparse.ArgumentParser(description='Format PDF resumes into Word documents without the web server')
+    parser.add_argument('inputs', nargs='+', help='PDF files, directories (searched recursively) or glob patterns')
+    parser.add_argument('-o', '--output', required=True, help='Directory for documents, manifest and summary')
+    parser.add_argument('--api-key', default=os.getenv('OPENAI_API_KEY', ''),
+                        help='OpenAI API key (default: $OPENAI_API_KEY)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='Extraction and render processes (default: CPU count)')
+    parser.add_argument('--llm-concurrency', type=int, default=8, help='OpenAI calls in flight (default: 8)')
+    parser.add_argument('--template', help='Template id from TEMPLATE_DIR (default: DEFAULT_TEMPLATE)')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    output_dir = os.path.abspath(args.output)
+    out = sys.stdout
+    sys.stdout = open(os.path.join(output_dir, LOG_NAME), 'a', buffering=1, encoding='utf-8')
+
+    os.environ['EXTRACT_SANDBOX_WORKERS'] = str(args.workers)
+    import server as app_module
+    server = app_module
+    template_id = args.template or server.DEFAULT_TEMPLATE
+    try:
+        template_path = server.get_template_path(template_id)
+    except ValueError as e:
+        print(e, file=out)
+        return 2
+    from admission import AdmissionController
+    # Every caller is one of our own threads: let them all wait for a slot rather than be turned away
+    server.llm_admission = AdmissionController(
+        max_limit=args.llm_concurrency, min_limit=server.LLM_MIN_CONCURRENCY, key_limit=args.llm_concurrency,
+        max_queue=args.llm_concurrency, queue_timeout=3600, latency_target=server.LLM_LATENCY_TARGET)
+
+    started = time.time()
+    start = time.perf_counter()
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    done = read_manifest(manifest_path)
+    used_names = {entry['output'] for entry in done.values() if entry.get('output')}
+    results, todo, seen = [], [], {}
+    for source in find_pdfs(args.inputs):
+        with open(source, 'rb') as f:
+            content_hash = sha256_hex(f.read())
+        entry = done.get(content_hash)
+        if (entry and entry['status'] == 'ok' and entry.get('template', server.DEFAULT_TEMPLATE) == template_id
+                and os.path.exists(os.path.join(output_dir, entry['output']))):
+            results.append(dict({field: entry.get(field) for field in SUMMARY_FIELDS},
+                                source=source, status='skipped', error=None))
+        elif content_hash in seen:
+            results.append(dict({field: None for field in SUMMARY_FIELDS}, source=source, hash=content_hash,
+                                status='skipped', error=f'Same content as {seen[content_hash]}'))
+        else:
+            seen[content_hash] = source
+            output = server.unique_output_name(os.path.basename(source), used_names)
+            todo.append({'source': source, 'hash': content_hash, 'output': output, 'template': template_id})
+
+    total = len(todo)
+    print(f"{len(results) + total} PDFs: {len(results)} already done or duplicates, {total} to format", file=out)
+    if total and not args.api_key.strip():
+        print("No OpenAI API key (--api-key or OPENAI_API_KEY): only resumes the local parser accepts "
+              "(LOCAL_PARSER=1) can be formatted", file=out)
+
+    finished = 0
+    with open(manifest_path, 'a', buffering=1, encoding='utf-8') as manifest:
+        def report(result):
+            nonlocal finished
+            finished += 1
+            manifest.write(json.dumps(result) + '\n')
+            target = ' '.join(filter(None, (result['output'] and f"-> {result['output']}", result['error'])))
+            print(f"[{finished}/{total}] {result['status']:7} {os.path.basename(result['source'])} {target} "
+                  f"({result['seconds']:.2f}s)", file=out)
+
+        formatter = BatchFormatter(args.api_key.strip(), output_dir, template_path, args.workers,
+                                   args.llm_concurrency, report)
+        try:
+            results.extend(formatter.run(todo))
+        except KeyboardInterrupt:
+            print(f"Interrupted after {finished} of {total}; run the same command again to continue", file=out)
+            return 130
+        finally:
+            formatter.close()
+
+    summary = write_summary(output_dir, results, started, time.perf_counter() - start)
+    counts = ', '.join(f'{count} {status}' for status, count in sorted(summary['counts'].items()))
+    print(f"Finished in {summary['seconds']:.1f}s ({counts or 'nothing to do'}); "
+          f"summary in {os.path.join(output_dir, SUMMARY_NAME)}.json and .csv", file=out)
+    return 1 if summary['counts'].get('error') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
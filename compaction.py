@@ -0,0 +1,168 @@
+"""
+Prompt compaction between text extraction and the LLM call.
+
+Works on the per-page text produced by the extractor:
+- collapses layout padding (long runs of spaces) and repeated blank lines
+- drops page numbers and headers/footers repeated across pages
+- enforces a token budget by truncating at a line boundary
+
+Token counts use tiktoken (see requirements.txt), imported on first use.
+Its encoding file is downloaded into TIKTOKEN_CACHE_DIR the first time it is
+needed; scripts/fetch_tiktoken_encoding.py fetches it ahead of time and is
+part of the build command in render.yaml, so running instances never need
+the download. While the encoding cannot be loaded, counts fall back to a
+characters-per-token estimate and loading is retried every
+ENCODING_RETRY_SECONDS: the budget is then only a heuristic, deliberately
+sized to overcount.
+"""
+import os
+import re
+import threading
+import time
+
+from lazy_import import lazy_import
+
+tiktoken = lazy_import('tiktoken')
+
+ENCODING = 'o200k_base'  # gpt-4o family
+# Beside the app rather than in the system temp dir, so the copy fetched at
+# build time is still there when the service starts
+TIKTOKEN_CACHE_DIR = os.getenv('TIKTOKEN_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.tiktoken_cache')
+ENCODING_RETRY_SECONDS = 60
+
+# English prose averages about 4 characters per token, but resumes are dense with
+# names, dates, e-mail addresses and bullets that tokenize worse. 3 overcounts,
+# so an estimated budget truncates early rather than letting a prompt run over
+CHARS_PER_TOKEN = 3
+
+# Runs of 3+ spaces/tabs become two spaces: still a visible column gap, fewer tokens
+_SPACE_RUN = re.compile(r'[ \t]{3,}')
+_BLANK_RUN = re.compile(r'\n{3,}')
+_PAGE_NUMBER = re.compile(r'^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$', re.IGNORECASE)
+_DIGITS = re.compile(r'\d+')
+
+# How many lines at the top and bottom of a page count as header/footer
+EDGE_LINES = 2
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_retry_at = 0.0  # time.monotonic() before which a failed load is not retried
+
+
+def fetch_encoding():
+    """The tiktoken encoding, downloaded into TIKTOKEN_CACHE_DIR if needed; raises on failure"""
+    # tiktoken only reads the cache location from the environment
+    os.environ.setdefault('TIKTOKEN_CACHE_DIR', TIKTOKEN_CACHE_DIR)
+    return tiktoken.get_encoding(ENCODING)
+
+
+def _get_encoding():
+    """The encoding, or None (estimate) while it cannot be loaded"""
+    global _encoding, _retry_at
+    if _encoding is not None or time.monotonic() < _retry_at:
+        return _encoding
+    if not _encoding_lock.acquire(blocking=False):
+        return None  # Another thread is loading it; estimate meanwhile
+    try:
+        if _encoding is None:
+            _encoding = fetch_encoding()
+    except Exception as e:
+        print(f"tiktoken unavailable, estimating tokens for {ENCODING_RETRY_SECONDS}s: {str(e)}")
+        _retry_at = time.monotonic() + ENCODING_RETRY_SECONDS
+    finally:
+        _encoding_lock.release()
+    return _encoding
+
+
+def count_tokens(text):
+    """Token count of text (exact with tiktoken, estimated otherwise)"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _edge_key(line):
+    """Comparison key for header/footer lines; ignores numbers like page counters"""
+    return _DIGITS.sub('#', line.strip().lower())
+
+
+def _edge_lines(lines):
+    """Indexes of the first and last EDGE_LINES non-blank lines of a page"""
+    non_blank = [i for i, line in enumerate(lines) if line.strip()]
+    return set(non_blank[:EDGE_LINES] + non_blank[-EDGE_LINES:])
+
+
+def remove_repeated_edges(pages):
+    """Drop page numbers and header/footer lines that repeat on most pages"""
+    page_lines = [page.split('\n') for page in pages]
+
+    repeated = set()
+    if len(page_lines) >= 2:
+        counts = {}
+        for lines in page_lines:
+            for key in {_edge_key(lines[i]) for i in _edge_lines(lines)}:
+                counts[key] = counts.get(key, 0) + 1
+        threshold = max(2, (len(page_lines) + 1) // 2)
+        repeated = {key for key, count in counts.items() if count >= threshold}
+
+    cleaned = []
+    seen = set()  # Repeated lines are kept the first time (e.g. the name on page 1)
+    for lines in page_lines:
+        edges = _edge_lines(lines)
+        kept = []
+        for i, line in enumerate(lines):
+            if i in edges:
+                if _PAGE_NUMBER.match(line.strip()):
+                    continue
+                key = _edge_key(line)
+                if key in repeated:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+            kept.append(line)
+        cleaned.append('\n'.join(kept))
+    return cleaned
+
+
+def collapse_whitespace(text):
+    """Trim lines, shrink layout padding and collapse runs of blank lines"""
+    lines = [_SPACE_RUN.sub('  ', line.strip()) for line in text.split('\n')]
+    return _BLANK_RUN.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def truncate_to_budget(text, max_tokens):
+    """Keep whole lines from the top until max_tokens is reached"""
+    if count_tokens(text) <= max_tokens:
+        return text, False
+    kept = []
+    used = 0
+    for line in text.split('\n'):
+        cost = count_tokens(line + '\n')
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return '\n'.join(kept).rstrip(), True
+
+
+def compact_pages(pages, max_tokens=0):
+    """Compact extracted pages into the text sent to the LLM
+
+    Returns (text, stats) where stats has token counts before and after and
+    whether the budget forced truncation. max_tokens=0 disables the budget.
+    """
+    original = '\n\n'.join(pages)
+    text = collapse_whitespace('\n\n'.join(remove_repeated_edges(pages)))
+    truncated = False
+    if max_tokens:
+        text, truncated = truncate_to_budget(text, max_tokens)
+    stats = {
+        'tokens_before': count_tokens(original),
+        'tokens_after': count_tokens(text),
+        'truncated': truncated,
+        'exact': _get_encoding() is not None,
+    }
+    return text, stats
+
@@ -0,0 +1,219 @@
+"""
+Compiled, reusable DOCX templates.
+
+DocxTemplate re-reads the .docx, re-runs its tag-cleaning regexes and
+re-compiles every Jinja template on each render. CompiledTemplate does that
+work once per worker: it keeps the parsed document, the cleaned XML and the
+compiled Jinja templates, and each render starts from a deep copy of the
+pristine document. TemplateRegistry hands out compiled templates and
+recompiles one when its file's mtime changes.
+
+TemplateCatalog lists the templates in a directory, with their metadata,
+for clients to choose from. init_render_worker and render_in_worker run in
+a process pool, so several templates can be rendered side by side, each
+compiled once per pool process.
+"""
+import copy
+import io
+import json
+import os
+import threading
+from functools import lru_cache
+
+from jinja2 import Environment
+
+from lazy_import import lazy_import
+
+# python-docx and docxtpl (with lxml) are imported by the first compile
+docx = lazy_import('docx')
+docxtpl = lazy_import('docxtpl')
+
+
+class CachingEnvironment(Environment):
+    """Jinja environment that compiles each distinct source string only once"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiled = {}
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None:
+            return super().from_string(source, globals, template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            self._compiled[source] = template
+        return template
+
+
+@lru_cache(maxsize=None)
+def _precompiled_template_class():
+    """DocxTemplate subclass for CompiledTemplate.render, defined when docxtpl is first needed"""
+
+    class _PrecompiledDocxTemplate(docxtpl.DocxTemplate):
+        """DocxTemplate that starts from a CompiledTemplate instead of the file"""
+
+        def __init__(self, compiled):
+            super().__init__(io.BytesIO(compiled.template_bytes))
+            self._compiled = compiled
+
+        def init_docx(self, reload=True):
+            if not self.docx or (self.is_rendered and reload):
+                self.docx = self._compiled.new_document()
+                self.is_rendered = False
+
+        def patch_xml(self, src_xml):
+            return self._compiled.patch_xml(src_xml, super().patch_xml)
+
+    return _PrecompiledDocxTemplate
+
+
+class CompiledTemplate:
+    """A .docx template parsed and compiled once, rendered many times"""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            self.template_bytes = f.read()
+        self._document = docx.Document(io.BytesIO(self.template_bytes))
+        self._document_lock = threading.Lock()
+        self._patched = {}
+        self.jinja_env = CachingEnvironment()
+
+    def new_document(self):
+        """Fresh, independently mutable copy of the parsed template"""
+        with self._document_lock:
+            return copy.deepcopy(self._document)
+
+    def patch_xml(self, src_xml, patch):
+        """Memoized DocxTemplate.patch_xml (the regex clean-up of Jinja tags)"""
+        patched = self._patched.get(src_xml)
+        if patched is None:
+            patched = patch(src_xml)
+            self._patched[src_xml] = patched
+        return patched
+
+    def render(self, context):
+        """Render context and return the document as a BytesIO at position 0"""
+        doc = _precompiled_template_class()(self)
+        doc.render(context, jinja_env=self.jinja_env)
+        output_buffer = io.BytesIO()
+        doc.save(output_buffer)
+        output_buffer.seek(0)
+        return output_buffer
+
+
+class TemplateRegistry:
+    """Per-process cache of CompiledTemplate objects keyed by path"""
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the compiled template for path, recompiling if the file changed"""
+        path = os.path.abspath(path)
+        mtime = os.path.getmtime(path)  # Raises FileNotFoundError if it is gone
+        compiled = self._templates.get(path)
+        if compiled is not None and compiled.mtime == mtime:
+            return compiled
+        with self._lock:
+            compiled = self._templates.get(path)
+            if compiled is None or compiled.mtime != mtime:
+                print(f"Compiling template {path}...")
+                compiled = CompiledTemplate(path)
+                self._templates[path] = compiled
+            return compiled
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+class TemplateCatalog:
+    """The .docx templates in a directory, keyed by id
+    
+    NAME.docx is the template with id NAME. An optional NAME.json next to it
+    describes it for clients: {"name": ..., "description": ...} plus any
+    other fields. Without one the name is made from the id. The directory is
+    scanned again when its mtime changes, so templates can be added or
+    removed without a restart.
+    """
+
+    def __init__(self, directory, default):
+        self.directory = directory
+        self.default = default
+        self._templates = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        """{id: (path, metadata)}, rescanned if the directory changed"""
+        try:
+            mtime = os.path.getmtime(self.directory)
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return self._templates
+        with self._lock:
+            if mtime != self._mtime:
+                templates = {}
+                names = sorted(os.listdir(self.directory)) if mtime is not None else []
+                for filename in names:
+                    template_id, extension = os.path.splitext(filename)
+                    # Skip Word's ~$ lock files and hidden files
+                    if extension.lower() != '.docx' or filename.startswith(('.', '~$')):
+                        continue
+                    metadata = {'name': template_id.replace('_', ' ').replace('-', ' ').title(), 'description': ''}
+                    metadata.update(self._read_metadata(template_id))
+                    metadata.update(id=template_id, default=template_id == self.default)
+                    templates[template_id] = (os.path.join(self.directory, filename), metadata)
+                print(f"Template catalog: {', '.join(templates) or 'no templates'} in {self.directory}")
+                self._templates, self._mtime = templates, mtime
+            return self._templates
+
+    def _read_metadata(self, template_id):
+        path = os.path.join(self.directory, f'{template_id}.json')
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                metadata = json.load(f)
+            if not isinstance(metadata, dict):
+                raise ValueError('expected a JSON object')
+            return metadata
+        except ValueError as e:
+            print(f"Template catalog: ignoring {path}: {str(e)}")
+            return {}
+
+    def list(self):
+        """Metadata of every template, the default first"""
+        entries = [metadata for _, metadata in self._scan().values()]
+        return sorted(entries, key=lambda metadata: not metadata['default'])
+
+    def paths(self):
+        return [path for path, _ in self._scan().values()]
+
+    def path(self, template_id):
+        """Path of the template with this id; raises ValueError for an unknown id"""
+        templates = self._scan()
+        if template_id not in templates:
+            raise ValueError(f"Unknown template '{template_id}'. Available: {', '.join(templates)}")
+        return templates[template_id][0]
+
+
+# ---- Render pool processes ----
+
+_worker_registry = TemplateRegistry()
+
+
+def init_render_worker(paths):
+    """Pool initializer: compile every template before the first render"""
+    for path in paths:
+        _worker_registry.get(path)
+
+
+def render_in_worker(path, context):
+    """Pool job: render context into the template at path and return the document bytes"""
+    return _worker_registry.get(path).render(context).getvalue()
@@ -6,6 +6,7 @@ const fileUploadArea = document.getElementById('fileUploadArea');
 const fileName = document.getElementById('fileName');
 const submitBtn = document.getElementById('submitBtn');
 const btnLoader = document.getElementById('btnLoader');
+const btnLoaderText = document.getElementById('btnLoaderText');
 const btnText = submitBtn.querySelector('.btn-text');
 const errorMessage = document.getElementById('errorMessage');
 const successMessage = document.getElementById('successMessage');
@@ -14,6 +15,9 @@ const autoDownloadCheckbox = document.getElementById('autoDownload');
 const rememberApiKeyCheckbox = document.getElementById('rememberApiKey');
 const clearApiKeyBtn = document.getElementById('clearApiKey');
 const logoutBtn = document.getElementById('logoutBtn');
+const dataEditor = document.getElementById('dataEditor');
+const resumeJsonInput = document.getElementById('resumeJson');
+const renderBtn = document.getElementById('renderBtn');
 
 // API Key Storage
 const API_KEY_STORAGE_KEY = 'cv_formatter_api_key';
@@ -160,6 +164,7 @@ form.addEventListener('submit', async (e) => {
     
     // Hide previous messages
     hideMessages();
+    dataEditor.style.display = 'none';
     
     // Validate inputs
     const apiKey = apiKeyInput.value.trim();
@@ -202,36 +207,8 @@ form.addEventListener('submit', async (e) => {
         formData.append('api_key', apiKey);
         formData.append('pdf_file', pdfFile);
         
-        // Make API request
-        const response = await fetch('/api/process', {
-            method: 'POST',
-            credentials: 'include',
-            body: formData
-        });
-        
-        // Handle authentication errors - redirect to login
-        if (response.status === 401) {
-            window.location.href = '/login';
-            return;
-        }
-        
-        if (!response.ok) {
-            const errorData = await response.json().catch(() => ({ error: 'Unknown error occurred' }));
-            throw new Error(errorData.error || `Server error: ${response.status}`);
-        }
-        
-        // Get the blob
-        const blob = await response.blob();
-        
-        // Get filename from response headers or use default
-        const contentDisposition = response.headers.get('content-disposition');
-        let filename = 'formatted_resume.docx';
-        if (contentDisposition) {
-            const filenameMatch = contentDisposition.match(/filename="?(.+)"?/);
-            if (filenameMatch) {
-                filename = filenameMatch[1];
-            }
-        }
+        // Submit as a background job and wait for it to finish
+        const { blob, filename, resultUrl } = await processAsJob(formData);
         
         // Create download link
         const url = window.URL.createObjectURL(blob);
@@ -262,6 +239,9 @@ form.addEventListener('submit', async (e) => {
             }, 100);
         }
         
+        // Offer the extracted details for correction
+        await loadEditableData(resultUrl);
+        
     } catch (error) {
         console.error('Error:', error);
         showError(error.message || 'An error occurred while processing your resume');
@@ -270,14 +250,201 @@ form.addEventListener('submit', async (e) => {
     }
 });
 
+// ============================================
+// Background Jobs
+// ============================================
+
+const STAGE_LABELS = {
+    queued: 'Queued...',
+    validating: 'Validating PDF...',
+    extracting: 'Extracting text...',
+    structuring: 'Structuring with AI...',
+    rendering: 'Generating document...',
+    done: 'Downloading...'
+};
+
+async function readError(response) {
+    const errorData = await response.json().catch(() => ({ error: 'Unknown error occurred' }));
+    return new Error(errorData.error || `Server error: ${response.status}`);
+}
+
+function waitForJob(eventsUrl, statusUrl) {
+    // Resolve when the job finishes; progress arrives over Server-Sent Events,
+    // with status polling as a fallback if the stream drops
+    return new Promise((resolve, reject) => {
+        let settled = false;
+        const finish = (fn, value) => {
+            if (!settled) {
+                settled = true;
+                source.close();
+                fn(value);
+            }
+        };
+        
+        const poll = async () => {
+            while (!settled) {
+                const response = await fetch(statusUrl, { credentials: 'include' });
+                if (!response.ok) {
+                    finish(reject, await readError(response));
+                    return;
+                }
+                const job = await response.json();
+                setLoadingText(STAGE_LABELS[job.stage] || 'Processing...');
+                if (job.status === 'done') {
+                    finish(resolve);
+                } else if (job.status === 'failed') {
+                    finish(reject, new Error(job.error || 'Processing failed'));
+                } else {
+                    await new Promise(r => setTimeout(r, 1000));
+                }
+            }
+        };
+        
+        const source = new EventSource(eventsUrl, { withCredentials: true });
+        Object.keys(STAGE_LABELS).forEach(stage => {
+            source.addEventListener(stage, () => setLoadingText(STAGE_LABELS[stage]));
+        });
+        // Sections are reported one by one while the AI response streams in
+        let sectionsParsed = 0;
+        source.addEventListener('structuring', (e) => {
+            const event = JSON.parse(e.data);
+            if (event.section) {
+                sectionsParsed += 1;
+                setLoadingText(`Structuring with AI... (${sectionsParsed} sections read)`);
+            }
+        });
+        source.addEventListener('done', () => finish(resolve));
+        source.addEventListener('failed', (e) => {
+            const event = JSON.parse(e.data);
+            finish(reject, new Error(event.message || 'Processing failed'));
+        });
+        // Connection lost, or refused (503) because the server has enough
+        // streams open: fall back to polling the status URL
+        source.onerror = () => {
+            source.close();
+            poll().catch(err => finish(reject, err));
+        };
+    });
+}
+
+async function processAsJob(formData) {
+    const response = await fetch('/api/jobs', {
+        method: 'POST',
+        credentials: 'include',
+        body: formData
+    });
+    
+    // Handle authentication errors - redirect to login
+    if (response.status === 401) {
+        window.location.href = '/login';
+        throw new Error('Authentication required');
+    }
+    
+    if (!response.ok) {
+        throw await readError(response);
+    }
+    
+    const job = await response.json();
+    await waitForJob(job.events_url, job.status_url);
+    
+    const result = await fetch(job.result_url, { credentials: 'include' });
+    if (!result.ok) {
+        throw await readError(result);
+    }
+    
+    return { blob: await result.blob(), filename: getDownloadName(result), resultUrl: job.result_url };
+}
+
+function getDownloadName(response) {
+    // Get filename from response headers or use default
+    const contentDisposition = response.headers.get('content-disposition');
+    let filename = 'formatted_resume.docx';
+    if (contentDisposition) {
+        const filenameMatch = contentDisposition.match(/filename="?(.+)"?/);
+        if (filenameMatch) {
+            filename = filenameMatch[1];
+        }
+    }
+    return filename;
+}
+
+// ============================================
+// Editing Extracted Details
+// ============================================
+
+async function loadEditableData(resultUrl) {
+    try {
+        const response = await fetch(`${resultUrl}?format=json`, { credentials: 'include' });
+        if (!response.ok) {
+            return;
+        }
+        const result = await response.json();
+        resumeJsonInput.value = JSON.stringify(result.data, null, 2);
+        dataEditor.style.display = 'block';
+    } catch (error) {
+        console.warn('Could not load extracted details:', error);
+    }
+}
+
+renderBtn.addEventListener('click', async () => {
+    let data;
+    try {
+        data = JSON.parse(resumeJsonInput.value);
+    } catch (error) {
+        showError(`Invalid JSON: ${error.message}`);
+        return;
+    }
+    
+    renderBtn.disabled = true;
+    renderBtn.textContent = 'Regenerating...';
+    try {
+        // Only the document is rendered again; no upload or AI call
+        const response = await fetch('/api/render', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            credentials: 'include',
+            body: JSON.stringify(data)
+        });
+        if (response.status === 401) {
+            window.location.href = '/login';
+            return;
+        }
+        if (!response.ok) {
+            throw await readError(response);
+        }
+        
+        const url = window.URL.createObjectURL(await response.blob());
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = getDownloadName(response);
+        document.body.appendChild(a);
+        a.click();
+        setTimeout(() => {
+            window.URL.revokeObjectURL(url);
+            document.body.removeChild(a);
+        }, 100);
+        showSuccess('Document regenerated from your edits!');
+    } catch (error) {
+        showError(error.message || 'Could not regenerate the document');
+    } finally {
+        renderBtn.disabled = false;
+        renderBtn.textContent = 'Regenerate Document';
+    }
+});
+
 // ============================================
 // UI Helper Functions
 // ============================================
 
+function setLoadingText(text) {
+    btnLoaderText.textContent = text;
+}
+
 function setLoadingState(loading) {
     if (loading) {
         submitBtn.disabled = true;
         btnText.style.display = 'none';
+        setLoadingText('Processing...');
         btnLoader.style.display = 'flex';
         fileUploadArea.style.pointerEvents = 'none';
         apiKeyInput.disabled = true;
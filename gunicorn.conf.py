@@ -0,0 +1,58 @@
+"""
+Gunicorn settings, read automatically from the working directory.
+
+The app is preloaded in the master and warmed up there (server.warm_up:
+PyMuPDF, openai and the compiled Word template), then the master's objects
+are moved out of the garbage collector's reach with gc.freeze(). Workers
+forked from it, including ones recycled later, start ready to serve and
+share those pages copy-on-write instead of each importing and compiling
+everything on its first request.
+
+Each worker starts its first PDF extraction child (see sandbox.py) in the
+background right after it is forked, not in the master, since the children
+belong to the worker.
+
+GUNICORN_PRELOAD=0 loads the app in each worker instead; the heavy imports
+then happen on the first request that needs them.
+
+Background jobs are kept in a SQLite file shared by the workers (JOB_DB_PATH,
+by default in the temp directory), so status, event and result requests can
+reach any of them.
+"""
+import gc
+import os
+import sys
+import tempfile
+import threading
+
+from metrics import clear_snapshots
+
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') != '0'
+
+# Set before the app is loaded, which reads it at import
+os.environ.setdefault('JOB_DB_PATH', os.path.join(tempfile.gettempdir(), 'cvformatter-jobs.sqlite3'))
+
+
+def on_starting(arbiter):
+    # Every worker's metrics start from zero when the service (re)starts
+    clear_snapshots(os.getenv('METRICS_DIR'))
+
+
+def when_ready(arbiter):
+    if not preload_app:
+        return
+    app_module = sys.modules.get('server')
+    if app_module is not None:
+        app_module.warm_up()
+        gc.freeze()  # Keep the collector from touching, and so copying, shared pages in workers
+
+
+def post_fork(arbiter, worker):
+    app_module = sys.modules.get('server')
+    if app_module is not None and app_module.extract_sandbox is not None:
+        # In the background, so the worker starts serving right away
+        threading.Thread(target=app_module.extract_sandbox.start, daemon=True).start()
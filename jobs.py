@@ -0,0 +1,486 @@
+"""
+Job queue for resume processing.
+
+Jobs run on a bounded thread pool in the worker that accepted them, so the
+request that submits them returns immediately. Their state, ordered list of
+progress events and result live in a job store that the status, result and
+Server-Sent Events endpoints read from. Two stores share one interface: an
+in-process one, and a SQLite one that every gunicorn worker on the host
+shares so any worker can answer for any job.
+
+A job's result is (files, meta): a dict of name -> bytes and a JSON-
+serializable value. Finished jobs are kept for ttl seconds, and at most
+max_finished of them holding max_result_bytes of files in total; beyond
+that the least recently read go first.
+"""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import HTTPException
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised when this worker already holds max_pending unfinished jobs"""
+
+
+class Job:
+    """Snapshot of one submitted pipeline run, as read from the store"""
+
+    def __init__(self, job_id=None, owner=None, status=QUEUED, stage=QUEUED, events=None, error=None,
+                 error_status=None, created_at=None, finished_at=None):
+        self.id = job_id or secrets.token_urlsafe(12)
+        self.owner = owner
+        self.status = status
+        self.stage = stage
+        self.events = events if events is not None else []
+        self.error = error
+        self.error_status = error_status
+        self.created_at = created_at if created_at is not None else time.time()
+        self.finished_at = finished_at
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def copy(self):
+        return Job(self.id, self.owner, self.status, self.stage, list(self.events), self.error,
+                   self.error_status, self.created_at, self.finished_at)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'events': list(self.events),
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+def make_event(stage, message, **extra):
+    event = {'stage': stage, 'message': message, 'at': time.time()}
+    event.update(extra)
+    return event
+
+
+def _files_size(files):
+    return sum(len(data) for data in files.values())
+
+
+class MemoryJobStore:
+    """Jobs of this process only; finished ones in an LRU capped by count and result size"""
+
+    def __init__(self, max_finished=256, max_result_bytes=256 * 1024 * 1024):
+        self.max_finished = max_finished
+        self.max_result_bytes = max_result_bytes
+        self._jobs = {}
+        self._results = {}  # Job id -> (files, meta)
+        self._finished = OrderedDict()  # Job id -> result size, least recently read first
+        self._result_bytes = 0
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job.id] = job.copy()
+
+    def set_status(self, job_id, status):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.status = status
+
+    def add_event(self, job_id, event):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.stage = event['stage']
+                job.events.append(event)
+
+    def finish(self, job_id, status, event, result=None, error=None, error_status=None):
+        """Record the outcome and final event together, then evict over the caps"""
+        size = _files_size(result[0]) if result is not None else 0
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.status, job.error, job.error_status = status, error, error_status
+            job.finished_at = time.time()
+            job.stage = event['stage']
+            job.events.append(event)
+            if result is not None:
+                self._results[job_id] = result
+            self._finished[job_id] = size
+            self._result_bytes += size
+            self._evict(keep=job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.copy() if job is not None else None
+
+    def events(self, job_id, since):
+        """(events after index since, whether the job is finished or gone)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return [], True
+            return job.events[since:], job.finished
+
+    def result(self, job_id):
+        with self._lock:
+            result = self._results.get(job_id)
+            if result is not None:
+                self._finished.move_to_end(job_id)
+            return result
+
+    def sweep(self, now, ttl):
+        """Forget finished jobs older than ttl"""
+        cutoff = now - ttl
+        with self._lock:
+            expired = [job_id for job_id in self._finished if self._jobs[job_id].finished_at < cutoff]
+            for job_id in expired:
+                self._forget(job_id)
+
+    def counts(self):
+        with self._lock:
+            return {DONE: sum(1 for job_id in self._finished if self._jobs[job_id].status == DONE),
+                    FAILED: sum(1 for job_id in self._finished if self._jobs[job_id].status == FAILED)}
+
+    def _evict(self, keep):
+        """Drop least recently read finished jobs over the caps; caller holds the lock"""
+        for job_id in list(self._finished):
+            if len(self._finished) <= self.max_finished and self._result_bytes <= self.max_result_bytes:
+                break
+            if job_id != keep:
+                self._forget(job_id)
+
+    def _forget(self, job_id):
+        self._result_bytes -= self._finished.pop(job_id)
+        self._results.pop(job_id, None)
+        del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    """Jobs shared by all workers on the host; one connection per thread"""
+
+    def __init__(self, path, max_finished=256, max_result_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_finished = max_finished
+        self.max_result_bytes = max_result_bytes
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " owner TEXT,"
+            " status TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " error TEXT,"
+            " error_status INTEGER,"
+            " pid INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " finished_at REAL,"
+            " accessed_at REAL,"
+            " meta TEXT,"
+            " result_bytes INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_accessed ON jobs (accessed_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            " job_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " event TEXT NOT NULL,"
+            " PRIMARY KEY (job_id, seq))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_files ("
+            " job_id TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " data BLOB NOT NULL,"
+            " PRIMARY KEY (job_id, name))"
+        )
+        # Not kept: a preloading gunicorn master creates the store before forking
+        conn.close()
+        self._local.conn = None
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit, so multi-statement writes can take the write lock up front
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, fn):
+        """Run fn(conn) in one write transaction"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    @staticmethod
+    def _append(conn, job_id, event):
+        conn.execute(
+            "INSERT INTO job_events (job_id, seq, event)"
+            " SELECT ?, COALESCE(MAX(seq) + 1, 0), ? FROM job_events WHERE job_id = ?",
+            (job_id, json.dumps(event), job_id)
+        )
+        conn.execute("UPDATE jobs SET stage = ? WHERE id = ?", (event['stage'], job_id))
+
+    def create(self, job):
+        def insert(conn):
+            conn.execute(
+                "INSERT INTO jobs (id, owner, status, stage, pid, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.owner, job.status, job.stage, os.getpid(), job.created_at)
+            )
+            for event in job.events:
+                self._append(conn, job.id, event)
+        self._write(insert)
+
+    def set_status(self, job_id, status):
+        self._conn().execute("UPDATE jobs SET status = ? WHERE id = ?", (status, job_id))
+
+    def add_event(self, job_id, event):
+        self._write(lambda conn: self._append(conn, job_id, event))
+
+    def finish(self, job_id, status, event, result=None, error=None, error_status=None):
+        files, meta = result if result is not None else ({}, None)
+
+        def record(conn):
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, error_status = ?, finished_at = ?, accessed_at = ?,"
+                " meta = ?, result_bytes = ? WHERE id = ?",
+                (status, error, error_status, now, now, json.dumps(meta), _files_size(files), job_id)
+            )
+            conn.executemany("INSERT OR REPLACE INTO job_files (job_id, name, data) VALUES (?, ?, ?)",
+                             [(job_id, name, data) for name, data in files.items()])
+            self._append(conn, job_id, event)
+            # Least recently read first: past max_finished jobs, or once results add up past max_result_bytes
+            self._delete(conn, (
+                "SELECT id FROM ("
+                " SELECT id, ROW_NUMBER() OVER recent AS n, SUM(result_bytes) OVER recent AS total"
+                " FROM jobs WHERE finished_at IS NOT NULL"
+                " WINDOW recent AS (ORDER BY accessed_at DESC ROWS UNBOUNDED PRECEDING))"
+                " WHERE (n > ? OR total > ?) AND id != ?"
+            ), (self.max_finished, self.max_result_bytes, job_id))
+        self._write(record)
+
+    def get(self, job_id):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT owner, status, stage, error, error_status, created_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        events = self._events(conn, job_id, 0)
+        return Job(job_id, *row[:3], events, *row[3:])
+
+    def events(self, job_id, since):
+        conn = self._conn()
+        # Status first: the final event is written with it, so a finished job's events are all there
+        row = conn.execute("SELECT finished_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return [], True
+        return self._events(conn, job_id, since), row[0] is not None
+
+    @staticmethod
+    def _events(conn, job_id, since):
+        rows = conn.execute(
+            "SELECT event FROM job_events WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, since)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def result(self, job_id):
+        conn = self._conn()
+        row = conn.execute("SELECT meta FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)).fetchone()
+        if row is None:
+            return None
+        files = dict(conn.execute("SELECT name, data FROM job_files WHERE job_id = ?", (job_id,)).fetchall())
+        # Results are read once or twice per job, so this write does not contend with status polling
+        conn.execute("UPDATE jobs SET accessed_at = ? WHERE id = ?", (time.time(), job_id))
+        return files, json.loads(row[0])
+
+    def sweep(self, now, ttl):
+        """Forget expired jobs, and fail those whose worker is gone"""
+        def sweep(conn):
+            self._delete(conn, "SELECT id FROM jobs WHERE finished_at < ? OR created_at < ?",
+                         (now - ttl, now - ttl))
+            for (pid,) in conn.execute("SELECT DISTINCT pid FROM jobs WHERE finished_at IS NULL").fetchall():
+                if pid == os.getpid() or _process_alive(pid):
+                    continue
+                orphans = conn.execute("SELECT id FROM jobs WHERE pid = ? AND finished_at IS NULL",
+                                       (pid,)).fetchall()
+                for (job_id,) in orphans:
+                    error = 'The worker running this job stopped. Please submit the resume again.'
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, error_status = 500, finished_at = ?,"
+                        " accessed_at = ? WHERE id = ?", (FAILED, error, now, now, job_id)
+                    )
+                    self._append(conn, job_id, make_event(FAILED, error))
+        self._write(sweep)
+
+    def counts(self):
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE finished_at IS NOT NULL GROUP BY status"
+        ).fetchall()
+        counts = {DONE: 0, FAILED: 0}
+        counts.update(rows)
+        return counts
+
+    @staticmethod
+    def _delete(conn, select_ids, params):
+        ids = [row[0] for row in conn.execute(select_ids, params).fetchall()]
+        for table, column in (('job_events', 'job_id'), ('job_files', 'job_id'), ('jobs', 'id')):
+            conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(job_id,) for job_id in ids])
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    """Bounded worker pool that records its jobs in a job store"""
+
+    SWEEP_INTERVAL = 5  # Seconds between sweeps for expired jobs
+    POLL_INTERVAL = 0.5  # Seconds between store reads while waiting for another worker's events
+
+    def __init__(self, store=None, max_workers=4, max_pending=32, ttl=3600):
+        self.store = store if store is not None else MemoryJobStore()
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='resume-job')
+        self._local_counts = {QUEUED: 0, RUNNING: 0}  # This worker's unfinished jobs
+        self._changed = threading.Condition()
+        self._last_sweep = 0.0
+
+    def submit(self, fn, *args, owner=None, **kwargs):
+        """Queue fn(*args, progress=..., **kwargs) and return its Job
+
+        progress(stage, message, **extra) adds an event; fn returns (files, meta).
+        """
+        self._sweep()
+        with self._changed:
+            pending = sum(self._local_counts.values())
+            if pending >= self.max_pending:
+                raise QueueFullError(f'Too many jobs in progress ({pending}). Please try again shortly.')
+            self._local_counts[QUEUED] += 1
+        job = Job(owner=owner, events=[make_event(QUEUED, 'Job queued')])
+        try:
+            self.store.create(job)
+        except Exception:
+            self._settle(QUEUED)
+            raise
+        self._executor.submit(self._run, job.id, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        self._sweep()
+        return self.store.get(job_id)
+
+    def result(self, job_id):
+        """(files, meta) of a finished job, or None"""
+        return self.store.result(job_id)
+
+    def wait_for_events(self, job_id, since, timeout):
+        """Block until there are events after index `since` or the job finishes (or timeout)
+
+        Returns (events, finished). Events added by this worker wake waiters
+        at once; the store is re-read every POLL_INTERVAL for other workers'.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            events, finished = self.store.events(job_id, since)
+            remaining = deadline - time.monotonic()
+            if events or finished or remaining <= 0:
+                return events, finished
+            with self._changed:
+                self._changed.wait(min(remaining, self.POLL_INTERVAL))
+
+    def stats(self):
+        """Jobs queued and running in this worker, and finished ones in the store"""
+        self._sweep()
+        with self._changed:
+            counts = dict(self._local_counts)
+        counts.update(self.store.counts())
+        return counts
+
+    def _progress(self, job_id, stage, message, **extra):
+        self.store.add_event(job_id, make_event(stage, message, **extra))
+        with self._changed:
+            self._changed.notify_all()
+
+    def _settle(self, status, new_status=None):
+        with self._changed:
+            self._local_counts[status] -= 1
+            if new_status is not None:
+                self._local_counts[new_status] += 1
+            self._changed.notify_all()
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._settle(QUEUED, RUNNING)
+        try:
+            self.store.set_status(job_id, RUNNING)
+            result = fn(*args, progress=lambda stage, message, **extra: self._progress(job_id, stage, message,
+                                                                                       **extra), **kwargs)
+            # Status and final event are stored together so listeners never see one without the other
+            self.store.finish(job_id, DONE, make_event(DONE, 'Finished'), result=result)
+        except Exception as e:
+            print(f"Job {job_id} failed: {str(e)}")
+            if isinstance(e, HTTPException):
+                error, error_status = e.description, e.code
+            else:
+                error, error_status = str(e), 400 if isinstance(e, ValueError) else 500
+            try:
+                self.store.finish(job_id, FAILED, make_event(FAILED, error), error=error, error_status=error_status)
+            except Exception as e:
+                print(f"Job {job_id}: could not record the failure: {str(e)}")
+        finally:
+            self._settle(RUNNING)
+
+    def _sweep(self):
+        """Forget expired jobs, at most every SWEEP_INTERVAL seconds"""
+        now = time.time()
+        with self._changed:
+            if now - self._last_sweep < self.SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+        self.store.sweep(now, self.ttl)
+
+
+def create_job_store_from_env():
+    """Job store backed by SQLite if JOB_DB_PATH is set, else by this process's memory"""
+    max_finished = int(os.getenv('JOB_MAX_FINISHED', '256'))
+    max_result_bytes = int(os.getenv('JOB_RESULT_MAX_BYTES', str(256 * 1024 * 1024)))
+    db_path = os.getenv('JOB_DB_PATH')
+    if db_path:
+        return SQLiteJobStore(db_path, max_finished, max_result_bytes)
+    return MemoryJobStore(max_finished, max_result_bytes)
@@ -0,0 +1,162 @@
+"""
+Incremental parsing of a streamed JSON object.
+
+The LLM returns one JSON object. While it streams in, IncrementalJSONParser
+tracks the structure character by character and reports each top-level field
+and each element of a top-level array (e.g. one entry of 'jobs') as soon as
+its closing character arrives. Structural problems are raised immediately
+instead of after the last token.
+"""
+import json
+
+
+class MalformedStreamError(ValueError):
+    """The streamed content is not the JSON object we expect"""
+
+
+_WHITESPACE = ' \t\r\n'
+
+
+class _Frame:
+    __slots__ = ('kind', 'key', 'expect_key', 'index', 'value_start', 'parent_key')
+
+    def __init__(self, kind, parent_key=None):
+        self.kind = kind  # '{' or '['
+        self.key = None  # Current key (objects)
+        self.expect_key = kind == '{'
+        self.index = 0  # Current element (arrays)
+        self.value_start = None  # Buffer offset of the value being read
+        self.parent_key = parent_key
+
+
+class IncrementalJSONParser:
+    """Feed text chunks; get ('field', key, value) and ('item', key, index, value) events
+
+    Only values directly in the root object and elements of arrays directly
+    in the root object are decoded; deeper values are just tracked.
+    """
+
+    def __init__(self):
+        self._text = ''
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._done = False
+
+    @property
+    def text(self):
+        return self._text
+
+    def feed(self, chunk):
+        """Consume a chunk and return the events it completed"""
+        self._text += chunk
+        events = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            self._step(text, i, events)
+        self._pos = len(text)
+        return events
+
+    def close(self):
+        """Finish the stream and return the fully decoded object"""
+        if not self._done:
+            raise MalformedStreamError('Response ended before the JSON object was complete')
+        try:
+            return json.loads(self._text)
+        except json.JSONDecodeError as e:
+            raise MalformedStreamError(f'Invalid JSON in response: {str(e)}')
+
+    def _step(self, text, i, events):
+        ch = text[i]
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == '\\':
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                self._end_string(text, i, events)
+            return
+
+        if ch in _WHITESPACE:
+            return
+
+        if self._done:
+            raise MalformedStreamError(f'Unexpected content after the JSON object: {ch!r}')
+
+        if not self._stack:
+            if ch != '{':
+                raise MalformedStreamError(f'Response does not start with a JSON object: {ch!r}')
+            self._stack.append(_Frame('{'))
+            return
+
+        frame = self._stack[-1]
+
+        if ch == '"':
+            self._in_string = True
+            self._string_start = i
+            if not (frame.kind == '{' and frame.expect_key) and frame.value_start is None:
+                frame.value_start = i
+        elif ch == ':':
+            if frame.kind != '{' or frame.key is None or frame.value_start is not None:
+                raise MalformedStreamError(f'Unexpected ":" at offset {i}')
+        elif ch in '{[':
+            if frame.kind == '{' and frame.expect_key:
+                raise MalformedStreamError(f'Expected a key at offset {i}')
+            if frame.value_start is None:
+                frame.value_start = i
+            parent_key = frame.key if len(self._stack) == 1 else None
+            self._stack.append(_Frame(ch, parent_key))
+        elif ch in '}]':
+            if (ch == '}') != (frame.kind == '{'):
+                raise MalformedStreamError(f'Mismatched {ch!r} at offset {i}')
+            if frame.value_start is not None:
+                # A bare scalar (number, true, null...) ends here
+                self._complete(frame, frame.value_start, i, events)
+            self._stack.pop()
+            if not self._stack:
+                self._done = True
+                return
+            parent = self._stack[-1]
+            self._complete(parent, parent.value_start, i + 1, events)
+        elif ch == ',':
+            if frame.value_start is not None:
+                self._complete(frame, frame.value_start, i, events)
+            if frame.kind == '{':
+                frame.expect_key = True
+        else:
+            # Start of a scalar value
+            if frame.kind == '{' and frame.expect_key:
+                raise MalformedStreamError(f'Expected a key at offset {i}')
+            if frame.value_start is None:
+                frame.value_start = i
+
+    def _end_string(self, text, i, events):
+        frame = self._stack[-1]
+        if frame.kind == '{' and frame.expect_key:
+            frame.key = json.loads(text[self._string_start:i + 1])
+            frame.expect_key = False
+        elif frame.value_start == self._string_start:
+            self._complete(frame, frame.value_start, i + 1, events)
+
+    def _complete(self, frame, start, end, events):
+        """A value in frame spanning text[start:end] has finished"""
+        frame.value_start = None
+        depth = len(self._stack)
+        is_field = depth == 1
+        is_item = depth == 2 and frame.kind == '[' and frame.parent_key is not None
+        if is_field or is_item:
+            raw = self._text[start:end]
+            try:
+                value = json.loads(raw)
+            except json.JSONDecodeError as e:
+                raise MalformedStreamError(f'Invalid JSON value at offset {start}: {str(e)}')
+            if is_field:
+                events.append(('field', frame.key, value))
+            else:
+                events.append(('item', frame.parent_key, frame.index, value))
+        if frame.kind == '[':
+            frame.index += 1
@@ -0,0 +1,38 @@
+"""
+Deferred imports of heavy dependencies.
+
+PyMuPDF, openai and docxtpl (with python-docx and lxml) take most of a
+worker's start-up time, yet /health, the login page and static files never
+use them. lazy_import returns a stand-in that imports the real module on
+first attribute access, so only the first request that needs a dependency
+pays for it. When gunicorn preloads the app, server.warm_up imports them all
+once in the master instead, before the workers are forked.
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+    """Imports module name on first attribute access; Python's import lock makes that thread-safe"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """The module if it has already been imported, else a LazyModule for it"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,142 @@
+"""
+Shared OpenAI clients, one per API key.
+
+Creating an OpenAI client per request also creates a new HTTP connection
+pool, so every resume paid for a fresh TCP/TLS handshake. ClientPool keeps
+one client per key (identified only by the key's SHA-256) so connections are
+kept alive between calls. Idle clients are closed after a TTL and the pool
+is bounded with LRU eviction. Both are checked whenever a client is borrowed
+or returned, and by sweep() (called when /metrics is collected, so a worker
+without traffic closes its clients too).
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from lazy_import import lazy_import
+
+openai = lazy_import('openai')
+
+
+def key_fingerprint(api_key):
+    """Stable identifier for an API key that never exposes the key itself"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+class _PooledClient:
+    def __init__(self, client):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.in_flight = 0
+        self.evicted = False
+
+
+class ClientPool:
+    """Bounded, thread-safe cache of OpenAI clients keyed by API key hash"""
+
+    def __init__(self, max_clients=32, idle_ttl=600, timeout=60.0, max_retries=2, base_url=None):
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_url = base_url
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def _new_client(self, api_key):
+        kwargs = {'api_key': api_key, 'timeout': self.timeout, 'max_retries': self.max_retries}
+        if self.base_url:
+            kwargs['base_url'] = self.base_url
+        self.created += 1
+        return openai.OpenAI(**kwargs)
+
+    @contextmanager
+    def client(self, api_key):
+        """Borrow the shared client for api_key for the duration of a call"""
+        fingerprint = key_fingerprint(api_key)
+        to_close = []
+        with self._lock:
+            entry = self._clients.get(fingerprint)
+            if entry is None:
+                entry = _PooledClient(self._new_client(api_key))
+                self._clients[fingerprint] = entry
+            self._clients.move_to_end(fingerprint)
+            entry.in_flight += 1
+            entry.last_used = time.monotonic()
+            to_close = self._evict()
+        self._close(to_close)
+
+        try:
+            yield entry.client
+        finally:
+            with self._lock:
+                entry.in_flight -= 1
+                entry.last_used = time.monotonic()
+                if not entry.evicted:
+                    self._clients.move_to_end(fingerprint)
+                to_close = self._evict()
+                if entry.evicted and entry.in_flight == 0:
+                    to_close.append(entry)
+            self._close(to_close)
+
+    def _evict(self):
+        """Drop idle and over-capacity clients; caller holds the lock"""
+        now = time.monotonic()
+        evicted = []
+        for fingerprint, entry in list(self._clients.items()):
+            overflow = len(self._clients) > self.max_clients
+            if not overflow and entry.in_flight:
+                continue  # Serving a call; idle ones may still follow
+            if not overflow and now - entry.last_used <= self.idle_ttl:
+                # Idle entries are in last-use order, so nothing later is older
+                break
+            del self._clients[fingerprint]
+            entry.evicted = True
+            evicted.append(entry)
+        # Clients still serving a call are closed when that call returns
+        return [entry for entry in evicted if entry.in_flight == 0]
+
+    def _close(self, entries):
+        for entry in entries:
+            try:
+                entry.client.close()
+            except Exception as e:
+                print(f"Error closing OpenAI client: {str(e)}")
+
+    def sweep(self):
+        """Close clients that have been idle longer than the TTL"""
+        with self._lock:
+            to_close = self._evict()
+        self._close(to_close)
+
+    def close(self):
+        with self._lock:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        for entry in entries:
+            entry.evicted = True
+        self._close([entry for entry in entries if entry.in_flight == 0])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'in_flight': sum(entry.in_flight for entry in self._clients.values()),
+                'created': self.created,
+            }
+
+
+def create_client_pool_from_env():
+    """Build the process-wide client pool from OPENAI_* environment variables"""
+    return ClientPool(
+        max_clients=int(os.getenv('OPENAI_POOL_SIZE', '32')),
+        idle_ttl=int(os.getenv('OPENAI_CLIENT_IDLE_TTL', '600')),
+        timeout=float(os.getenv('OPENAI_TIMEOUT', '60')),
+        # Retries happen under admission control in server.py, not inside the client
+        max_retries=int(os.getenv('OPENAI_MAX_RETRIES', '0')),
+        base_url=os.getenv('OPENAI_BASE_URL') or None,
+    )
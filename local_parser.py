@@ -0,0 +1,507 @@
+"""
+Rule-based resume parsing without the LLM.
+
+Most resumes we see follow one conventional layout: the name at the top,
+headings such as EDUCATION and EXPERIENCE, a company row with the location
+right-aligned, a title row with the dates right-aligned, then bullets.
+parse_resume reads PyMuPDF spans (text, font size, bold flag and position)
+instead of flat text, so right-aligned dates and locations are told apart
+from the left column by position. It builds the same JSON as SYSTEM_PROMPT
+asks the LLM for, plus a confidence score in [0, 1] and the list of issues
+that lowered it; callers fall back to the LLM below a threshold.
+"""
+import re
+from collections import Counter
+
+from extractor import BULLET_MARKERS, INVISIBLE_CHARS, LINE_TOLERANCE, extract_pages, open_pdf
+from lazy_import import lazy_import
+
+fitz = lazy_import('pymupdf')  # PyMuPDF, imported on first use
+
+# Word exports often use Symbol-font bullets from the private use area
+MARKERS = BULLET_MARKERS + ('\uf0b7', '\uf0a7', '\uf0d8', '\u27a2', '\u25ba', '\u2013')
+
+BOLD_FLAG = 16  # PyMuPDF span flag
+
+# A horizontal gap wider than this (in points) separates the left text from
+# right-aligned text on the same baseline
+COLUMN_GAP = 24
+
+# Right-aligned text longer than this is body text, not a date or location
+MAX_RIGHT_CHARS = 40
+
+# Headings (upper-cased, '&' -> 'AND', punctuation dropped) mapped to sections
+SECTION_HEADINGS = {
+    'EDUCATION': 'education',
+    'EDUCATION AND HONORS': 'education',
+    'ACADEMIC BACKGROUND': 'education',
+    'EXPERIENCE': 'experience',
+    'WORK EXPERIENCE': 'experience',
+    'PROFESSIONAL EXPERIENCE': 'experience',
+    'RELEVANT EXPERIENCE': 'experience',
+    'INVESTMENT EXPERIENCE': 'experience',
+    'REAL ESTATE EXPERIENCE': 'experience',
+    'EMPLOYMENT': 'experience',
+    'EMPLOYMENT HISTORY': 'experience',
+    'CAREER HISTORY': 'experience',
+    'ADDITIONAL': 'additional',
+    'ADDITIONAL INFORMATION': 'additional',
+    'SKILLS': 'additional',
+    'TECHNICAL SKILLS': 'additional',
+    'SKILLS AND INTERESTS': 'additional',
+    'SKILLS ACTIVITIES AND INTERESTS': 'additional',
+    'ACTIVITIES AND INTERESTS': 'additional',
+    'INTERESTS': 'additional',
+    'CERTIFICATIONS': 'additional',
+    'LANGUAGES': 'additional',
+}
+
+MONTHS = {
+    'jan': 'Jan', 'feb': 'Feb', 'mar': 'Mar', 'apr': 'Apr', 'may': 'May', 'jun': 'Jun',
+    'jul': 'Jul', 'aug': 'Aug', 'sep': 'Sep', 'oct': 'Oct', 'nov': 'Nov', 'dec': 'Dec',
+}
+
+# Also used by sections.py to split resume text
+YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+TRANSACTIONS_HEADING = re.compile(r'^(select(ed)?|representative|notable|key)?\s*(transaction|deal)s?\b.*:?$',
+                                  re.IGNORECASE)
+
+_DATE = r'(?:[A-Za-z]{3,9}\.?\s+(?:19|20)\d{2}|\d{1,2}/(?:19|20)\d{2}|(?:19|20)\d{2}|present|current|now)'
+_DATE_RANGE = re.compile(rf'^({_DATE})(?:\s*(?:[-–—·]|to)\s*({_DATE}))?$', re.IGNORECASE)
+_TRAILING_DATES = re.compile(rf'[\s,|]+({_DATE}(?:\s*(?:[-–—·]|to)\s*{_DATE})?)$', re.IGNORECASE)
+_PAGE_NUMBER = re.compile(r'^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$', re.IGNORECASE)
+_CONTACT = re.compile(r'@|\||linkedin|\(?\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}', re.IGNORECASE)
+_COURSES = re.compile(r'^(relevant\s+)?course(work|s)\s*:\s*', re.IGNORECASE)
+_INSTITUTION = re.compile(r'universit|college|school|institute|academy|polytechnic', re.IGNORECASE)
+_SMALL_WORDS = {'of', 'and', 'the', 'in', 'for', 'at', 'on', '&'}
+
+
+class _Row:
+    __slots__ = ('page', 'y', 'x0', 'text', 'right', 'size', 'bold', 'segments')
+
+    def __init__(self, page, y, x0, text, right, size, bold, segments):
+        self.page = page
+        self.y = y
+        self.x0 = x0  # Left edge of the left text
+        self.text = text  # Left text
+        self.right = right  # Right-aligned text on the same baseline, or None
+        self.size = size
+        self.bold = bold
+        self.segments = segments  # Number of separate text runs on the baseline
+
+    @property
+    def is_bullet(self):
+        return self.text.startswith(MARKERS)
+
+
+def _join_spans(spans):
+    """Text of adjacent spans, with a space wherever they do not touch"""
+    text = spans[0][3]
+    for previous, span in zip(spans, spans[1:]):
+        gap = span[1] - previous[2]
+        text += (' ' if gap > span[4] * 0.15 and not text.endswith(' ') else '') + span[3]
+    return ' '.join(text.split())
+
+
+def _page_rows(page, page_number):
+    """Rows of one page: spans grouped by baseline and split at wide gaps"""
+    spans = []
+    for block in page.get_text('dict', flags=fitz.TEXTFLAGS_TEXT)['blocks']:
+        for line in block.get('lines', ()):
+            for span in line['spans']:
+                text = span['text'].translate(INVISIBLE_CHARS)
+                if text.strip():
+                    bold = bool(span['flags'] & BOLD_FLAG) or 'bold' in span['font'].lower()
+                    spans.append((span['origin'][1], span['bbox'][0], span['bbox'][2], text, span['size'], bold))
+    spans.sort()
+
+    baselines = []
+    for span in spans:
+        if baselines and span[0] - baselines[-1][0][0] <= LINE_TOLERANCE:
+            baselines[-1].append(span)
+        else:
+            baselines.append([span])
+
+    rows = []
+    for spans in baselines:
+        spans.sort(key=lambda span: span[1])
+        segments = [[spans[0]]]
+        for span in spans[1:]:
+            if span[1] - segments[-1][-1][2] > COLUMN_GAP:
+                segments.append([span])
+            else:
+                segments[-1].append(span)
+        left = segments[0]
+        right = ' '.join(_join_spans(segment) for segment in segments[1:]) or None
+        size = max(span[4] for span in left)
+        bold = all(span[5] for span in left)
+        rows.append(_Row(page_number, left[0][0], left[0][1], _join_spans(left), right, size, bold, len(segments)))
+    return rows
+
+
+def _drop_page_furniture(pages):
+    """Drop page numbers and header/footer rows repeated on several pages"""
+    edge_counts = Counter()
+    for rows in pages:
+        edge_counts.update({row.text.lower() for row in rows[:1] + rows[-1:]})
+    repeated = {text for text, count in edge_counts.items() if count >= 2}
+
+    kept = []
+    seen = set()
+    for rows in pages:
+        for i, row in enumerate(rows):
+            at_edge = i == 0 or i == len(rows) - 1
+            if at_edge and _PAGE_NUMBER.match(row.text) and not row.right:
+                continue
+            key = row.text.lower()
+            if at_edge and len(pages) > 1 and key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(row)
+    return kept
+
+
+def read_rows(doc):
+    """Text rows of the whole document in reading order"""
+    return _drop_page_furniture([_page_rows(page, number) for number, page in enumerate(doc)])
+
+
+def normalize_date(text):
+    """'July 2021' -> 'Jul 2021', '07/2021' -> 'Jul 2021', 'current' -> 'Present'; None if not a date"""
+    text = text.strip().rstrip('.')
+    lower = text.lower()
+    if lower in ('present', 'current', 'now'):
+        return 'Present'
+    if YEAR.fullmatch(text):
+        return text
+    parts = re.split(r'[\s/.]+', text)
+    if len(parts) != 2 or not YEAR.fullmatch(parts[1]):
+        return None
+    month = parts[0]
+    if month.isdigit():
+        names = list(MONTHS.values())
+        return f"{names[int(month) - 1]} {parts[1]}" if 1 <= int(month) <= 12 else None
+    name = MONTHS.get(month[:3].lower())
+    if name is None or not name.lower().startswith(month[:3].lower()):
+        return None
+    return f"{name} {parts[1]}"
+
+
+def parse_date_range(text):
+    """(start, end) for 'Jul 2021 – Present' or (start, None) for one date; None if not dates"""
+    match = _DATE_RANGE.match(text.strip()) if text else None
+    if not match:
+        return None
+    start = normalize_date(match.group(1))
+    end = normalize_date(match.group(2)) if match.group(2) else None
+    if start is None or (match.group(2) and end is None):
+        return None
+    return start, end
+
+
+def graduation_year(text):
+    """The last four-digit year in text, e.g. '2015 – 2019' -> '2019'"""
+    years = YEAR.findall(text or '')
+    return years[-1] if years else None
+
+
+def fix_caps(text):
+    """Title-case ALL CAPS text, keeping short acronyms and state codes"""
+    if not text or not text.isupper():
+        return text
+    words = text.split(' ')
+    fixed = []
+    for i, word in enumerate(words):
+        letters = re.sub(r'[^A-Za-z]', '', word)
+        after_comma = i > 0 and words[i - 1].endswith(',')
+        if len(letters) <= 3 and (len(words) == 1 or after_comma or len(letters) <= 1):
+            fixed.append(word)
+        elif i > 0 and word.lower() in _SMALL_WORDS:
+            fixed.append(word.lower())
+        else:
+            fixed.append(word.capitalize())
+    return ' '.join(fixed)
+
+
+def section_key(text):
+    """Normalize a heading for SECTION_HEADINGS lookup"""
+    text = text.upper().replace('&', ' AND ')
+    return ' '.join(re.sub(r'[^A-Z ]', ' ', text).split())
+
+
+def _strip_marker(text):
+    return text[1:].strip()
+
+
+class _ResumeBuilder:
+    """Single pass over the rows, filling the resume JSON section by section"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.body_size = Counter()
+        for row in rows:
+            self.body_size[row.size] += len(row.text)
+        self.body_size = self.body_size.most_common(1)[0][0] if rows else 0
+        self.data = {
+            'first_name': None,
+            'last_name': None,
+            'education': [],
+            'jobs': [],
+            'additional_bullets': [],
+        }
+        self.issues = []
+        self.unassigned = 0
+        self.section = 'header'
+        self.sections_seen = set()
+        self.repeated_sections = 0
+        self.entry = None  # Current education entry or job
+        self.bullets = None  # List the previous bullet went into
+        self.bullet_row = None  # Row of the previous bullet (for continuations)
+        self.transactions = False  # Inside a job's transaction list
+
+    def skip(self, row, reason='unassigned row'):
+        self.unassigned += 1
+        self.issues.append(f'{reason}: {row.text[:60]!r}')
+
+    def heading(self, row):
+        """Section for a heading row, 'other' for an unknown heading, None otherwise"""
+        if row.right or row.is_bullet or len(row.text) > 40:
+            return None
+        key = section_key(row.text)
+        if key in SECTION_HEADINGS:
+            return SECTION_HEADINGS[key]
+        looks_like_heading = row.text.isupper() or row.bold or row.size > self.body_size + 0.5
+        if looks_like_heading and key and not YEAR.search(row.text) and self.section != 'header':
+            return 'other'
+        return None
+
+    def continuation(self, row):
+        """A wrapped line of the previous bullet: indented past its marker or starting lowercase"""
+        if self.bullet_row is None or row.is_bullet or row.right:
+            return False
+        return row.x0 > self.bullet_row.x0 + 2 or row.text[0].islower()
+
+    def add_bullet(self, target, row):
+        target.append(_strip_marker(row.text))
+        self.bullets = target
+        self.bullet_row = row
+
+    def build(self):
+        for row in self.rows:
+            section = self.heading(row)
+            if section:
+                if section in self.sections_seen and section != 'other':
+                    self.repeated_sections += 1
+                    self.issues.append(f'repeated section: {row.text!r}')
+                self.section = section
+                self.sections_seen.add(section)
+                self.entry = None
+                self.bullets = self.bullet_row = None
+                if section == 'other':
+                    self.skip(row, 'unknown section')
+                continue
+
+            if self.continuation(row):
+                self.bullets[-1] += ' ' + row.text
+                continue
+            self.bullets = self.bullet_row = None
+
+            getattr(self, f'_{self.section}_row')(row)
+        return self.data
+
+    def _header_row(self, row):
+        if self.data['first_name'] is None:
+            name = fix_caps(row.text.split(',')[0].strip())
+            parts = [part for part in name.split() if not (len(part) <= 2 and part.endswith('.'))]
+            if len(parts) < 2 or row.right or row.is_bullet or any(ch.isdigit() for ch in name):
+                self.skip(row, 'no name on the first line')
+                self.data['first_name'] = ''
+                return
+            self.data['first_name'] = parts[0]
+            self.data['last_name'] = ' '.join(parts[1:])
+        elif not _CONTACT.search(row.text + ' ' + (row.right or '')):
+            self.skip(row)
+
+    def _other_row(self, row):
+        self.skip(row, 'unknown section')
+
+    def _education_row(self, row):
+        if row.is_bullet:
+            if self.entry is None:
+                self.skip(row)
+                return
+            if self.entry['extra_bullets'] is None:
+                self.entry['extra_bullets'] = []
+            self.add_bullet(self.entry['extra_bullets'], row)
+            return
+
+        courses = _COURSES.match(row.text)
+        if courses and self.entry is not None:
+            self.entry['relevant_courses'] = row.text[courses.end():].strip()
+            return
+
+        year = graduation_year(row.right) if row.right and parse_date_range(row.right) else None
+        location = row.right if row.right and year is None else None
+        text = row.text
+        if year is None and location is None:
+            trailing = _TRAILING_DATES.search(text)
+            if trailing:
+                year = graduation_year(trailing.group(1))
+                text = text[:trailing.start()].rstrip(' ,|')
+        if location and len(location) > MAX_RIGHT_CHARS:
+            self.skip(row, 'unrecognized right-aligned text')
+            return
+
+        entry = self.entry
+        starts_entry = (
+            entry is None
+            or entry['extra_bullets']
+            or (entry['degree_name'] is not None and _INSTITUTION.search(text))
+        )
+        if starts_entry:
+            self.entry = {
+                'university_name': fix_caps(text),
+                'university_location': location,
+                'degree_name': None,
+                'graduation_year': year,
+                'extra_bullets': None,
+                'relevant_courses': None,
+            }
+            self.data['education'].append(self.entry)
+        elif entry['degree_name'] is None:
+            entry['degree_name'] = fix_caps(text)
+            entry['graduation_year'] = entry['graduation_year'] or year
+            if location and entry['university_location'] is None:
+                entry['university_location'] = location
+        else:
+            self.skip(row)
+
+    def _experience_row(self, row):
+        job = self.entry
+        if row.is_bullet:
+            if job is None:
+                self.skip(row)
+                return
+            self.add_bullet(job['transactions'] if self.transactions else job['job_description'], row)
+            return
+
+        if job is not None and not row.right and TRANSACTIONS_HEADING.match(row.text):
+            self.transactions = True
+            return
+
+        dates = parse_date_range(row.right) if row.right else None
+        location = row.right if row.right and dates is None else None
+        text = row.text
+        if not row.right:
+            trailing = _TRAILING_DATES.search(text)
+            if trailing:
+                dates = parse_date_range(trailing.group(1))
+                text = text[:trailing.start()].rstrip(' ,|')
+        if location and len(location) > MAX_RIGHT_CHARS:
+            self.skip(row, 'unrecognized right-aligned text')
+            return
+
+        if job is None or (job['job_title'] is not None and job['company_name'] is not None):
+            self.entry = job = {
+                'company_name': fix_caps(text),
+                'job_location': location,
+                'job_start': None,
+                'job_end': None,
+                'job_title': None,
+                'job_description': [],
+                'transactions': [],
+            }
+            self.transactions = False
+            self.data['jobs'].append(job)
+        elif job['job_title'] is None:
+            job['job_title'] = fix_caps(text)
+            if location and job['job_location'] is None:
+                job['job_location'] = location
+        else:
+            self.skip(row)
+            return
+
+        if dates and job['job_start'] is None:
+            job['job_start'], job['job_end'] = dates
+
+    def _additional_row(self, row):
+        if row.right:
+            self.skip(row, 'unrecognized right-aligned text')
+        elif row.is_bullet:
+            self.add_bullet(self.data['additional_bullets'], row)
+        else:
+            # Unmarked lines ("Skills: Python, SQL") are one item each
+            self.data['additional_bullets'].append(row.text)
+            self.bullets = self.data['additional_bullets']
+            self.bullet_row = row
+
+    def confidence(self):
+        """Share of rows understood (squared), times penalties for missing structure"""
+        wide = sum(1 for row in self.rows if row.right and len(row.right) > MAX_RIGHT_CHARS)
+        if wide >= 3:
+            self.issues.insert(0, 'multi-column layout')
+            return 0.0
+        if not self.rows or not self.data['first_name']:
+            self.issues.insert(0, 'no name found')
+            return 0.0
+
+        score = (1 - self.unassigned / len(self.rows)) ** 2
+        # The same heading twice usually means several documents or columns were merged
+        score *= 0.5 ** self.repeated_sections
+        if not self.data['jobs']:
+            self.issues.append('no jobs found')
+            score *= 0.5
+        if not self.data['education']:
+            self.issues.append('no education found')
+            score *= 0.8
+        for i, job in enumerate(self.data['jobs']):
+            for field, penalty in (('company_name', 0.7), ('job_title', 0.7), ('job_start', 0.8)):
+                if not job[field]:
+                    self.issues.append(f'jobs[{i}] has no {field}')
+                    score *= penalty
+        for i, entry in enumerate(self.data['education']):
+            for field, penalty in (('university_name', 0.7), ('degree_name', 0.8), ('graduation_year', 0.9)):
+                if not entry[field]:
+                    self.issues.append(f'education[{i}] has no {field}')
+                    score *= penalty
+        return round(score, 3)
+
+
+def _fix_swapped_education(entries):
+    """Degree-first layouts put the school on the second row; swap them back"""
+    for entry in entries:
+        university, degree = entry['university_name'], entry['degree_name']
+        if degree and not _INSTITUTION.search(university or '') and _INSTITUTION.search(degree):
+            entry['university_name'], entry['degree_name'] = degree, university
+
+
+def parse_rows(rows):
+    """Parse rows into {'data', 'confidence', 'issues'}"""
+    builder = _ResumeBuilder(rows)
+    data = builder.build()
+    _fix_swapped_education(data['education'])
+    for job in data['jobs']:
+        job['transactions'] = [{'deal_description': deal} for deal in job['transactions']]
+    return {'data': data, 'confidence': builder.confidence(), 'issues': builder.issues}
+
+
+def parse_resume(doc):
+    """Parse an open PyMuPDF document into {'data', 'confidence', 'issues'}"""
+    return parse_rows(read_rows(doc))
+
+
+def parse_pdf_bytes(pdf_bytes):
+    with open_pdf(pdf_bytes) as doc:
+        return parse_resume(doc)
+
+
+def extract_and_parse(pdf_bytes, parse=True):
+    """(pages, parse, limit) from one open of the PDF; picklable for process pools
+    
+    The parse is None when parse is false. limit is always None: the shape
+    matches sandboxed extraction, which can stop early, but nothing here is
+    cut short.
+    """
+    with open_pdf(pdf_bytes) as doc:
+        return extract_pages(doc), parse_resume(doc) if parse else None, None
@@ -0,0 +1,312 @@
+"""
+In-process metrics with a Prometheus text exposition.
+
+Counters, gauges and histograms live in the worker process that records
+them. Gunicorn runs several workers, so when a metrics directory is set each
+worker writes a snapshot of its values there every flush interval, and
+render() merges every snapshot with this worker's live values:
+- counters and histograms are summed, including snapshots left by workers
+  that have since exited, so totals never go backwards
+- gauges are summed over workers whose snapshot is still fresh
+
+Values from other workers are at most one flush interval old. A process
+only starts flushing on its first metric update, so a preloaded gunicorn
+master, which serves nothing, never writes a snapshot of its own (its
+callback gauges would otherwise be added to the workers'). Empty the
+directory when the whole service restarts (clear_snapshots, called from the
+gunicorn master in gunicorn.conf.py) so totals start from zero.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _no_op():
+    pass
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # Tuple of label values -> value
+        self._lock = threading.Lock()
+        self._on_update = _no_op  # Set by the registry
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def describe(self):
+        return {'kind': self.kind, 'help': self.help, 'labelnames': list(self.labelnames)}
+
+    def samples(self):
+        """[(label values, value)] snapshot"""
+        with self._lock:
+            return [(list(key), value) for key, value in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._on_update()
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        self._on_update()
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        self._on_update()
+        with self._lock:
+            # Per-bucket (not cumulative) counts, then the +Inf bucket, sum and count
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def describe(self):
+        return dict(super().describe(), buckets=list(self.buckets))
+
+    def samples(self):
+        with self._lock:
+            return [(list(key), list(value)) for key, value in self._values.items()]
+
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose values are read from fn() at collection time
+
+    fn returns {tuple of label values: value}; use it for numbers another
+    component already tracks, such as cache hit counts.
+    """
+
+    def __init__(self, kind, name, help, labelnames, fn):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        return [(list(key), value) for key, value in self.fn().items()]
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Named metrics for one process, optionally merged with other workers' snapshots"""
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher_pid = None  # Process whose flusher is running
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            # Workers forked from a preloaded master start from zero
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+        if self.directory:
+            metric._on_update = self._ensure_flusher
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, kind, name, help, labelnames, fn):
+        return self._register(CallbackMetric(kind, name, help, labelnames, fn))
+
+    def snapshot(self):
+        """This process's metrics as a JSON-serializable dict"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshot = {}
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                print(f"METRICS: could not collect {metric.name}: {str(e)}")
+                samples = []
+            snapshot[metric.name] = dict(metric.describe(), samples=samples)
+        return snapshot
+
+    # ---- Multi-worker snapshots ----
+
+    def _snapshot_path(self):
+        return os.path.join(self.directory, f'worker-{os.getpid()}.json')
+
+    def flush(self):
+        """Write this worker's snapshot atomically"""
+        path = self._snapshot_path()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'written_at': time.time(), 'metrics': self.snapshot()}, f)
+        os.replace(tmp_path, path)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"METRICS: flush failed: {str(e)}")
+
+    def _ensure_flusher(self):
+        """Start this process's flusher, on its first metric update or collection"""
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                self._stop = threading.Event()
+                threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+
+    def _after_fork(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def clear_directory(self):
+        """Delete all worker snapshots; call once when the whole service starts"""
+        clear_snapshots(self.directory)
+
+    def _other_snapshots(self):
+        if not self.directory:
+            return []
+        own = self._snapshot_path()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, 'worker-*.json')):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Removed or replaced while we were reading
+        return snapshots
+
+    def collect(self):
+        """Merged metrics of this worker and every other worker's snapshot"""
+        if self.directory:
+            self._ensure_flusher()
+        merged = self.snapshot()
+        stale_before = time.time() - 3 * self.flush_interval
+        for snapshot in self._other_snapshots():
+            fresh = snapshot.get('written_at', 0) >= stale_before
+            for name, other in snapshot.get('metrics', {}).items():
+                target = merged.get(name)
+                if target is None or target['kind'] != other['kind']:
+                    continue
+                if target['kind'] == 'gauge' and not fresh:
+                    continue
+                if target['kind'] == 'histogram' and target.get('buckets') != other.get('buckets'):
+                    continue
+                samples = {tuple(labels): value for labels, value in target['samples']}
+                for labels, value in other['samples']:
+                    key = tuple(labels)
+                    if key not in samples:
+                        samples[key] = value
+                    elif isinstance(value, list):
+                        samples[key] = [a + b for a, b in zip(samples[key], value)]
+                    else:
+                        samples[key] = samples[key] + value
+                target['samples'] = [(list(labels), value) for labels, value in samples.items()]
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for name, metric in self.collect().items():
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            names = metric['labelnames']
+            for values, value in sorted(metric['samples']):
+                if metric['kind'] != 'histogram':
+                    lines.append(f"{name}{_labels(names, values)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric['buckets'] + ['+Inf'], value):
+                    cumulative += count
+                    le = f'le="{_format_value(float(bound)) if bound != "+Inf" else bound}"'
+                    lines.append(f"{name}_bucket{_labels(names, values, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(names, values)} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{_labels(names, values)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+def clear_snapshots(directory):
+    """Delete the worker snapshots in directory, without creating a Registry"""
+    if directory:
+        for path in glob.glob(os.path.join(directory, 'worker-*.json')):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # A worker replaced it while we were clearing
+
+
+def create_registry_from_env():
+    """Registry configured from METRICS_DIR and METRICS_FLUSH_INTERVAL"""
+    return Registry(
+        directory=os.getenv('METRICS_DIR') or None,
+        flush_interval=float(os.getenv('METRICS_FLUSH_INTERVAL', '5')),
+    )
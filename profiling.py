@@ -0,0 +1,57 @@
+"""
+Opt-in cProfile capture of individual requests.
+
+A request is profiled when it carries the profiling header (and the caller
+is allowed to use it) or when it is picked by the sampling rate. The stats
+are written to PROFILE_DIR as <id>.prof for snakeviz/pstats, and the top
+functions by cumulative time are printed to the log.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import secrets
+import time
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their stats"""
+
+    def __init__(self, directory, sample_rate=0.0, top=25):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.top = top
+
+    def should_profile(self, requested):
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start(self):
+        """Start a profiler for the current thread; None if another profiler is active"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None
+        return profiler
+
+    def finish(self, profiler, label):
+        """Stop profiler, save its stats and return the profile id"""
+        profiler.disable()
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}"
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{profile_id}.prof')
+        profiler.dump_stats(path)
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(self.top)
+        print(f"PROFILE: {label} -> {path}\n{summary.getvalue()}")
+        return profile_id
+
+
+def create_profiler_from_env():
+    """Profiler configured from PROFILE_DIR and PROFILE_SAMPLE_RATE"""
+    return RequestProfiler(
+        directory=os.getenv('PROFILE_DIR', os.path.join('/tmp', 'cv-formatter-profiles')),
+        sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    )
@@ -0,0 +1,185 @@
+"""
+Brute-force protection for the login endpoint.
+
+Each client key (the IP) keeps only its last max_attempts failure times in a
+fixed-size ring, so checking and recording cost the same however busy the
+endpoint is. A key is locked while all max_attempts failures fall inside the
+window, i.e. until the oldest of them ages out. Keys whose last failure is
+older than the window are swept, and the number of keys is capped (least
+recently failed first), so memory stays bounded when many distinct
+addresses hit the endpoint.
+
+After a failure the same key has to wait failure_delay seconds before
+trying again. The wait is enforced by refusing early retries with a
+Retry-After instead of sleeping, so it never holds a worker.
+
+Two stores share one interface: an in-process one, and a SQLite one that
+every gunicorn worker on the host shares so the limits hold across workers.
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+ALLOWED = 'allowed'
+WAIT = 'wait'  # Retrying sooner than failure_delay after a failure
+LOCKED = 'locked'
+
+
+class MemoryAttemptStore:
+    """Per-key rings of failure times, ordered by last failure, swept by TTL and capped"""
+
+    def __init__(self, max_attempts, ttl, max_keys=100000):
+        self.max_attempts = max_attempts
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._rings = OrderedDict()  # Key -> deque(maxlen=max_attempts), least recent failure first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            ring = self._rings.get(key)
+            return list(ring) if ring else []
+
+    def add(self, key, now):
+        """Append a failure time and return the key's ring"""
+        with self._lock:
+            ring = self._rings.pop(key, None)
+            if ring is None:
+                ring = deque(maxlen=self.max_attempts)
+            ring.append(now)
+            self._rings[key] = ring
+            self._sweep(now)
+            return list(ring)
+
+    def clear(self, key):
+        with self._lock:
+            self._rings.pop(key, None)
+
+    def _sweep(self, now):
+        """Drop expired and over-capacity keys from the front; caller holds the lock"""
+        rings = self._rings
+        while rings:
+            key, ring = next(iter(rings.items()))
+            if now - ring[-1] < self.ttl and len(rings) <= self.max_keys:
+                break  # Ordered by last failure, so nothing later is older
+            del rings[key]
+
+    def __len__(self):
+        return len(self._rings)
+
+
+class SQLiteAttemptStore:
+    """Failure times shared by all workers on the host; one connection per thread"""
+
+    PRUNE_EVERY = 64  # Writes between sweeps of expired and excess keys
+
+    def __init__(self, path, max_attempts, ttl, max_keys=100000):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS login_failures ("
+            " key TEXT PRIMARY KEY,"
+            " attempts TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS login_failures_updated ON login_failures (updated_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit, so read-modify-write can take the write lock up front
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute("SELECT attempts FROM login_failures WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def add(self, key, now):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT attempts FROM login_failures WHERE key = ?", (key,)).fetchone()
+            attempts = (json.loads(row[0]) if row else []) + [now]
+            attempts = attempts[-self.max_attempts:]
+            conn.execute(
+                "INSERT OR REPLACE INTO login_failures (key, attempts, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(attempts), now)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM login_failures WHERE updated_at <= ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM login_failures WHERE rowid IN ("
+                    " SELECT rowid FROM login_failures ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_keys,)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return attempts
+
+    def clear(self, key):
+        self._conn().execute("DELETE FROM login_failures WHERE key = ?", (key,))
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM login_failures").fetchone()[0]
+
+
+class LoginRateLimiter:
+    """Lockout after max_attempts failures within window, plus a short delay after each failure"""
+
+    def __init__(self, store, max_attempts=5, window=900, failure_delay=2, clock=time.time):
+        self.store = store
+        self.max_attempts = max_attempts
+        self.window = window
+        self.failure_delay = failure_delay
+        self.clock = clock
+
+    def _recent(self, attempts, now):
+        return [t for t in attempts if now - t < self.window]
+
+    def check(self, key):
+        """(ALLOWED, 0), (WAIT, seconds) or (LOCKED, seconds) for the next attempt from key"""
+        now = self.clock()
+        recent = self._recent(self.store.get(key), now)
+        if len(recent) >= self.max_attempts:
+            return LOCKED, max(1, int(self.window - (now - recent[0])))
+        if recent and now - recent[-1] < self.failure_delay:
+            return WAIT, max(1, math.ceil(self.failure_delay - (now - recent[-1])))
+        return ALLOWED, 0
+
+    def record_failure(self, key):
+        """Record a failed attempt; returns the attempts left before lockout"""
+        now = self.clock()
+        recent = self._recent(self.store.add(key, now), now)
+        return max(0, self.max_attempts - len(recent))
+
+    def reset(self, key):
+        self.store.clear(key)
+
+
+def create_login_limiter_from_env(max_attempts, window, failure_delay):
+    """Limiter backed by SQLite if LOGIN_LIMITER_DB_PATH is set, else by this process's memory"""
+    max_keys = int(os.getenv('LOGIN_LIMITER_MAX_KEYS', '100000'))
+    db_path = os.getenv('LOGIN_LIMITER_DB_PATH')
+    if db_path:
+        store = SQLiteAttemptStore(db_path, max_attempts, window, max_keys)
+    else:
+        store = MemoryAttemptStore(max_attempts, window, max_keys)
+    return LoginRateLimiter(store, max_attempts, window, failure_delay)
@@ -0,0 +1,302 @@
+"""
+PDF extraction in sandboxed child processes.
+
+PyMuPDF holds the GIL and has no limits of its own, so a hostile 10MB PDF
+(thousands of pages, a content stream that inflates to gigabytes, form
+XObjects that draw each other millions of times) could pin every thread of
+a web worker for minutes and grow it by gigabytes. ExtractionSandbox runs
+extraction in up to `workers` reusable child processes instead, started on
+demand from the forkserver with PyMuPDF already imported. Each child runs
+under an RLIMIT_AS address-space cap.
+
+A child reads at most max_pages pages and sends each page's text back as
+soon as it is done. If the document runs past `timeout` seconds, the child
+is killed. If it runs out of memory or crashes, it is replaced. In all
+three cases the caller gets the pages finished so far, marked as partial,
+or ExtractionLimitExceeded (a ValueError, so a 400) when there are none.
+The local parse is only attempted on documents within max_pages.
+
+A new child first reads a tiny PDF of its own under its limits and reports
+ready. One that dies or fails before that is a broken server setup (such
+as an address-space cap too small for PyMuPDF), not a bad upload:
+SandboxUnavailable, a 500.
+"""
+import io
+import multiprocessing
+import os
+import resource
+import threading
+import time
+from multiprocessing import forkserver, popen_forkserver, spawn, util
+from multiprocessing.context import ForkServerProcess, reduction, set_spawning_popen
+
+from extractor import iter_pages, open_pdf
+from local_parser import parse_resume
+
+# Why extraction stopped early, for logs and callers; None when it finished
+LIMIT_PAGES = 'pages'
+LIMIT_TIME = 'time'
+LIMIT_MEMORY = 'memory'
+LIMIT_CRASHED = 'crashed'
+
+
+class ExtractionLimitExceeded(ValueError):
+    """A PDF hit the time or memory limit, or crashed the reader, before any page was read"""
+
+
+class SandboxUnavailable(RuntimeError):
+    """An extraction child could not be started; no document was involved"""
+
+
+def _is_memory_error(e):
+    # MuPDF reports failed allocations as RuntimeError('code=2: malloc (...) failed'),
+    # and some PyMuPDF calls wrap a MemoryError in a SystemError
+    while e is not None:
+        if isinstance(e, MemoryError) or ('alloc' in str(e) and 'failed' in str(e)):
+            return True
+        e = e.__cause__ or e.__context__
+    return False
+
+
+def _self_test():
+    """Read a one-page PDF made here, proving PyMuPDF works under this process's limits"""
+    import pymupdf
+    with pymupdf.open() as doc:
+        doc.new_page().insert_text((72, 72), 'ready')
+        pdf_bytes = doc.tobytes()
+    with open_pdf(pdf_bytes) as doc:
+        list(iter_pages(doc, 0, 1))
+
+
+def _child_main(conn, memory_limit):
+    """Child process loop: extract each PDF sent over conn, streaming pages back"""
+    try:
+        if memory_limit:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        _self_test()
+    except Exception as e:
+        conn.send(('not_ready', f'{type(e).__name__}: {e}'))
+        return
+    conn.send(('ready', None))
+    while True:
+        try:
+            max_pages, parse = conn.recv()
+            pdf_bytes = conn.recv_bytes()
+        except EOFError:
+            return
+        try:
+            with open_pdf(pdf_bytes) as doc:
+                conn.send(('page_count', doc.page_count))
+                for text in iter_pages(doc, 0, max_pages):
+                    conn.send(('page', text))
+                local_parse = parse_resume(doc) if parse and doc.page_count <= max_pages else None
+            conn.send(('done', local_parse))
+        except ValueError as e:
+            conn.send(('invalid', str(e)))
+        except Exception as e:
+            # The child may be in a bad state; report and exit, a fresh one replaces it
+            if _is_memory_error(e):
+                conn.send(('limit', LIMIT_MEMORY))
+            else:
+                conn.send(('failed', f'{type(e).__name__}: {e}'))
+            return
+
+
+class _ForkServerPopen(popen_forkserver.Popen):
+    """Starts a forkserver child without importing the launching script in it
+
+    Children only run _child_main, from this module, which the forkserver has
+    already imported. Same as popen_forkserver.Popen._launch except that the
+    main-module entries are left out of the preparation data.
+    """
+
+    def _launch(self, process_obj):
+        prep_data = spawn.get_preparation_data(process_obj._name)
+        prep_data.pop('init_main_from_path', None)
+        prep_data.pop('init_main_from_name', None)
+        buf = io.BytesIO()
+        set_spawning_popen(self)
+        try:
+            reduction.dump(prep_data, buf)
+            reduction.dump(process_obj, buf)
+        finally:
+            set_spawning_popen(None)
+
+        self.sentinel, w = forkserver.connect_to_new_process(self._fds)
+        _parent_w = os.dup(w)  # The child's sentinel for this process
+        self.finalizer = util.Finalize(self, util.close_fds, (_parent_w, self.sentinel))
+        with open(w, 'wb', closefd=True) as f:
+            f.write(buf.getbuffer())
+        self.pid = forkserver.read_signed(self.sentinel)
+
+
+class _SandboxProcess(ForkServerProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        return _ForkServerPopen(process_obj)
+
+
+class _Child:
+    def __init__(self, context, memory_limit, start_timeout):
+        self.conn, child_conn = context.Pipe()
+        process_class = _SandboxProcess if context.get_start_method() == 'forkserver' else context.Process
+        self.process = process_class(target=_child_main, args=(child_conn, memory_limit),
+                                     name='pdf-sandbox', daemon=True)
+        try:
+            self.process.start()
+        except Exception as e:
+            self.conn.close()
+            print(f"PDF sandbox: starting a child failed: {type(e).__name__}: {e}")
+            raise SandboxUnavailable(f'PDF sandbox child could not be started ({type(e).__name__})') from e
+        finally:
+            child_conn.close()
+        self.documents = 0
+        try:
+            if not self.conn.poll(start_timeout):
+                raise SandboxUnavailable(f'PDF sandbox child was not ready after {start_timeout:g}s')
+            kind, value = self.conn.recv()
+            if kind != 'ready':
+                raise SandboxUnavailable(f'PDF sandbox child failed its start-up check: {value}')
+        except (EOFError, OSError):
+            self.stop()
+            raise SandboxUnavailable(
+                f'PDF sandbox child exited with code {self.process.exitcode} before it was ready')
+        except SandboxUnavailable:
+            self.stop()
+            raise
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ExtractionSandbox:
+    """Bounded pool of extraction child processes with per-document time, page and memory limits"""
+
+    def __init__(self, workers=8, timeout=10.0, memory_limit=512 * 1024 * 1024, max_pages=50,
+                 recycle_after=200, start_method='forkserver', start_timeout=30.0):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.max_pages = max_pages
+        self.recycle_after = recycle_after  # Documents per child before it is replaced
+        self.start_timeout = start_timeout  # Seconds for a new child to report ready
+        self._context = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            # Children fork from a server that has already imported PyMuPDF and
+            # this module, instead of each importing them again. Not __main__:
+            # the forkserver would run the launching script a second time, and
+            # the children never need it (see _ForkServerPopen)
+            self._context.set_forkserver_preload(['pymupdf', __name__])
+        self._cond = threading.Condition()
+        self._idle = []
+        self._started = 0
+        self._pid = os.getpid()
+        self.counts = {LIMIT_PAGES: 0, LIMIT_TIME: 0, LIMIT_MEMORY: 0, LIMIT_CRASHED: 0}
+
+    def _borrow(self):
+        with self._cond:
+            if self._pid != os.getpid():
+                # Forked (e.g. a gunicorn worker): the parent's children are not ours
+                self._idle, self._started, self._pid = [], 0, os.getpid()
+            while True:
+                while self._idle:
+                    child = self._idle.pop()
+                    if child.process.is_alive():
+                        return child
+                    child.stop()
+                    self._started -= 1
+                if self._started < self.workers:
+                    self._started += 1
+                    break
+                self._cond.wait()
+        try:
+            return _Child(self._context, self.memory_limit, self.start_timeout)
+        except BaseException as e:
+            self._give_back(None)
+            if isinstance(e, SandboxUnavailable):
+                print(f"PDF sandbox: {str(e)}")
+            raise
+
+    def _give_back(self, child):
+        """Return a healthy child to the pool; None (or a recycled child) frees its slot"""
+        if child is not None and child.documents >= self.recycle_after:
+            child.stop()
+            child = None
+        with self._cond:
+            if child is None:
+                self._started -= 1
+            else:
+                self._idle.append(child)
+            self._cond.notify()
+
+    def start(self, count=1):
+        """Start count children ahead of the first request"""
+        children = [self._borrow() for _ in range(min(count, self.workers))]
+        for child in children:
+            self._give_back(child)
+
+    def extract(self, pdf_bytes, parse=False):
+        """Extract pdf_bytes (bytes or memoryview) in a child; raises ValueError or SandboxUnavailable
+
+        Returns {'pages', 'local_parse', 'page_count', 'limit'}. 'limit' says
+        why extraction stopped early (LIMIT_PAGES, LIMIT_TIME, LIMIT_MEMORY,
+        LIMIT_CRASHED) or is None; local_parse is None unless parse is set
+        and the document was read completely.
+        """
+        child = self._borrow()
+        healthy = False
+        pages, page_count, local_parse, limit = [], None, None, None
+        deadline = time.monotonic() + self.timeout
+        try:
+            child.documents += 1
+            child.conn.send((self.max_pages, parse))
+            child.conn.send_bytes(pdf_bytes)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not child.conn.poll(remaining):
+                    limit = LIMIT_TIME
+                    break
+                kind, value = child.conn.recv()
+                if kind == 'page':
+                    pages.append(value)
+                elif kind == 'page_count':
+                    page_count = value
+                elif kind == 'done':
+                    local_parse = value
+                    healthy = True
+                    break
+                elif kind == 'invalid':
+                    healthy = True
+                    raise ValueError(value)
+                elif kind == 'limit':
+                    limit = value
+                    break
+                else:
+                    raise ValueError(f'Could not read PDF: {value}')
+        except (EOFError, OSError):
+            limit = LIMIT_CRASHED  # The child died, or its pipe broke while sending
+        finally:
+            if not healthy:
+                child.stop()
+                child = None
+            self._give_back(child)
+
+        if limit is None and page_count is not None and page_count > self.max_pages:
+            limit = LIMIT_PAGES
+        if limit is not None:
+            with self._cond:
+                self.counts[limit] += 1
+            print(f"PDF sandbox: stopped at the {limit} limit after {len(pages)} of {page_count or '?'} pages")
+        if limit in (LIMIT_TIME, LIMIT_MEMORY, LIMIT_CRASHED) and not pages:
+            raise ExtractionLimitExceeded({
+                LIMIT_TIME: f'PDF took longer than {self.timeout:g} seconds to read',
+                LIMIT_MEMORY: 'PDF needs too much memory to read',
+                LIMIT_CRASHED: 'PDF could not be read',
+            }[limit] + '. Please upload a simpler PDF.')
+        return {'pages': pages, 'local_parse': local_parse, 'page_count': page_count, 'limit': limit}
+
+    def stats(self):
+        with self._cond:
+            return {'started': self._started, 'idle': len(self._idle), **self.counts}
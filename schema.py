@@ -0,0 +1,107 @@
+"""
+Validation of the structured resume JSON described in SYSTEM_PROMPT.
+
+Validation is deliberately lenient about missing keys (the template renders
+them as empty strings) but strict about types, since a string where the
+template expects a list renders one bullet per character.
+"""
+
+
+class ResumeSchemaError(ValueError):
+    """Structured resume data does not match the template's schema"""
+
+
+TEXT = (str, type(None))
+YEAR = (str, int, type(None))
+
+EDUCATION_FIELDS = {
+    'university_name': TEXT,
+    'university_location': TEXT,
+    'degree_name': TEXT,
+    'graduation_year': YEAR,
+    'relevant_courses': (str, list, type(None)),
+}
+
+JOB_FIELDS = {
+    'company_name': TEXT,
+    'job_location': TEXT,
+    'job_start': TEXT,
+    'job_end': TEXT,
+    'job_title': TEXT,
+}
+
+
+def _check_type(path, value, types):
+    if not isinstance(value, types):
+        names = ' or '.join('null' if t is type(None) else t.__name__ for t in types)
+        raise ResumeSchemaError(f'{path} must be {names}, got {type(value).__name__}')
+
+
+def _check_string_list(path, value):
+    if value is None:
+        return
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ResumeSchemaError(f'{path} must be a list of strings')
+
+
+def validate_education(path, entry):
+    if not isinstance(entry, dict):
+        raise ResumeSchemaError(f'{path} must be an object')
+    for field, types in EDUCATION_FIELDS.items():
+        _check_type(f'{path}.{field}', entry.get(field), types)
+    _check_string_list(f'{path}.extra_bullets', entry.get('extra_bullets'))
+
+
+def validate_job(path, entry):
+    if not isinstance(entry, dict):
+        raise ResumeSchemaError(f'{path} must be an object')
+    for field, types in JOB_FIELDS.items():
+        _check_type(f'{path}.{field}', entry.get(field), types)
+    _check_string_list(f'{path}.job_description', entry.get('job_description'))
+
+    transactions = entry.get('transactions')
+    if transactions is None:
+        return
+    if not isinstance(transactions, list):
+        raise ResumeSchemaError(f'{path}.transactions must be a list')
+    for i, deal in enumerate(transactions):
+        if not isinstance(deal, dict):
+            raise ResumeSchemaError(f'{path}.transactions[{i}] must be an object')
+        _check_type(f'{path}.transactions[{i}].deal_description', deal.get('deal_description'), TEXT)
+
+
+LIST_ITEM_VALIDATORS = {
+    'education': validate_education,
+    'jobs': validate_job,
+}
+
+
+def validate_item(key, index, value):
+    """Validate one element of a top-level list as soon as it is complete"""
+    validator = LIST_ITEM_VALIDATORS.get(key)
+    if validator:
+        validator(f'{key}[{index}]', value)
+    elif key == 'additional_bullets' and not isinstance(value, str):
+        raise ResumeSchemaError(f'additional_bullets[{index}] must be a string')
+
+
+def validate_field(key, value):
+    """Validate one complete top-level field"""
+    if key in ('first_name', 'last_name'):
+        _check_type(key, value, TEXT)
+    elif key in LIST_ITEM_VALIDATORS or key == 'additional_bullets':
+        if value is None:
+            return
+        if not isinstance(value, list):
+            raise ResumeSchemaError(f'{key} must be a list')
+        for i, item in enumerate(value):
+            validate_item(key, i, item)
+
+
+def validate_resume(data):
+    """Validate a whole structured resume; raises ResumeSchemaError"""
+    if not isinstance(data, dict):
+        raise ResumeSchemaError('Resume data must be a JSON object')
+    for key, value in data.items():
+        validate_field(key, value)
+    return data
@@ -0,0 +1,25 @@
+"""
+Build step: download the tiktoken encoding that compaction.py counts tokens
+with into its cache directory (TIKTOKEN_CACHE_DIR, by default .tiktoken_cache
+beside the app), so running instances never fetch it. Exits non-zero if the
+download fails, which fails the build instead of leaving the service on the
+token estimate.
+
+Usage: python scripts/fetch_tiktoken_encoding.py
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import compaction  # noqa: E402
+
+
+def main():
+    encoding = compaction.fetch_encoding()
+    print(f"tiktoken {encoding.name} encoding cached in {compaction.TIKTOKEN_CACHE_DIR}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Splitting resume text into sections for parallel structuring.
+
+A single completion for a long resume spends most of its time producing
+output tokens, one after another. split_sections cuts the LLM input text
+into the header (name and contact), education, one block per job and the
+remaining sections (skills, interests and anything unrecognized). Each
+block can then be structured by its own, much shorter, completion running
+concurrently, and merge_sections puts the partial results back together in
+the schema SYSTEM_PROMPT describes.
+
+Sections are found from heading lines (the same vocabulary as the local
+parser, plus short all-caps lines once the first known heading has been
+seen). Jobs are split where a non-bullet line, other than a transactions
+sub-heading, follows the previous job's bullets: the company/title rows of
+the next job.
+"""
+from local_parser import MARKERS, SECTION_HEADINGS, TRANSACTIONS_HEADING, YEAR, section_key
+
+# What each kind of segment is, and the keys its completion must return
+SEGMENT_KINDS = {
+    'header': ("the top of a resume with the candidate's name and contact details", ('first_name', 'last_name')),
+    'education': ('the education section of a resume', ('education',)),
+    'jobs': ('one job from the experience section of a resume', ('jobs',)),
+    'additional': ('the skills, interests and other additional sections of a resume', ('additional_bullets',)),
+}
+
+# User message for one segment's completion (part of the result cache key)
+SECTION_PROMPT = ("The text below is only {description}. Apply the extraction rules to it and return a "
+                  "JSON object with only these keys: {keys}.\n\n{text}")
+
+def _heading(line, seen_heading):
+    """Section of a heading line ('other' for an unknown one), or None"""
+    if len(line) > 40 or line.startswith(MARKERS):
+        return None
+    key = section_key(line)
+    if key in SECTION_HEADINGS:
+        return SECTION_HEADINGS[key]
+    if seen_heading and key and line.isupper() and not YEAR.search(line):
+        return 'other'
+    return None
+
+
+def _split_jobs(lines):
+    """Experience lines -> one list of lines per job"""
+    jobs = []
+    current = []
+    has_bullets = False
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            if current:
+                current.append(line)
+            continue
+        starts_job = has_bullets and not stripped.startswith(MARKERS) and not TRANSACTIONS_HEADING.match(stripped) \
+            and not line[:1].isspace()
+        if starts_job:
+            jobs.append(current)
+            current = []
+            has_bullets = False
+        current.append(line)
+        has_bullets = has_bullets or stripped.startswith(MARKERS)
+    if current:
+        jobs.append(current)
+    return jobs
+
+
+def split_sections(text):
+    """[(kind, text)] segments of the resume text, in document order
+
+    kind is one of SEGMENT_KINDS. Returns the header and education first,
+    then one 'jobs' segment per job, then 'additional' (everything under
+    other headings). Segments with no text are left out.
+    """
+    groups = {'header': [], 'education': [], 'experience': [], 'additional': []}
+    section = 'header'
+    seen_heading = False
+    for line in text.split('\n'):
+        heading = _heading(line.strip(), seen_heading) if line.strip() else None
+        if heading is not None:
+            seen_heading = True
+            section = 'additional' if heading == 'other' else heading
+            if heading == 'other':
+                groups['additional'].append(line)  # Keep unknown headings as context
+            continue
+        groups[section].append(line)
+
+    segments = []
+    for kind in ('header', 'education'):
+        block = '\n'.join(groups[kind]).strip()
+        if block:
+            segments.append((kind, block))
+    for job_lines in _split_jobs(groups['experience']):
+        block = '\n'.join(job_lines).strip()
+        if block:
+            segments.append(('jobs', block))
+    block = '\n'.join(groups['additional']).strip()
+    if block:
+        segments.append(('additional', block))
+    return segments
+
+
+def count_jobs(segments):
+    return sum(1 for kind, _ in segments if kind == 'jobs')
+
+
+def section_request(kind, text):
+    """User message asking for only the keys of one segment"""
+    description, keys = SEGMENT_KINDS[kind]
+    key_list = ', '.join(f'"{key}"' for key in keys)
+    return SECTION_PROMPT.format(description=description, keys=key_list, text=text)
+
+
+def merge_sections(parts):
+    """Merge [(kind, partial JSON)] in document order into one resume dict"""
+    resume = {'first_name': None, 'last_name': None, 'education': [], 'jobs': [], 'additional_bullets': []}
+    for kind, data in parts:
+        for key in SEGMENT_KINDS[kind][1]:
+            value = data.get(key)
+            if value is None:
+                continue
+            if isinstance(resume[key], list):
+                resume[key].extend(value)
+            elif resume[key] is None:
+                resume[key] = value
+    return resume
@@ -1,23 +1,47 @@
-from flask import Flask, request, send_file, jsonify, send_from_directory, session, redirect
+from flask import Flask, Response, g, has_request_context, request, send_file, jsonify, session, redirect
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge, ServiceUnavailable
+from werkzeug.wsgi import ClosingIterator
 from dotenv import load_dotenv
-import pymupdf as fitz  # PyMuPDF
 import json
 import os
+import base64
 import io
 import secrets
 import hashlib
 import time
-from functools import wraps
-from collections import defaultdict
-from threading import Lock
-from openai import OpenAI
-from docxtpl import DocxTemplate
+import zipfile
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial, wraps
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from cache import create_cache_from_env, make_key, sha256_hex
+from jobs import JobQueue, QueueFullError, create_job_store_from_env, DONE, FAILED, QUEUED, RUNNING
+from batch import ZipStream, read_zip_upload, retry_with_backoff, run_batch
+from docx_templates import TemplateCatalog, TemplateRegistry, init_render_worker, render_in_worker
+from extractor import extract_pages, open_pdf
+from compaction import compact_pages
+from json_stream import IncrementalJSONParser
+from schema import validate_field, validate_item, validate_resume
+from local_parser import extract_and_parse, parse_resume
+from sections import SECTION_PROMPT, SEGMENT_KINDS, count_jobs, merge_sections, section_request, split_sections
+from llm_client import create_client_pool_from_env, key_fingerprint
+from admission import AdmissionController, AdmissionRejected, UpstreamBusy
+from metrics import create_registry_from_env
+from profiling import create_profiler_from_env
+from ratelimit import LOCKED, WAIT, create_login_limiter_from_env
+from uploads import FileTooLarge, configure_uploads, detach_upload
+from lazy_import import lazy_import
+from static_assets import IMMUTABLE, StaticAssets
+from sandbox import LIMIT_PAGES, ExtractionSandbox
+
+openai = lazy_import('openai')  # Imported by the first LLM call, or by warm_up
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = Flask(__name__, static_folder='frontend', static_url_path='')
+app = Flask(__name__, static_folder=None)  # Frontend files are served by static_assets
 CORS(app, supports_credentials=True)
 
 # Secure session configuration
@@ -37,11 +61,10 @@ APP_PASSWORD_HASH = os.getenv('APP_PASSWORD_HASH')
 # Configuration
 MAX_LOGIN_ATTEMPTS = 5  # Max attempts before lockout
 LOCKOUT_DURATION = 900  # 15 minutes lockout (in seconds)
-FAILED_LOGIN_DELAY = 2  # 2 second delay after failed login
+FAILED_LOGIN_DELAY = 2  # Seconds an IP must wait after a failed login
 
-# Track failed login attempts per IP
-login_attempts = defaultdict(list)  # IP -> list of timestamps
-login_locks = defaultdict(Lock)  # IP -> lock for thread safety
+# Failed attempts per IP; set LOGIN_LIMITER_DB_PATH to share them between workers
+login_limiter = create_login_limiter_from_env(MAX_LOGIN_ATTEMPTS, LOCKOUT_DURATION, FAILED_LOGIN_DELAY)
 
 def get_client_ip():
     """Get the client's IP address, accounting for proxies"""
@@ -52,37 +75,6 @@ def get_client_ip():
         return request.headers.get('X-Real-IP')
     return request.remote_addr
 
-def is_ip_locked(ip):
-    """Check if an IP is currently locked out"""
-    with login_locks[ip]:
-        current_time = time.time()
-        # Remove attempts older than lockout duration
-        login_attempts[ip] = [
-            t for t in login_attempts[ip] 
-            if current_time - t < LOCKOUT_DURATION
-        ]
-        # Check if too many recent attempts
-        return len(login_attempts[ip]) >= MAX_LOGIN_ATTEMPTS
-
-def record_failed_attempt(ip):
-    """Record a failed login attempt for an IP"""
-    with login_locks[ip]:
-        login_attempts[ip].append(time.time())
-
-def clear_failed_attempts(ip):
-    """Clear failed attempts after successful login"""
-    with login_locks[ip]:
-        login_attempts[ip] = []
-
-def get_lockout_remaining(ip):
-    """Get remaining lockout time in seconds"""
-    with login_locks[ip]:
-        if not login_attempts[ip]:
-            return 0
-        oldest_attempt = min(login_attempts[ip])
-        remaining = LOCKOUT_DURATION - (time.time() - oldest_attempt)
-        return max(0, int(remaining))
-
 # ============================================
 # Authentication Functions
 # ============================================
@@ -111,6 +103,336 @@ def login_required(f):
 # Maximum file size: 10MB
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Uploads are size-checked while the body streams in and rejected with 413.
+# Single-PDF requests may carry MAX_FILE_SIZE plus the form fields; batch
+# requests up to BATCH_MAX_UPLOAD_SIZE. Files larger than
+# UPLOAD_SPOOL_THRESHOLD bytes (default 1MB, 0 = never) are spooled to a
+# temporary file in UPLOAD_SPOOL_DIR and memory-mapped instead of held in memory.
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+BATCH_MAX_UPLOAD_SIZE = int(os.getenv('BATCH_MAX_UPLOAD_SIZE', str(200 * 1024 * 1024)))
+configure_uploads(
+    app,
+    max_file_size=MAX_FILE_SIZE,
+    max_request_size=MAX_FILE_SIZE + UPLOAD_FORM_OVERHEAD,
+    spool_threshold=int(os.getenv('UPLOAD_SPOOL_THRESHOLD', str(1024 * 1024))),
+    spool_dir=os.getenv('UPLOAD_SPOOL_DIR') or None
+)
+
+# Model used for structured extraction (part of the result cache key)
+OPENAI_MODEL = "gpt-4o-mini"
+
+# Token budget for the resume text sent to the LLM (0 disables truncation)
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '12000'))
+
+# OpenAI clients shared per API key (OPENAI_TIMEOUT, OPENAI_MAX_RETRIES,
+# OPENAI_POOL_SIZE, OPENAI_CLIENT_IDLE_TTL, OPENAI_BASE_URL)
+openai_clients = create_client_pool_from_env()
+
+# Stream completions and validate each section as it arrives (OPENAI_STREAM=0 to disable)
+OPENAI_STREAM = os.getenv('OPENAI_STREAM', '1') != '0'
+
+# Structure resumes with at least LLM_SECTION_MIN_JOBS jobs as one smaller
+# completion per section, run concurrently (LLM_SECTION_SPLIT=1 to enable).
+# Lower latency for more input tokens: the system prompt is sent with every section.
+LLM_SECTION_SPLIT = os.getenv('LLM_SECTION_SPLIT', '0') != '0'
+LLM_SECTION_MIN_JOBS = int(os.getenv('LLM_SECTION_MIN_JOBS', '3'))
+LLM_SECTION_CONCURRENCY = int(os.getenv('LLM_SECTION_CONCURRENCY', '8'))  # In-flight section calls per worker
+section_pool = ThreadPoolExecutor(max_workers=LLM_SECTION_CONCURRENCY, thread_name_prefix='llm-section')
+
+# Admission control for structuring calls (see admission.py). At most
+# LLM_MAX_CONCURRENCY resumes per worker are with OpenAI at once, and at most
+# LLM_KEY_CONCURRENCY per API key; the limit starts at LLM_INITIAL_CONCURRENCY
+# and adapts between LLM_MIN_CONCURRENCY and the maximum, halving on rate
+# limits, timeouts and calls slower than LLM_LATENCY_TARGET seconds. Up to
+# LLM_QUEUE_MAX callers wait up to LLM_QUEUE_TIMEOUT seconds for a slot,
+# beyond that they get 503 with Retry-After. Rate limits and transient errors
+# are retried LLM_MAX_RETRIES times with jittered backoff, outside the slot.
+# A resume split into sections holds one slot for all of its section calls.
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+LLM_MIN_CONCURRENCY = int(os.getenv('LLM_MIN_CONCURRENCY', '1'))
+LLM_INITIAL_CONCURRENCY = int(os.getenv('LLM_INITIAL_CONCURRENCY', '8'))
+LLM_KEY_CONCURRENCY = int(os.getenv('LLM_KEY_CONCURRENCY', '8'))
+LLM_QUEUE_MAX = int(os.getenv('LLM_QUEUE_MAX', '32'))
+LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '30'))
+LLM_LATENCY_TARGET = float(os.getenv('LLM_LATENCY_TARGET', '45'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+
+# LOCAL_PARSER=1 parses conventionally laid out resumes by rules instead of the
+# LLM when the parser is at least this confident. Off by default: its accuracy
+# has only been measured against synthetic fixtures, not recorded LLM output
+# (see benchmarks/bench_local_parser.py), and it misses rules the prompt gives
+# the LLM, such as deal bullets outside a Transactions heading.
+LOCAL_PARSER = os.getenv('LOCAL_PARSER', '0') != '0'
+LOCAL_PARSER_MIN_CONFIDENCE = float(os.getenv('LOCAL_PARSER_MIN_CONFIDENCE', '0.95'))
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# What /api/process and job results return: the document, the structured
+# JSON (to edit and send to /api/render), or both
+RESULT_FORMATS = ('docx', 'json', 'both')
+
+# Word templates: every .docx in TEMPLATE_DIR (see TemplateCatalog), chosen
+# with the template parameter; DEFAULT_TEMPLATE is used when none is given.
+# Each is compiled once per worker by the registry.
+TEMPLATE_DIR = os.getenv('TEMPLATE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), "template"))
+DEFAULT_TEMPLATE = os.getenv('DEFAULT_TEMPLATE', 'template')
+TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, f"{DEFAULT_TEMPLATE}.docx")
+template_catalog = TemplateCatalog(TEMPLATE_DIR, DEFAULT_TEMPLATE)
+template_registry = TemplateRegistry()
+# A request for several templates renders them side by side in up to
+# RENDER_WORKERS processes; 1 renders them one after another in the request
+RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', str(os.cpu_count() or 1)))
+
+# Frontend files, fingerprinted and precompressed in memory at startup; outside
+# production they are rebuilt when a file changes on disk
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend')
+static_assets = StaticAssets(FRONTEND_DIR, pages=('index.html', 'login.html'),
+                             auto_reload=os.getenv('FLASK_ENV') != 'production')
+PUBLIC_FILES = ('style.css', 'app.js', 'login.html')  # Needed by the login page
+PAGE_CACHE_CONTROL = 'private, no-cache'  # The app page is only for logged-in users
+
+# ============================================
+# Result Cache
+# ============================================
+# PDF hash -> extracted page texts, and (text, model, prompt) hash -> structured JSON.
+# Set CACHE_DB_PATH to share results across gunicorn workers.
+result_cache = create_cache_from_env()
+TEXT_CACHE = 'pages'
+STRUCTURED_CACHE = 'structured'
+LOCAL_CACHE = 'local'
+
+# ============================================
+# Background Job Queue
+# ============================================
+# Jobs run in the worker that accepted them. Set JOB_DB_PATH to keep their
+# state and results in SQLite, so status, event and result requests can be
+# answered by any gunicorn worker (gunicorn.conf.py sets a default); without it
+# they live in this worker's memory. Finished jobs are capped at
+# JOB_MAX_FINISHED and JOB_RESULT_MAX_BYTES of documents, least recently read first.
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))  # Concurrent pipeline runs per worker
+JOB_QUEUE_MAX = int(os.getenv('JOB_QUEUE_MAX', '32'))  # Unfinished jobs per worker before rejecting
+JOB_TTL = int(os.getenv('JOB_TTL', '3600'))  # Seconds to keep finished jobs
+JOB_EVENT_KEEPALIVE = 15  # Seconds between SSE keep-alive comments
+# Each open event stream holds a server thread until its job finishes. Beyond
+# JOB_EVENT_STREAMS (default: half of GUNICORN_THREADS) clients get a 503 and
+# poll the status URL instead, leaving threads for everything else.
+JOB_EVENT_STREAMS = int(os.getenv('JOB_EVENT_STREAMS', str(max(1, int(os.getenv('GUNICORN_THREADS', '8')) // 2))))
+JOB_POLL_INTERVAL = 1  # Seconds, the Retry-After of a refused event stream
+event_stream_slots = BoundedSemaphore(JOB_EVENT_STREAMS)
+
+job_queue = JobQueue(create_job_store_from_env(), max_workers=JOB_WORKERS, max_pending=JOB_QUEUE_MAX, ttl=JOB_TTL)
+
+# ============================================
+# Metrics and Profiling
+# ============================================
+# Set METRICS_DIR to a directory shared by all gunicorn workers so /metrics
+# adds up every worker; without it /metrics shows the answering worker only.
+# METRICS_TOKEN, if set, is required as a Bearer token (logged-in users may always read).
+metrics_registry = create_registry_from_env()
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+REQUESTS_TOTAL = metrics_registry.counter(
+    'cvformatter_http_requests_total', 'HTTP requests by endpoint and status', ('endpoint', 'method', 'status'))
+REQUEST_SECONDS = metrics_registry.histogram(
+    'cvformatter_http_request_duration_seconds', 'Request time including sending the body', ('endpoint',))
+STAGE_SECONDS = metrics_registry.histogram(
+    'cvformatter_stage_duration_seconds', 'Time spent in each pipeline stage', ('stage',))
+STAGE_ERRORS = metrics_registry.counter(
+    'cvformatter_stage_errors_total', 'Exceptions raised in pipeline stages', ('stage', 'error'))
+UPLOAD_BYTES = metrics_registry.histogram(
+    'cvformatter_upload_bytes', 'Size of processed PDFs',
+    buckets=(16e3, 64e3, 256e3, 1e6, 2.5e6, 5e6, 10e6))
+PDF_PAGES = metrics_registry.histogram(
+    'cvformatter_pdf_pages', 'Pages per extracted PDF', buckets=(1, 2, 3, 5, 10, 20, 50))
+LLM_TOKENS = metrics_registry.counter('cvformatter_llm_tokens_total', 'OpenAI tokens used', ('kind',))
+STRUCTURED_TOTAL = metrics_registry.counter(
+    'cvformatter_structured_total', 'Resumes structured by source (local parser, cache, llm)', ('source',))
+metrics_registry.callback(
+    'counter', 'cvformatter_cache_lookups_total', 'Result cache lookups by namespace and outcome',
+    ('namespace', 'result'),
+    lambda: {
+        (namespace, result): counts.get(field, 0)
+        for namespace, counts in result_cache.stats()['namespaces'].items()
+        for field, result in (('memory_hits', 'memory_hit'), ('disk_hits', 'disk_hit'), ('misses', 'miss'))
+    })
+LLM_WAIT_SECONDS = metrics_registry.histogram(
+    'cvformatter_llm_admission_wait_seconds', 'Time structuring calls waited for an LLM slot',
+    buckets=(0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60))
+llm_admission = AdmissionController(
+    max_limit=LLM_MAX_CONCURRENCY, min_limit=LLM_MIN_CONCURRENCY, initial_limit=LLM_INITIAL_CONCURRENCY,
+    key_limit=LLM_KEY_CONCURRENCY, max_queue=LLM_QUEUE_MAX, queue_timeout=LLM_QUEUE_TIMEOUT,
+    latency_target=LLM_LATENCY_TARGET, on_wait=LLM_WAIT_SECONDS.observe)
+metrics_registry.callback(
+    'gauge', 'cvformatter_llm_admission', 'LLM admission state: concurrency limit, calls in flight and queued',
+    ('state',),
+    lambda: {(state,): llm_admission.stats()[state] for state in ('limit', 'in_flight', 'queued')})
+metrics_registry.callback(
+    'counter', 'cvformatter_llm_admission_total', 'LLM admission outcomes, and calls that hit an overloaded upstream',
+    ('outcome',),
+    lambda: {(outcome,): llm_admission.counts[outcome]
+             for outcome in ('admitted', 'rejected_queue_full', 'rejected_timeout', 'overloads')})
+
+
+def openai_client_gauges():
+    """Client pool sizes for /metrics; sweeps first, so a worker without traffic closes idle clients"""
+    openai_clients.sweep()
+    stats = openai_clients.stats()
+    return {('open',): stats['clients'], ('in_flight',): stats['in_flight']}
+
+
+metrics_registry.callback(
+    'gauge', 'cvformatter_openai_clients', 'Pooled OpenAI clients in each worker: open, and serving a call',
+    ('state',), openai_client_gauges)
+metrics_registry.callback(
+    'counter', 'cvformatter_openai_clients_created_total', 'OpenAI clients created by the pool', (),
+    lambda: {(): openai_clients.stats()['created']})
+metrics_registry.callback(
+    'counter', 'cvformatter_extract_limited_total', 'PDFs whose extraction stopped at a sandbox limit',
+    ('limit',),
+    lambda: {(limit,): count for limit, count in extract_sandbox.counts.items()} if extract_sandbox else {})
+metrics_registry.callback(
+    'gauge', 'cvformatter_jobs', 'Background jobs queued or running in each worker', ('status',),
+    lambda: {(status,): count for status, count in job_queue.stats().items() if status in (QUEUED, RUNNING)})
+
+# Per-request stage durations in a Server-Timing header, for load tests and
+# browser dev tools (SERVER_TIMING=0 to disable)
+SERVER_TIMING = os.getenv('SERVER_TIMING', '1') != '0'
+
+# Endpoints whose response body (a generated document) is timed as the 'send' stage
+SEND_TIMED_ENDPOINTS = ('process_resume', 'job_result', 'render_resume')
+
+# Requests are profiled with cProfile when a logged-in user sends "X-Profile: 1"
+# or at random with probability PROFILE_SAMPLE_RATE; stats go to PROFILE_DIR
+request_profiler = create_profiler_from_env()
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time a pipeline stage; exceptions are counted by class and re-raised"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        STAGE_ERRORS.inc(stage=stage, error=type(e).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if has_request_context():
+            timings = g.setdefault('stage_timings', {})
+            timings[stage] = timings.get(stage, 0) + elapsed
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    requested = request.headers.get('X-Profile') == '1' and session.get('authenticated')
+    g.profiler = request_profiler.start() if request_profiler.should_profile(requested) else None
+
+
+@app.after_request
+def finish_request_metrics(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        response.headers['X-Profile-Id'] = request_profiler.finish(profiler, f"{request.method} {request.path}")
+    
+    timings = g.pop('stage_timings', None)
+    if SERVER_TIMING and timings:
+        response.headers['Server-Timing'] = ', '.join(
+            f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings.items())
+    
+    # Captured now: the request context is gone by the time the body has been sent
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    method = request.method
+    status = response.status_code
+    started = g.get('request_started', time.perf_counter())
+    send_started = time.perf_counter() if request.endpoint in SEND_TIMED_ENDPOINTS and status == 200 else None
+    
+    def record():
+        now = time.perf_counter()
+        if send_started is not None:
+            STAGE_SECONDS.observe(now - send_started, stage='send')
+        REQUESTS_TOTAL.inc(endpoint=endpoint, method=method, status=status)
+        REQUEST_SECONDS.observe(now - started, endpoint=endpoint)
+    
+    if response.direct_passthrough:
+        # Werkzeug skips call_on_close for passthrough bodies such as send_file
+        response.response = ClosingIterator(response.response, record)
+    else:
+        response.call_on_close(record)
+    return response
+
+# ============================================
+# Batch Processing and Parallel Extraction
+# ============================================
+BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', '200'))
+BATCH_EXTRACT_WORKERS = int(os.getenv('BATCH_EXTRACT_WORKERS', str(os.cpu_count() or 2)))
+BATCH_LLM_CONCURRENCY = int(os.getenv('BATCH_LLM_CONCURRENCY', '8'))  # In-flight OpenAI calls per batch
+# Documents with at least this many pages are extracted in page ranges on the
+# extraction pool; 0 keeps single-request extraction in-process (only used
+# with EXTRACT_SANDBOX=0)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '0'))
+
+# Uploaded PDFs are read in up to EXTRACT_SANDBOX_WORKERS child processes
+# (see sandbox.py), each limited to EXTRACT_MEMORY_LIMIT_MB of address space.
+# Only the first EXTRACT_MAX_PAGES pages are read, and a document still
+# running after EXTRACT_TIMEOUT seconds is cut short. EXTRACT_SANDBOX=0
+# extracts in the web worker instead.
+EXTRACT_SANDBOX = os.getenv('EXTRACT_SANDBOX', '1') != '0'
+extract_sandbox = ExtractionSandbox(
+    workers=int(os.getenv('EXTRACT_SANDBOX_WORKERS', '8')),
+    timeout=float(os.getenv('EXTRACT_TIMEOUT', '10')),
+    memory_limit=int(os.getenv('EXTRACT_MEMORY_LIMIT_MB', '512')) * 1024 * 1024,
+    max_pages=int(os.getenv('EXTRACT_MAX_PAGES', '50'))
+) if EXTRACT_SANDBOX else None
+# Batch items wait for a sandbox child on these threads
+batch_extract_threads = ThreadPoolExecutor(max_workers=BATCH_EXTRACT_WORKERS, thread_name_prefix='batch-extract')
+
+
+def retryable_llm_errors():
+    """OpenAI errors worth retrying with backoff"""
+    return (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+
+def overload_llm_errors():
+    """OpenAI errors meaning the upstream is saturated; they lower the admission limit"""
+    return (openai.RateLimitError, openai.APITimeoutError)
+
+
+_extract_pool = None
+_extract_pool_lock = Lock()
+_render_pool = None
+_render_pool_lock = Lock()
+
+
+def get_extract_pool():
+    """Process pool for batch and page-parallel text extraction, created on first use"""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            # forkserver children start clean instead of inheriting this
+            # process's threads and locks
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=BATCH_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context('forkserver')
+            )
+        return _extract_pool
+
+
+def get_render_pool():
+    """Process pool for rendering several templates at once, created on first use"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # Each process compiles every template in the catalog once, up front
+            _render_pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('forkserver'),
+                initializer=init_render_worker,
+                initargs=(template_catalog.paths(),)
+            )
+        return _render_pool
+
 SYSTEM_PROMPT = """
 You are a professional resume parser. Your goal is to extract information from a PDF and return a structured JSON object that matches a specific document template.
 
@@ -195,82 +517,211 @@ Example output:
 """
 
 
-def extract_text_from_pdf_bytes(pdf_bytes):
-    """Extract text from PDF bytes (in-memory) with improved bullet point preservation"""
-    pdf_stream = io.BytesIO(pdf_bytes)
-    with fitz.open(stream=pdf_stream, filetype="pdf") as doc:
-        pages_text = []
-        for page in doc:
-            # Use get_text with layout preservation to maintain structure
-            text = page.get_text("text", sort=True)
-            
-            # Post-process to better preserve bullet points
-            # Common bullet point markers (including filled circle ●)
-            bullet_markers = ['•', '▪', '▫', '◦', '‣', '-', '*', '·', '●']
-            
-            lines = text.split('\n')
-            processed_lines = []
-            
-            for i, line in enumerate(lines):
-                original_line = line
-                # Remove zero-width spaces and other invisible characters that might interfere
-                line_cleaned = line.replace('\u200b', '').replace('\u200c', '').replace('\u200d', '')
-                line_stripped = line_cleaned.strip()
-                
-                if not line_stripped:
-                    processed_lines.append('')
-                    continue
-                
-                # Check if line starts with a bullet marker (check original for leading whitespace)
-                is_bullet = any(line_stripped.startswith(marker) for marker in bullet_markers)
-                
-                # Also check for indented lines that might be continuation of bullets
-                # (common pattern: bullet on first line, continuation on next)
-                is_continuation = False
-                if i > 0 and processed_lines:
-                    prev_line_stripped = processed_lines[-1].strip()
-                    # If previous line was a bullet and this line is indented or starts lowercase
-                    if any(prev_line_stripped.startswith(marker) for marker in bullet_markers):
-                        # Check if this looks like a continuation (starts with lowercase or is indented)
-                        # Check original line for indentation before stripping
-                        is_indented = original_line.startswith('  ') or original_line.startswith('\t')
-                        if line_stripped and (line_stripped[0].islower() or is_indented):
-                            is_continuation = True
-                
-                if is_bullet:
-                    # Ensure bullet point is on its own line (use stripped version)
-                    processed_lines.append(line_stripped)
-                elif is_continuation:
-                    # Append continuation to previous bullet point
-                    if processed_lines:
-                        processed_lines[-1] += " " + line_stripped
-                    else:
-                        processed_lines.append(line_stripped)
+def log_usage(usage):
+    """Print and count token usage reported by OpenAI"""
+    if usage:
+        print(f"OpenAI usage: {usage.prompt_tokens} input, {usage.completion_tokens} output tokens")
+        LLM_TOKENS.inc(usage.prompt_tokens, kind='input')
+        LLM_TOKENS.inc(usage.completion_tokens, kind='output')
+
+
+def stream_structured_data(client, messages, on_section=None):
+    """Stream the completion, validating each section as soon as it closes
+    
+    on_section(event) receives ('field', key, value) and
+    ('item', key, index, value) events from IncrementalJSONParser. A
+    malformed or invalid section aborts the stream immediately.
+    """
+    parser = IncrementalJSONParser()
+    usage = None
+    stream = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=messages,
+        response_format={"type": "json_object"},
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    try:
+        for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            for event in parser.feed(chunk.choices[0].delta.content):
+                if event[0] == 'field':
+                    validate_field(event[1], event[2])
                 else:
-                    processed_lines.append(line_stripped)
-            
-            pages_text.append('\n'.join(processed_lines))
-        
-        return '\n\n'.join(pages_text)
+                    validate_item(event[1], event[2], event[3])
+                if on_section:
+                    on_section(event)
+    finally:
+        # Closing early drops the connection instead of waiting for the rest
+        stream.close()
+    
+    log_usage(usage)
+    return parser.close()
 
 
-def get_structured_data(api_key, raw_text):
-    """Call OpenAI API to get structured JSON data"""
-    if not api_key or not api_key.strip():
-        raise ValueError("OpenAI API key is required")
+def request_structured_data(client, messages, on_section=None):
+    """One completion, streamed or not; returns the parsed JSON object"""
+    if OPENAI_STREAM:
+        return stream_structured_data(client, messages, on_section)
     
-    client = OpenAI(api_key=api_key.strip())
     response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": raw_text}
-        ],
+        model=OPENAI_MODEL,
+        messages=messages,
         response_format={"type": "json_object"}
     )
+    log_usage(response.usage)
     return json.loads(response.choices[0].message.content)
 
 
+def request_section(client, kind, text):
+    """Structure one segment from split_sections; returns its validated keys"""
+    data = request_structured_data(client, [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": section_request(kind, text)}
+    ])
+    if not isinstance(data, dict):
+        raise ValueError('Section result must be a JSON object')
+    part = {key: data.get(key) for key in SEGMENT_KINDS[kind][1]}
+    for key, value in part.items():
+        validate_field(key, value)
+    return part
+
+
+def get_structured_sections(client, segments, on_section=None):
+    """Structure segments concurrently and merge them in document order
+    
+    on_section receives the same events as a single streamed call. Fields
+    are sent as soon as their segment completes; list items once every
+    earlier segment has too, so each index is the item's position in the
+    merged result (a job finishing early waits for the jobs above it).
+    The first failure cancels the segments that have not started yet.
+    """
+    futures = [section_pool.submit(request_section, client, kind, text) for kind, text in segments]
+    pending = set(futures)
+    sent = 0  # Segments whose list items have been sent, in document order
+    next_index = {}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                part = future.result()
+                if on_section:
+                    for key, value in part.items():
+                        if not isinstance(value, list):
+                            on_section(('field', key, value))
+            while on_section and sent < len(futures) and futures[sent].done():
+                for key, value in futures[sent].result().items():
+                    for item in value if isinstance(value, list) else ():
+                        index = next_index.get(key, 0)
+                        next_index[key] = index + 1
+                        on_section(('item', key, index, item))
+                sent += 1
+    finally:
+        for future in pending:
+            future.cancel()
+    return merge_sections((kind, future.result()) for (kind, _), future in zip(segments, futures))
+
+
+def use_section_split(raw_text):
+    """split_sections segments when the text is worth structuring in parallel, else None"""
+    if not LLM_SECTION_SPLIT:
+        return None
+    segments = split_sections(raw_text)
+    if count_jobs(segments) < LLM_SECTION_MIN_JOBS:
+        return None
+    return segments
+
+
+def get_structured_data(api_key, raw_text, on_section=None):
+    """Call OpenAI API to get structured JSON data"""
+    if not api_key or not api_key.strip():
+        raise ValueError("OpenAI API key is required")
+    
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": raw_text}
+    ]
+    segments = use_section_split(raw_text)
+    
+    def attempt():
+        # Shared client per key, so the HTTP connection is kept alive across calls
+        with openai_clients.client(api_key.strip()) as client:
+            if segments:
+                print(f"OpenAI: structuring {len(segments)} sections concurrently")
+                return get_structured_sections(client, segments, on_section)
+            return request_structured_data(client, messages, on_section)
+    
+    return validate_resume(call_llm(api_key.strip(), attempt))
+
+
+def call_llm(api_key, fn):
+    """fn() under LLM admission control, retrying upstream errors outside the slot
+    
+    Raises AdmissionRejected when no slot frees up and UpstreamBusy when the
+    upstream is still failing after LLM_MAX_RETRIES retries; both are 503s.
+    """
+    key = key_fingerprint(api_key)
+    try:
+        return retry_with_backoff(
+            lambda: llm_admission.call(key, fn, overload_on=overload_llm_errors()),
+            retry_on=retryable_llm_errors(),
+            max_retries=LLM_MAX_RETRIES
+        )
+    except retryable_llm_errors() as e:
+        print(f"OpenAI: giving up after {LLM_MAX_RETRIES} retries: {e}")
+        raise UpstreamBusy('The AI service is busy. Please try again shortly.',
+                           retry_after=llm_admission.retry_after()) from e
+
+
+def prepare_llm_input(pages):
+    """Check that pages contain text and compact them for the LLM; raises ValueError"""
+    if len('\n\n'.join(pages).strip()) < 10:
+        raise ValueError('Could not extract text from PDF. Please ensure the PDF contains readable text.')
+    
+    with stage_timer('compact'):
+        text, stats = compact_pages(pages, PROMPT_TOKEN_BUDGET)
+    estimate = '' if stats['exact'] else ' (estimated)'
+    print(f"Prompt compaction: {stats['tokens_before']} -> {stats['tokens_after']} tokens{estimate}")
+    if stats['truncated']:
+        print(f"WARNING: Resume text truncated to the {PROMPT_TOKEN_BUDGET} token budget")
+    return text
+
+
+def get_cached_pages(pdf_bytes):
+    """Return (pdf_hash, cached page texts or None) for uploaded PDF bytes"""
+    pdf_hash = sha256_hex(pdf_bytes)
+    return pdf_hash, result_cache.get(TEXT_CACHE, pdf_hash)
+
+
+def get_structured_data_cached(api_key, raw_text, on_section=None):
+    """get_structured_data with a cache keyed on text, model and prompt"""
+    prompts = (SYSTEM_PROMPT, SECTION_PROMPT) if use_section_split(raw_text) else (SYSTEM_PROMPT,)
+    key = make_key(raw_text, OPENAI_MODEL, *prompts)
+    cached = result_cache.get(STRUCTURED_CACHE, key)
+    if cached is not None:
+        STRUCTURED_TOTAL.inc(source='cache')
+        return cached
+    with stage_timer('llm'):
+        json_data = get_structured_data(api_key, raw_text, on_section)
+    STRUCTURED_TOTAL.inc(source='llm')
+    result_cache.put(STRUCTURED_CACHE, key, json_data)
+    return json_data
+
+
+def accept_local_parse(parse):
+    """Return the rule-based parse's data if it is confident enough to skip OpenAI, else None"""
+    if not LOCAL_PARSER or parse is None:
+        return None
+    if parse['confidence'] < LOCAL_PARSER_MIN_CONFIDENCE:
+        print(f"Local parser: confidence {parse['confidence']:.2f}, using OpenAI ({'; '.join(parse['issues'][:3])})")
+        return None
+    STRUCTURED_TOTAL.inc(source='local')
+    return validate_resume(parse['data'])
+
+
 def clean_none_values(obj):
     """Recursively replace None values with empty strings for template compatibility"""
     if isinstance(obj, dict):
@@ -283,15 +734,12 @@ def clean_none_values(obj):
         return obj
 
 
-def create_word_doc_bytes(data, template_path):
-    """Create Word document in memory and return as bytes"""
-    doc = DocxTemplate(template_path)
-    
+def make_template_context(data):
+    """Template context for resume data"""
     # Clean None values to prevent template rendering issues
     cleaned_data = clean_none_values(data)
     
-    # Prepare context for template
-    context = {
+    return {
         'first_name': cleaned_data.get('first_name', ''),
         'last_name': cleaned_data.get('last_name', ''),
         'education': cleaned_data.get('education', []),
@@ -299,15 +747,258 @@ def create_word_doc_bytes(data, template_path):
         'additional_bullets': cleaned_data.get('additional_bullets', []),
         'data': cleaned_data
     }
+
+
+def create_word_doc_bytes(data, template_path):
+    """Create Word document in memory and return as bytes"""
+    # Parsed and compiled once per worker; recompiled if the file changes
+    try:
+        template = template_registry.get(template_path)
+    except FileNotFoundError:
+        raise RuntimeError('Template file not found')
+    
+    return template.render(make_template_context(data))
+
+
+def render_documents(data, template_ids):
+    """{template id: document BytesIO} for data rendered into each template
+    
+    Several templates render side by side in the render pool; one renders
+    in this thread.
+    """
+    paths = {template_id: get_template_path(template_id) for template_id in template_ids}
+    if len(paths) < 2 or RENDER_WORKERS < 2:
+        return {template_id: create_word_doc_bytes(data, path) for template_id, path in paths.items()}
     
-    doc.render(context)
+    context = make_template_context(data)
+    pool = get_render_pool()
+    futures = {template_id: pool.submit(render_in_worker, path, context) for template_id, path in paths.items()}
+    return {template_id: io.BytesIO(future.result()) for template_id, future in futures.items()}
+
+
+def read_pdf_upload():
+    """Validate the multipart upload and return (UploadBuffer, api_key); raises ValueError
+    
+    The buffer is detached from the request, so the caller must close it.
+    """
+    if 'pdf_file' not in request.files:
+        raise ValueError('No PDF file provided')
+    
+    if 'api_key' not in request.form:
+        raise ValueError('OpenAI API key is required')
+    
+    pdf_file = request.files['pdf_file']
+    api_key = request.form.get('api_key', '').strip()
     
-    # Save to bytes buffer
-    output_buffer = io.BytesIO()
-    doc.save(output_buffer)
-    output_buffer.seek(0)
+    # Validate file
+    if pdf_file.filename == '':
+        raise ValueError('No file selected')
     
-    return output_buffer
+    if not pdf_file.filename.lower().endswith('.pdf'):
+        raise ValueError('File must be a PDF')
+    
+    # The size limit was enforced while the file streamed in
+    return detach_upload(pdf_file), api_key
+
+
+def run_upload_pipeline(upload, api_key, progress=None, templates=(DEFAULT_TEMPLATE,)):
+    """run_pipeline over an uploaded file's buffer without copying it; closes the upload"""
+    with upload, upload.view() as pdf_bytes:
+        return run_pipeline(pdf_bytes, api_key, progress, templates)
+
+
+def run_upload_job(upload, api_key, progress, templates):
+    """run_upload_pipeline as a job: (documents as bytes, filename and data) for the job store"""
+    documents, filename, json_data = run_upload_pipeline(upload, api_key, progress, templates)
+    return ({template_id: buffer.getvalue() for template_id, buffer in documents.items()},
+            {'filename': filename, 'data': json_data})
+
+
+def get_result_format():
+    """The format request parameter: 'docx' (default), 'json' or 'both'; raises ValueError"""
+    result_format = request.values.get('format', 'docx')
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(RESULT_FORMATS)}")
+    return result_format
+
+
+def get_templates(default=(DEFAULT_TEMPLATE,)):
+    """Template ids from the template parameter (repeated or comma-separated); raises ValueError
+    
+    Returns the ids in default when the parameter is absent.
+    """
+    template_ids = []
+    for value in request.values.getlist('template'):
+        for template_id in value.split(','):
+            template_id = template_id.strip()
+            if template_id and template_id not in template_ids:
+                get_template_path(template_id)  # Unknown ids are a 400
+                template_ids.append(template_id)
+    return template_ids or list(default)
+
+
+def zip_documents(documents, filename):
+    """ZIP of one document per template, named after filename and the template id"""
+    stem = os.path.splitext(filename)[0]
+    buffer = io.BytesIO()
+    # A .docx is already compressed
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for template_id, doc_buffer in documents.items():
+            archive.writestr(f"{stem}_{template_id}.docx", doc_buffer.getvalue())
+    buffer.seek(0)
+    return buffer
+
+
+def result_response(result_format, documents, filename, json_data):
+    """The Word document, its structured data as JSON, or both (document base64-encoded)
+    
+    documents maps template ids to documents. With more than one, 'docx' is
+    a ZIP of all of them and 'both' returns 'documents' keyed by template id.
+    """
+    if result_format == 'docx':
+        if len(documents) == 1:
+            return send_file(
+                next(iter(documents.values())),
+                mimetype=DOCX_MIMETYPE,
+                as_attachment=True,
+                download_name=filename
+            )
+        return send_file(
+            zip_documents(documents, filename),
+            mimetype='application/zip',
+            as_attachment=True,
+            download_name=f"{os.path.splitext(filename)[0]}.zip"
+        )
+    payload = {'filename': filename, 'data': json_data}
+    if result_format == 'both':
+        encoded = {template_id: base64.b64encode(doc_buffer.getvalue()).decode('ascii')
+                   for template_id, doc_buffer in documents.items()}
+        if len(encoded) == 1:
+            payload['document'] = next(iter(encoded.values()))
+        else:
+            payload['documents'] = encoded
+    return jsonify(payload)
+
+
+def get_template_path(template_id=DEFAULT_TEMPLATE):
+    """Absolute path of a Word template in the catalog; raises ValueError for an unknown id"""
+    if template_id == DEFAULT_TEMPLATE:
+        return TEMPLATE_PATH
+    return template_catalog.path(template_id)
+
+
+def make_download_name(json_data):
+    """Build the download filename from the candidate's name"""
+    first_name = json_data.get('first_name', 'Resume')
+    last_name = json_data.get('last_name', '')
+    return f"{first_name}_{last_name}_Formatted_Resume.docx".replace(' ', '_') if last_name else "Formatted_Resume.docx"
+
+
+def extract_pdf(pdf_bytes, report):
+    """(pages, local parse or None, complete) for PDF bytes; raises ValueError
+    
+    complete is False when the sandbox stopped on its time or memory limit
+    and pages holds only the pages read before that.
+    """
+    if extract_sandbox is not None:
+        report('extracting', 'Step 1: Extracting text from PDF...')
+        with stage_timer('extract'):
+            extraction = extract_sandbox.extract(pdf_bytes, parse=LOCAL_PARSER)
+        return extraction['pages'], extraction['local_parse'], partial_extraction_error(extraction['limit']) is None
+    
+    # Validate PDF can be opened; the same handle is used for extraction
+    report('validating', 'Validating PDF...')
+    with stage_timer('validate'):
+        doc = open_pdf(pdf_bytes)
+    local_parse = None
+    with doc:
+        report('extracting', 'Step 1: Extracting text from PDF...')
+        with stage_timer('extract'):
+            pages = extract_pages(
+                doc,
+                pdf_bytes,
+                executor=get_extract_pool() if PDF_PARALLEL_MIN_PAGES else None,
+                parallel_min_pages=PDF_PARALLEL_MIN_PAGES
+            )
+        if LOCAL_PARSER:
+            with stage_timer('local_parse'):
+                local_parse = parse_resume(doc)
+    return pages, local_parse, True
+
+
+def sandbox_extract_and_parse(pdf_bytes):
+    """extract_and_parse for batch items, run in the sandbox: (pages, local parse, limit)"""
+    extraction = extract_sandbox.extract(pdf_bytes, parse=LOCAL_PARSER)
+    return extraction['pages'], extraction['local_parse'], extraction['limit']
+
+
+def partial_extraction_error(limit):
+    """Why a result was made from only part of its PDF, or None if extraction was complete
+    
+    Stopping at the page limit is deterministic, so those pages count as complete.
+    """
+    if limit in (None, LIMIT_PAGES):
+        return None
+    return f'PDF only partly read (stopped at the {limit} limit); the document uses the pages read before it'
+
+
+
+def run_pipeline(pdf_bytes, api_key, progress=None, templates=(DEFAULT_TEMPLATE,)):
+    """Run extract -> structure -> render; returns (documents, filename, json_data)
+    
+    progress(stage, message) is called as each step starts. User-facing
+    problems (bad PDF, no text) raise ValueError. documents maps each of
+    templates to its rendered document; with no templates it is empty.
+    """
+    def report(stage, message):
+        print(message)
+        if progress:
+            progress(stage, message)
+    
+    UPLOAD_BYTES.observe(len(pdf_bytes))
+    
+    # Repeat uploads skip validation and extraction entirely
+    pdf_hash, pages = get_cached_pages(pdf_bytes)
+    local_parse = None
+    
+    if pages is None:
+        pages, local_parse, complete = extract_pdf(pdf_bytes, report)
+        PDF_PAGES.observe(len(pages))
+        text = prepare_llm_input(pages)
+        # Text cut short by the time or memory limit is not cached, a later upload may do better
+        if complete:
+            if LOCAL_PARSER:
+                result_cache.put(LOCAL_CACHE, pdf_hash, local_parse)
+            result_cache.put(TEXT_CACHE, pdf_hash, pages)
+    else:
+        report('extracting', 'Step 1: Using cached text for PDF...')
+        text = prepare_llm_input(pages)
+        if LOCAL_PARSER:
+            local_parse = result_cache.get(LOCAL_CACHE, pdf_hash)
+    
+    def on_section(event):
+        # Push each parsed section to job listeners as soon as it closes
+        if progress:
+            if event[0] == 'field':
+                progress('structuring', f'Parsed {event[1]}', section=event[1], data=event[2])
+            else:
+                progress('structuring', f'Parsed {event[1]} #{event[2] + 1}',
+                         section=event[1], index=event[2], data=event[3])
+    
+    json_data = accept_local_parse(local_parse)
+    if json_data is not None:
+        report('structuring', f"Step 2: Parsed locally (confidence {local_parse['confidence']:.2f})")
+    else:
+        report('structuring', 'Step 2: Calling OpenAI API...')
+        json_data = get_structured_data_cached(api_key, text, on_section)
+    
+    if not templates:
+        return {}, make_download_name(json_data), json_data
+    
+    report('rendering', f"Step 3: Generating Word document{'s' if len(templates) > 1 else ''}...")
+    with stage_timer('render'):
+        documents = render_documents(json_data, templates)
+    return documents, make_download_name(json_data), json_data
 
 
 # Authentication endpoints
@@ -316,17 +1007,24 @@ def login():
     """Handle login requests with brute force protection"""
     client_ip = get_client_ip()
     
-    # Check if IP is locked out
-    if is_ip_locked(client_ip):
-        remaining = get_lockout_remaining(client_ip)
-        minutes = remaining // 60
-        seconds = remaining % 60
+    # Check if IP is locked out or retrying too soon after a failure
+    status, retry_after = login_limiter.check(client_ip)
+    if status == LOCKED:
+        minutes = retry_after // 60
+        seconds = retry_after % 60
         print(f"SECURITY: Blocked login attempt from locked IP: {client_ip}")
         return jsonify({
             'error': f'Too many failed attempts. Try again in {minutes}m {seconds}s',
             'locked': True,
-            'remaining_seconds': remaining
-        }), 429
+            'remaining_seconds': retry_after
+        }), 429, {'Retry-After': str(retry_after)}
+    if status == WAIT:
+        print(f"SECURITY: Login retried too soon from IP: {client_ip}")
+        return jsonify({
+            'error': f'Please wait {retry_after}s before trying again',
+            'locked': False,
+            'retry_after': retry_after
+        }), 429, {'Retry-After': str(retry_after)}
     
     try:
         data = request.get_json()
@@ -340,32 +1038,29 @@ def login():
         
         if verify_password(password):
             # Successful login - clear failed attempts
-            clear_failed_attempts(client_ip)
+            login_limiter.reset(client_ip)
             session.permanent = True
             session['authenticated'] = True
             session['session_token'] = secrets.token_hex(16)
             print(f"SECURITY: Successful login from IP: {client_ip}")
             return jsonify({'success': True, 'message': 'Login successful'})
         else:
-            # Failed login - record attempt and add delay
-            record_failed_attempt(client_ip)
-            attempts_left = MAX_LOGIN_ATTEMPTS - len(login_attempts[client_ip])
+            # Failed login - record attempt; further attempts wait FAILED_LOGIN_DELAY
+            attempts_left = login_limiter.record_failure(client_ip)
             print(f"SECURITY: Failed login attempt from IP: {client_ip} ({attempts_left} attempts remaining)")
             
-            # Add delay to slow down brute force attacks
-            time.sleep(FAILED_LOGIN_DELAY)
-            
             if attempts_left <= 0:
-                remaining = get_lockout_remaining(client_ip)
+                _, remaining = login_limiter.check(client_ip)
                 return jsonify({
                     'error': f'Too many failed attempts. Locked for {remaining // 60} minutes.',
                     'locked': True,
                     'remaining_seconds': remaining
-                }), 429
+                }), 429, {'Retry-After': str(remaining)}
             
             return jsonify({
                 'error': f'Invalid password. {attempts_left} attempts remaining.',
-                'attempts_left': attempts_left
+                'attempts_left': attempts_left,
+                'retry_after': login_limiter.failure_delay
             }), 401
             
     except Exception as e:
@@ -394,7 +1089,7 @@ def login_page():
     # If already authenticated, redirect to main app
     if session.get('authenticated'):
         return redirect('/')
-    return send_from_directory('frontend', 'login.html')
+    return static_assets.file('login.html').response(request)
 
 
 @app.route('/')
@@ -403,7 +1098,7 @@ def index():
     # Redirect to login if not authenticated
     if not session.get('authenticated'):
         return redirect('/login')
-    return send_from_directory('frontend', 'index.html')
+    return static_assets.file('index.html').response(request, PAGE_CACHE_CONTROL)
 
 
 @app.route('/api/process', methods=['POST'])
@@ -411,70 +1106,18 @@ def index():
 def process_resume():
     """Process PDF resume and return formatted Word document"""
     try:
-        # Validate request
-        if 'pdf_file' not in request.files:
-            return jsonify({'error': 'No PDF file provided'}), 400
-        
-        if 'api_key' not in request.form:
-            return jsonify({'error': 'OpenAI API key is required'}), 400
-        
-        pdf_file = request.files['pdf_file']
-        api_key = request.form.get('api_key', '').strip()
-        
-        # Validate file
-        if pdf_file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        if not pdf_file.filename.lower().endswith('.pdf'):
-            return jsonify({'error': 'File must be a PDF'}), 400
-        
-        # Read PDF into memory
-        pdf_bytes = pdf_file.read()
-        
-        # Check file size
-        if len(pdf_bytes) > MAX_FILE_SIZE:
-            return jsonify({'error': f'File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB'}), 400
-        
-        # Validate PDF can be opened
-        try:
-            pdf_stream = io.BytesIO(pdf_bytes)
-            test_doc = fitz.open(stream=pdf_stream, filetype="pdf")
-            test_doc.close()
-        except Exception as e:
-            return jsonify({'error': f'Invalid PDF file: {str(e)}'}), 400
+        result_format = get_result_format()
+        templates = get_templates() if result_format != 'json' else ()
+        upload, api_key = read_pdf_upload()
+        documents, filename, json_data = run_upload_pipeline(upload, api_key, templates=templates)
         
-        # Process PDF
-        print("Step 1: Extracting text from PDF...")
-        text = extract_text_from_pdf_bytes(pdf_bytes)
-        
-        if not text or len(text.strip()) < 10:
-            return jsonify({'error': 'Could not extract text from PDF. Please ensure the PDF contains readable text.'}), 400
-        
-        print("Step 2: Calling OpenAI API...")
-        json_data = get_structured_data(api_key, text)
-        
-        print("Step 3: Generating Word document...")
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(script_dir, "template", "template.docx")
-        
-        if not os.path.exists(template_path):
-            return jsonify({'error': 'Template file not found'}), 500
-        
-        doc_buffer = create_word_doc_bytes(json_data, template_path)
-        
-        # Generate filename
-        first_name = json_data.get('first_name', 'Resume')
-        last_name = json_data.get('last_name', '')
-        filename = f"{first_name}_{last_name}_Formatted_Resume.docx".replace(' ', '_') if last_name else "Formatted_Resume.docx"
-        
-        print("Step 4: Returning document...")
-        return send_file(
-            doc_buffer,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            as_attachment=True,
-            download_name=filename
-        )
+        print("Step 4: Returning result...")
+        return result_response(result_format, documents, filename, json_data)
         
+    except RequestEntityTooLarge as e:
+        return upload_too_large(e)
+    except ServiceUnavailable as e:
+        return service_unavailable(e)
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -484,12 +1127,351 @@ def process_resume():
         return jsonify({'error': f'Processing error: {str(e)}'}), 500
 
 
+# ============================================
+# Asynchronous Jobs
+# ============================================
+
+def get_owned_job(job_id):
+    """Look up a job belonging to the current session, or None"""
+    job = job_queue.get(job_id)
+    if job is None or job.owner != session.get('session_token'):
+        return None
+    return job
+
+
+@app.route('/api/jobs', methods=['POST'])
+@login_required
+def submit_job():
+    """Queue a resume for processing and return its job ID immediately"""
+    try:
+        templates = get_templates()
+        upload, api_key = read_pdf_upload()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        job = job_queue.submit(run_upload_job, upload, api_key, owner=session.get('session_token'),
+                               templates=templates)
+    except QueueFullError as e:
+        upload.close()
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({
+        'job_id': job.id,
+        'status_url': f'/api/jobs/{job.id}',
+        'events_url': f'/api/jobs/{job.id}/events',
+        'result_url': f'/api/jobs/{job.id}/result'
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def job_status(job_id):
+    """Report the current stage and event history of a job"""
+    job = get_owned_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+@login_required
+def job_result(job_id):
+    """Download the formatted document of a finished job
+    
+    By default in the templates the job was submitted with; others are
+    rendered from its structured data.
+    """
+    job = get_owned_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status == FAILED:
+        return jsonify({'error': job.error}), job.error_status
+    if job.status != DONE:
+        return jsonify({'error': 'Job is not finished yet', 'stage': job.stage}), 409
+    result = job_queue.result(job.id)
+    if result is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    try:
+        result_format = get_result_format()
+        rendered, meta = result
+        filename, json_data = meta['filename'], meta['data']
+        templates = get_templates(default=rendered) if result_format != 'json' else ()
+        missing = [template_id for template_id in templates if template_id not in rendered]
+        with stage_timer('render'):
+            extra = render_documents(json_data, missing) if missing else {}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    documents = {template_id: io.BytesIO(rendered[template_id]) if template_id in rendered
+                 else extra[template_id] for template_id in templates}
+    return result_response(result_format, documents, filename, json_data)
+
+
+@app.route('/api/render', methods=['POST'])
+@login_required
+def render_resume():
+    """Regenerate the Word document from (edited) structured JSON, without extraction or the LLM
+    
+    The body is the resume JSON, or the {"data": ...} response of format=json.
+    Query parameter template selects templates as for /api/process.
+    """
+    try:
+        templates = get_templates()
+        json_data = request.get_json(silent=True)
+        if isinstance(json_data, dict) and isinstance(json_data.get('data'), dict):
+            json_data = json_data['data']
+        if json_data is None:
+            raise ValueError('Request body must be the resume JSON')
+        validate_resume(json_data)
+        with stage_timer('render'):
+            documents = render_documents(json_data, templates)
+        return result_response('docx', documents, make_download_name(json_data), json_data)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error rendering resume: {str(e)}")
+        return jsonify({'error': f'Rendering error: {str(e)}'}), 500
+
+
+@app.route('/api/templates', methods=['GET'])
+@login_required
+def list_templates():
+    """The Word templates that the template parameter can select"""
+    return jsonify({'default': DEFAULT_TEMPLATE, 'templates': template_catalog.list()})
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+@login_required
+def job_events(job_id):
+    """Stream job progress as Server-Sent Events until the job finishes
+    
+    When JOB_EVENT_STREAMS streams are already open, answers 503 with the
+    status URL to poll instead.
+    """
+    job = get_owned_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not event_stream_slots.acquire(blocking=False):
+        return jsonify({
+            'error': 'Too many open event streams; poll the status URL instead',
+            'status_url': f'/api/jobs/{job.id}'
+        }), 503, {'Retry-After': str(JOB_POLL_INTERVAL)}
+    
+    def generate():
+        sent = 0
+        while True:
+            events, finished = job_queue.wait_for_events(job.id, sent, timeout=JOB_EVENT_KEEPALIVE)
+            if not events and not finished:
+                # Comment line keeps proxies from closing an idle stream
+                yield ': keep-alive\n\n'
+            for event in events:
+                yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+            sent += len(events)
+            if finished:
+                return
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(event_stream_slots.release)
+    return response
+
+
+# ============================================
+# Batch Processing
+# ============================================
+
+def read_batch_upload():
+    """Collect [(name, pdf_bytes)] from pdf_files fields or a zip_file; raises ValueError"""
+    if 'api_key' not in request.form:
+        raise ValueError('OpenAI API key is required')
+    
+    files = []
+    zip_file = request.files.get('zip_file')
+    if zip_file and zip_file.filename:
+        files.extend(read_zip_upload(zip_file.stream, BATCH_MAX_FILES, MAX_FILE_SIZE))
+    
+    for pdf_file in request.files.getlist('pdf_files'):
+        if not pdf_file.filename:
+            continue
+        if not pdf_file.filename.lower().endswith('.pdf'):
+            raise ValueError(f'{pdf_file.filename} is not a PDF')
+        with pdf_file.stream.view() as view:
+            pdf_bytes = bytes(view)  # Extraction runs in worker processes, which need bytes
+        if len(pdf_bytes) > MAX_FILE_SIZE:
+            raise ValueError(f'{pdf_file.filename} is too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB')
+        files.append((pdf_file.filename, pdf_bytes))
+    
+    if not files:
+        raise ValueError('No PDF files provided')
+    if len(files) > BATCH_MAX_FILES:
+        raise ValueError(f'Too many files. Maximum is {BATCH_MAX_FILES} per batch')
+    
+    return files, request.form.get('api_key', '').strip()
+
+
+def finish_batch_item(api_key, item, extracted):
+    """Structure and render one batch item; returns a result dict
+    
+    'partial' in the result says why only part of the PDF was used, if it was.
+    """
+    pages, local_parse, limit = extracted
+    partial = partial_extraction_error(limit)
+    UPLOAD_BYTES.observe(len(item['pdf_bytes']))
+    text = prepare_llm_input(pages)
+    # Text cut short by the time or memory limit is not cached, a later upload may do better
+    if partial is None:
+        result_cache.put(TEXT_CACHE, item['hash'], pages)
+        if local_parse is not None:
+            result_cache.put(LOCAL_CACHE, item['hash'], local_parse)
+    
+    json_data = accept_local_parse(local_parse)
+    if json_data is None:
+        # call_llm already retried the upstream (UpstreamBusy); this only waits out a full admission queue
+        json_data = retry_with_backoff(
+            lambda: get_structured_data_cached(api_key, text),
+            retry_on=(AdmissionRejected,)
+        )
+    with stage_timer('render'):
+        doc_buffer = create_word_doc_bytes(json_data, get_template_path())
+    return {
+        'name': item['name'],
+        'ok': True,
+        'document': doc_buffer.getvalue(),
+        'partial': partial,
+        'seconds': round(time.time() - item['started_at'], 3),
+    }
+
+
+def unique_output_name(name, used):
+    """Map source.pdf to source_Formatted.docx, de-duplicating within one ZIP"""
+    stem = os.path.splitext(name)[0] or 'resume'
+    candidate = f"{stem}_Formatted.docx"
+    counter = 2
+    while candidate in used:
+        candidate = f"{stem}_Formatted_{counter}.docx"
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+@app.route('/api/batch', methods=['POST'])
+@login_required
+def process_batch():
+    """Format many resumes at once and stream back a ZIP with a manifest"""
+    # A ZIP may be as large as the whole request; PDFs are checked individually
+    request.max_content_length = BATCH_MAX_UPLOAD_SIZE
+    request.max_file_size = BATCH_MAX_UPLOAD_SIZE
+    try:
+        files, api_key = read_batch_upload()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not os.path.exists(get_template_path()):
+        return jsonify({'error': 'Template file not found'}), 500
+    
+    items = []
+    for name, pdf_bytes in files:
+        pdf_hash, pages = get_cached_pages(pdf_bytes)
+        extracted = None
+        if pages is not None:
+            extracted = (pages, result_cache.get(LOCAL_CACHE, pdf_hash) if LOCAL_PARSER else None, None)
+        items.append({'name': name, 'pdf_bytes': pdf_bytes, 'hash': pdf_hash, 'extracted': extracted})
+    
+    print(f"Batch: processing {len(items)} resumes...")
+    
+    def generate():
+        stream = ZipStream()
+        manifest = []
+        used_names = set()
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            results = run_batch(
+                items,
+                extract=(sandbox_extract_and_parse if extract_sandbox
+                         else partial(extract_and_parse, parse=LOCAL_PARSER)),
+                finish=lambda item, extracted: finish_batch_item(api_key, item, extracted),
+                extract_pool=batch_extract_threads if extract_sandbox else get_extract_pool(),
+                llm_concurrency=BATCH_LLM_CONCURRENCY
+            )
+            for result in results:
+                entry = {'source': result['name'], 'seconds': result['seconds']}
+                if result['ok']:
+                    entry['status'] = 'partial' if result['partial'] else 'ok'
+                    entry['output'] = unique_output_name(result['name'], used_names)
+                    archive.writestr(entry['output'], result['document'])
+                    if result['partial']:
+                        entry['error'] = result['partial']
+                else:
+                    entry['status'] = 'error'
+                    entry['error'] = result['error']
+                manifest.append(entry)
+                yield stream.drain()
+            
+            archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+        failures = sum(1 for entry in manifest if entry['status'] == 'error')
+        partial = sum(1 for entry in manifest if entry['status'] == 'partial')
+        print(f"Batch: finished {len(manifest)} resumes ({failures} failed, {partial} partly read)")
+        yield stream.drain()
+    
+    return Response(generate(), mimetype='application/zip', headers={
+        'Content-Disposition': 'attachment; filename=Formatted_Resumes.zip'
+    })
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    """JSON 413 for uploads rejected while streaming, like other API errors"""
+    if isinstance(e, FileTooLarge):
+        message = e.description
+    else:
+        message = f'Upload too large. Maximum size is {request.max_content_length / 1024 / 1024:.1f}MB'
+    return jsonify({'error': message}), 413
+
+
+@app.errorhandler(ServiceUnavailable)
+def service_unavailable(e):
+    """JSON 503 with Retry-After when LLM admission control sheds load"""
+    response = jsonify({'error': e.description})
+    response.status_code = 503
+    if e.retry_after is not None:
+        response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({'status': 'ok'})
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics, merged across gunicorn workers when METRICS_DIR is set"""
+    if METRICS_TOKEN and not session.get('authenticated'):
+        expected = f'Bearer {METRICS_TOKEN}'
+        if not secrets.compare_digest(request.headers.get('Authorization', ''), expected):
+            return jsonify({'error': 'Authentication required'}), 401
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+@login_required
+def cache_stats():
+    """Report result cache hit/miss counts for this worker"""
+    return jsonify(result_cache.stats())
+
+
+@app.route('/assets/<name>', methods=['GET'])
+def serve_asset(name):
+    """Serve a fingerprinted CSS/JS file; its URL changes with its content, so it is cached forever"""
+    asset = static_assets.fingerprinted(name)
+    if asset is None:
+        return jsonify({'error': 'Not found'}), 404
+    return asset.response(request, IMMUTABLE)
+
+
 # Serve static files (CSS, JS) - must be last route
 @app.route('/<path:path>')
 def serve_static(path):
@@ -498,22 +1480,55 @@ def serve_static(path):
     if path.startswith('api/'):
         return jsonify({'error': 'Not found'}), 404
     
-    # Serve CSS and JS files (public - needed for login page styling)
-    if path in ['style.css', 'app.js', 'login.html']:
-        return send_from_directory('frontend', path)
+    # Serve CSS and JS files (public - needed for login page styling) under
+    # their plain names too, revalidated by ETag
+    if path in PUBLIC_FILES:
+        return static_assets.file(path).response(request)
     
     # All other routes require authentication
     if not session.get('authenticated'):
         return redirect('/login')
     
     # Default to index.html for SPA routing
-    return send_from_directory('frontend', 'index.html')
+    return static_assets.file('index.html').response(request, PAGE_CACHE_CONTROL)
+
+
+# ============================================
+# Start-up
+# ============================================
+def warm_up():
+    """Load and initialize the heavy dependencies ahead of the first request
+    
+    gunicorn.conf.py calls this in the master when the app is preloaded, so
+    workers are forked with PyMuPDF, openai, the tokenizer and the compiled
+    templates already in memory, shared copy-on-write. Nothing is recorded in
+    the metrics.
+    """
+    start = time.perf_counter()
+    import pymupdf
+    with pymupdf.open() as doc:
+        doc.new_page().insert_text((72, 72), 'Warm-up')
+        pdf_bytes = doc.tobytes()
+    with open_pdf(pdf_bytes) as doc:
+        extract_pages(doc, pdf_bytes)
+        parse_resume(doc)
+    create_word_doc_bytes(
+        {'first_name': 'Warm', 'last_name': 'Up', 'education': [], 'jobs': [], 'additional_bullets': []},
+        get_template_path()
+    )
+    for path in template_catalog.paths():
+        template_registry.get(path)
+    compact_pages(['Warm-up'])  # Loads the tiktoken encoding
+    # Client resources are imported on first access; the client itself is not kept
+    client = openai.OpenAI(api_key='warm-up')
+    client.chat.completions
+    client.close()
+    print(f"Warm-up: dependencies loaded and templates compiled in {time.perf_counter() - start:.2f}s")
 
 
 if __name__ == '__main__':
     # Get template path to verify it exists
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    template_path = os.path.join(script_dir, "template", "template.docx")
+    template_path = get_template_path()
     
     if not os.path.exists(template_path):
         print(f"WARNING: Template file not found at {template_path}")
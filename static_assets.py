@@ -0,0 +1,146 @@
+"""
+Fingerprinted, precompressed frontend assets served from memory.
+
+StaticAssets reads the frontend once at startup. Stylesheets and scripts
+get a content-hashed URL (/assets/app.<hash>.js) that never changes meaning,
+so browsers may cache it for a year without revalidating. The HTML pages
+are rewritten to reference those URLs and are revalidated on every load
+instead. Every file is kept in memory as is and, when that is smaller,
+gzip- and brotli-compressed, so a request costs a dict lookup: no disk
+access and no compression per hit. Each representation has a strong ETag,
+and a matching If-None-Match gets an empty 304.
+
+brotli is optional; without it only gzip copies are made.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fingerprinted URLs never change content; page HTML must always be revalidated
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Smaller files are not worth a compressed copy
+MIN_COMPRESS_SIZE = 256
+
+# href="style.css" / src="app.js" references in the pages
+_REFERENCE = re.compile(r'''(\b(?:href|src)=["'])([\w.-]+\.(?:css|js))(["'])''')
+
+
+class Asset:
+    """One file's bytes, its compressed copies and their ETags"""
+
+    def __init__(self, name, data, content_type, cache_control):
+        self.name = name
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(data).hexdigest()
+        self.variants = {'identity': data}
+        compressed = {}
+        if len(data) >= MIN_COMPRESS_SIZE:
+            compressed['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                compressed['br'] = brotli.compress(data, quality=11)
+        for encoding, body in compressed.items():
+            if len(body) < len(data):
+                self.variants[encoding] = body
+
+    @property
+    def fingerprinted_name(self):
+        stem, ext = os.path.splitext(self.name)
+        return f'{stem}.{self.digest[:12]}{ext}'
+
+    def etag(self, encoding):
+        # Strong validators must differ between encodings of the same file
+        return self.digest[:32] if encoding == 'identity' else f'{self.digest[:32]}-{encoding}'
+
+    def response(self, request, cache_control=None):
+        """200 with the best encoding the client accepts, or 304 if its copy is current"""
+        encoding = request.accept_encodings.best_match(
+            [e for e in ('br', 'gzip') if e in self.variants] + ['identity'], default='identity')
+        etag = self.etag(encoding)
+        headers = {'Cache-Control': cache_control or self.cache_control, 'ETag': f'"{etag}"'}
+        if len(self.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers=headers)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(self.variants[encoding], headers=headers, content_type=self.content_type)
+
+
+class StaticAssets:
+    """Every file in a directory, held in memory; pages are HTML, the rest are fingerprinted
+
+    With auto_reload, a lookup rebuilds everything if a file's mtime has
+    changed, for editing the frontend during development.
+    """
+
+    def __init__(self, directory, pages, auto_reload=False):
+        self.directory = directory
+        self.pages = pages
+        self.auto_reload = auto_reload
+        self._lock = threading.Lock()
+        self._mtimes = None
+        self._build()
+
+    def _source_mtimes(self):
+        return {entry.name: entry.stat().st_mtime for entry in os.scandir(self.directory) if entry.is_file()}
+
+    def _build(self):
+        mtimes = self._source_mtimes()
+        files = {}
+        fingerprinted = {}
+        for name in sorted(mtimes):
+            if name in self.pages:
+                continue
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                asset = Asset(name, f.read(), self._content_type(name), REVALIDATE)
+            files[name] = asset
+            fingerprinted[asset.fingerprinted_name] = asset
+
+        def reference(match):
+            asset = files.get(match.group(2))
+            url = f'/assets/{asset.fingerprinted_name}' if asset else match.group(2)
+            return match.group(1) + url + match.group(3)
+
+        for name in self.pages:
+            with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                html = _REFERENCE.sub(reference, f.read())
+            files[name] = Asset(name, html.encode('utf-8'), 'text/html; charset=utf-8', REVALIDATE)
+
+        self._files, self._fingerprinted, self._mtimes = files, fingerprinted, mtimes
+
+    @staticmethod
+    def _content_type(name):
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type.endswith('javascript'):
+            content_type += '; charset=utf-8'
+        return content_type
+
+    def _check_reload(self):
+        if self.auto_reload and self._source_mtimes() != self._mtimes:
+            with self._lock:
+                if self._source_mtimes() != self._mtimes:
+                    print(f"Static assets changed, rebuilding from {self.directory}")
+                    self._build()
+
+    def file(self, name):
+        """Asset for a plain file or page name, or None"""
+        self._check_reload()
+        return self._files.get(name)
+
+    def fingerprinted(self, name):
+        """Asset for an /assets/ name with its content hash, or None"""
+        self._check_reload()
+        return self._fingerprinted.get(name)
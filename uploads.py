@@ -0,0 +1,163 @@
+"""
+Streaming, size-capped ingestion of uploaded files.
+
+Werkzeug's form parser writes each uploaded file into whatever the request's
+stream factory returns, chunk by chunk as the body arrives. UploadRequest
+makes that an UploadBuffer, which counts bytes as they are written and
+raises FileTooLarge (a 413) as soon as one file passes its limit, so an
+oversized upload is rejected after reading at most that many bytes instead
+of after buffering all of it. The request as a whole is capped by Flask's
+max_content_length, which is checked against Content-Length before
+anything is read.
+
+A file is held in a single bytearray, or, once it passes spool_threshold,
+in an unnamed temporary file. view() hands that one copy to PyMuPDF as a
+memoryview (of the bytearray, or of an mmap of the temporary file), so no
+bytes object is ever made from it.
+"""
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class FileTooLarge(RequestEntityTooLarge):
+    """One uploaded file is over its size limit"""
+
+
+class UploadBuffer(io.RawIOBase):
+    """Write-once, then readable, store for one uploaded file"""
+
+    def __init__(self, max_size, spool_threshold=0, spool_dir=None):
+        super().__init__()
+        self.max_size = max_size
+        self.spool_threshold = spool_threshold  # 0 keeps every file in memory
+        self.spool_dir = spool_dir
+        self.size = 0
+        self._data = bytearray()
+        self._file = None  # Temporary file once spooled
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    @property
+    def spooled(self):
+        return self._file is not None
+
+    def write(self, data):
+        """Append data; raises FileTooLarge past max_size"""
+        length = len(data)
+        if self.size + length > self.max_size:
+            raise FileTooLarge(f'File too large. Maximum size is {self.max_size / 1024 / 1024}MB')
+        if self._file is None and self.spool_threshold and self.size + length > self.spool_threshold:
+            self._file = tempfile.TemporaryFile(dir=self.spool_dir)
+            self._file.write(self._data)
+            self._data = bytearray()
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._data += data
+        self.size += length
+        return length
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError('Negative seek position')
+        self._pos = offset
+        return offset
+
+    def tell(self):
+        return self._pos
+
+    def readinto(self, buffer):
+        if self._file is not None:
+            self._file.seek(self._pos)
+            count = self._file.readinto(buffer)
+        else:
+            chunk = self._data[self._pos:self._pos + len(buffer)]
+            count = len(chunk)
+            buffer[:count] = chunk
+        self._pos += count
+        return count
+
+    @contextmanager
+    def view(self):
+        """memoryview of the whole file, valid inside the with block"""
+        if self._file is None:
+            with memoryview(self._data) as view:
+                yield view
+            return
+        self._file.flush()
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                memoryview(mapped) as view:
+            yield view
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._data = bytearray()
+        super().close()
+
+
+def detach_upload(file_storage):
+    """Take an uploaded file's UploadBuffer so it outlives the request; the caller closes it"""
+    upload = file_storage.stream
+    file_storage.stream = io.BytesIO()  # What the request closes on teardown instead
+    return upload
+
+
+class UploadRequest(Request):
+    """Flask request that streams uploaded files into UploadBuffers
+
+    Settings come from the app config: UPLOAD_MAX_FILE_SIZE,
+    UPLOAD_SPOOL_THRESHOLD and UPLOAD_SPOOL_DIR. A view can change
+    max_file_size for its own request before it touches request.files,
+    just like max_content_length.
+    """
+
+    _max_file_size = None
+
+    @property
+    def max_file_size(self):
+        if self._max_file_size is not None:
+            return self._max_file_size
+        return current_app.config['UPLOAD_MAX_FILE_SIZE']
+
+    @max_file_size.setter
+    def max_file_size(self, value):
+        self._max_file_size = value
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        config = current_app.config
+        return UploadBuffer(
+            self.max_file_size,
+            spool_threshold=config.get('UPLOAD_SPOOL_THRESHOLD', 0),
+            spool_dir=config.get('UPLOAD_SPOOL_DIR'),
+        )
+
+
+def configure_uploads(app, max_file_size, max_request_size, spool_threshold=0, spool_dir=None):
+    """Install UploadRequest on app with the given limits"""
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    app.request_class = UploadRequest
+    app.config['MAX_CONTENT_LENGTH'] = max_request_size
+    app.config['UPLOAD_MAX_FILE_SIZE'] = max_file_size
+    app.config['UPLOAD_SPOOL_THRESHOLD'] = spool_threshold
+    app.config['UPLOAD_SPOOL_DIR'] = spool_dir